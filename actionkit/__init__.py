@@ -1,33 +1,113 @@
 import logging
 import os
+import sys
+from importlib import import_module
+from typing import TYPE_CHECKING
 
-from .campaigns import Campaigns
 from .connection import Connection
-from .donationaction import DonationAction
-from .donationpages import DonationPages
-from .genericactions import GenericActions
-from .genericpages import GenericPages
-from .groups import Groups
-from .languages import Languages
-from .lists import Lists
-from .multilingualcampaigns import MultilingualCampaigns
-from .orderrecurring import OrderRecurring
-from .orders import Orders
-from .petitions import Petitions
-from .profilecancelpush import ProfileCancelPush
-from .profileupdatepush import ProfileUpdatePush
-from .recurringpaymentpush import RecurringPaymentPush
-from .signupactions import SignupActions
-from .signuppages import SignupPages
-from .sql import SQL
-from .transactions import Transactions
-from .uploads import Uploads
-from .users import Users
-from .userfields import UserFields
 from .validation import ValidationError
 
+if TYPE_CHECKING:
+    from .registry import Registry
 
-def connect(hostname=None, username=None, password=None, **kwargs):
+# The resources of ActionKit and AsyncActionKit, by attribute name: (module, class)
+RESOURCES = {
+    "Orders": ("orders", "Orders"),
+    "OrderRecurring": ("orderrecurring", "OrderRecurring"),
+    "DonationAction": ("donationaction", "DonationAction"),
+    "Groups": ("groups", "Groups"),
+    "Languages": ("languages", "Languages"),
+    "Lists": ("lists", "Lists"),
+    "Uploads": ("uploads", "Uploads"),
+    "Users": ("users", "Users"),
+    "UserFields": ("userfields", "UserFields"),
+    "Campaigns": ("campaigns", "Campaigns"),
+    "MultilingualCampaigns": ("multilingualcampaigns", "MultilingualCampaigns"),
+    "Petitions": ("petitions", "Petitions"),
+    "DonationPages": ("donationpages", "DonationPages"),
+    "RecurringPaymentPush": ("recurringpaymentpush", "RecurringPaymentPush"),
+    "ProfileCancelPush": ("profilecancelpush", "ProfileCancelPush"),
+    "ProfileUpdatePush": ("profileupdatepush", "ProfileUpdatePush"),
+    "SQL": ("sql", "SQL"),
+    "Transactions": ("transactions", "Transactions"),
+    "SignupPages": ("signuppages", "SignupPages"),
+    "SignupActions": ("signupactions", "SignupActions"),
+    "GenericActions": ("genericactions", "GenericActions"),
+    "GenericPages": ("genericpages", "GenericPages"),
+}
+
+# Resources with their own asyncio implementation, the others use AsyncHttpMethods.of
+ASYNC_RESOURCES = {
+    "DonationAction": ("asyncdonationaction", "AsyncDonationAction"),
+    "SQL": ("asyncsql", "AsyncSQL"),
+    "Uploads": ("asyncuploads", "AsyncUploads"),
+}
+
+# Everything else the package exports, imported on first access so that `import actionkit`
+# doesn't pay for asyncio, httpx or the modules of unused features
+_lazy_exports = {
+    "AsyncConnection": "asyncconnection",
+    "AsyncHttpMethods": "asynchttpmethods",
+    "AsyncDonationAction": "asyncdonationaction",
+    "AsyncSQL": "asyncsql",
+    "AsyncUploadJob": "asyncuploads",
+    "AsyncUploads": "asyncuploads",
+    "MemoryCache": "cache",
+    "QueryCache": "cache",
+    "ResponseCache": "cache",
+    "SQLiteCache": "cache",
+    "Checkpoint": "checkpoint",
+    "JSONCodec": "codec",
+    "OrjsonCodec": "codec",
+    "ChunkedQuery": "chunkedquery",
+    "DonationBatch": "donationbatch",
+    "DonationResult": "donationbatch",
+    "MetricsCollector": "metrics",
+    "Record": "models",
+    "UserRecord": "models",
+    "ActionRecord": "models",
+    "DonationActionRecord": "models",
+    "OrderRecord": "models",
+    "TransactionRecord": "models",
+    "FileTokenBucket": "ratelimit",
+    "RateLimiter": "ratelimit",
+    "TokenBucket": "ratelimit",
+    "Registry": "registry",
+    "RequestLogger": "requestlog",
+    "CircuitBreaker": "retry",
+    "CircuitOpenError": "retry",
+    "RetryPolicy": "retry",
+    "RowMapper": "rows",
+    "to_datetime": "rows",
+    "to_decimal": "rows",
+    "PollBackoff": "uploadjob",
+    "UploadError": "uploadjob",
+    "UploadJob": "uploadjob",
+    "UploadUsersError": "uploads",
+    **{name: module for name, (module, _) in RESOURCES.items()},
+}
+
+
+def __getattr__(name):
+    if name not in _lazy_exports:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{_lazy_exports[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_exports))
+
+
+def _resource_class(resources, name):
+    module, class_name = resources[name]
+    return getattr(import_module(f".{module}", __name__), class_name)
+
+
+def connect(
+    hostname=None, username=None, password=None, connection_class=Connection, **kwargs
+):
     if not username:
         username = os.environ.get("ACTIONKIT_USERNAME")
     if not password:
@@ -41,40 +121,56 @@ def connect(hostname=None, username=None, password=None, **kwargs):
             " set ENV ACTIONKIT_USERNAME, ACTIONKIT_PASSWORD, ACTIONKIT_HOSTNAME "
             "or pass parameters to connect()"
         )
-    return Connection(
-        hostname,
-        username,
-        password,
-        logger=kwargs.get("logger", logging.getLogger(__name__)),
-    )
+    kwargs.setdefault("logger", logging.getLogger(__name__))
+    return connection_class(hostname, username, password, **kwargs)
 
 
 class ActionKit:
+    """
+    Entry point to the ActionKit API: ak.Users, ak.SQL and the other RESOURCES are created on
+    first access and share the connection.
+    """
+
     def __init__(self, *args, **kwargs):
         self.connection = connect(*args, **kwargs)
 
-        self.Orders = Orders(self.connection)
-        self.OrderRecurring = OrderRecurring(self.connection)
-        self.DonationAction = DonationAction(self.connection)
-        self.Groups = Groups(self.connection)
-        self.Languages = Languages(self.connection)
-        self.Lists = Lists(self.connection)
-        self.Uploads = Uploads(self.connection)
-        self.Users = Users(self.connection)
-        self.UserFields = UserFields(self.connection)
-        self.Campaigns = Campaigns(self.connection)
-        self.MultilingualCampaigns = MultilingualCampaigns(self.connection)
-        self.Petitions = Petitions(self.connection)
-        self.DonationPages = DonationPages(self.connection)
-        self.RecurringPaymentPush = RecurringPaymentPush(self.connection)
-        self.ProfileCancelPush = ProfileCancelPush(self.connection)
-        self.ProfileUpdatePush = ProfileUpdatePush(self.connection)
-        self.SQL = SQL(self.connection)
-        self.Transactions = Transactions(self.connection)
-        self.SignupPages = SignupPages(self.connection)
-        self.SignupActions = SignupActions(self.connection)
-        self.GenericActions = GenericActions(self.connection)
-        self.GenericPages = GenericPages(self.connection)
+    def __getattr__(self, name):
+        if name not in RESOURCES:
+            raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+        resource = self._create_resource(name)
+        setattr(self, name, resource)
+        return resource
+
+    def __dir__(self):
+        return sorted(set(super().__dir__()) | set(RESOURCES))
+
+    def _create_resource(self, name):
+        return _resource_class(RESOURCES, name)(self.connection)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Close the pooled HTTP connections to ActionKit
+        """
+        if self.connection.registry is not None:
+            self.connection.registry.stop_refresh()
+        self.connection.close()
+
+    @property
+    def registry(self) -> "Registry":
+        """
+        The Registry of languages, groups, lists and campaigns, created on first use
+        """
+        if self.connection.registry is None:
+            from .registry import Registry
+
+            self.connection.registry = Registry(self)
+        return self.connection.registry
 
     @staticmethod
     def get_resource_uri(response):
@@ -96,3 +192,46 @@ class ActionKit:
         Provides access to the underlying Connection class's get_resource_uri_id_from_response method
         """
         return Connection.get_resource_uri_id_from_response(response)
+
+
+class AsyncActionKit:
+    """
+    Asyncio counterpart of ActionKit, backed by an AsyncConnection.
+
+    Every resource supports the generic get, post, patch, put, delete and search coroutines.
+    DonationAction, SQL and Uploads also provide their specific methods as coroutines.
+    """
+
+    def __init__(self, *args, **kwargs):
+        from .asyncconnection import AsyncConnection
+
+        self.connection = connect(*args, connection_class=AsyncConnection, **kwargs)
+
+    __getattr__ = ActionKit.__getattr__
+    __dir__ = ActionKit.__dir__
+
+    def _create_resource(self, name):
+        if name in ASYNC_RESOURCES:
+            return _resource_class(ASYNC_RESOURCES, name)(self.connection)
+        from .asynchttpmethods import AsyncHttpMethods
+
+        return AsyncHttpMethods.of(_resource_class(RESOURCES, name))(self.connection)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        """
+        Close the pooled HTTP connections to ActionKit
+        """
+        await self.connection.aclose()
+
+
+# Module __getattr__ (PEP 562) is only called from Python 3.7, so earlier versions import every
+# export upfront
+if sys.version_info < (3, 7):
+    for _name in _lazy_exports:
+        __getattr__(_name)
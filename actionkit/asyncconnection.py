@@ -0,0 +1,195 @@
+import asyncio
+import time
+
+import requests
+
+from .connection import Connection
+
+
+class AsyncConnection(Connection):
+    """
+    Asyncio counterpart of Connection, built on httpx.
+
+    The get, post, patch, put and delete methods return coroutines. Path normalisation, retries
+    and error handling behave as in Connection: failed requests raise requests.HTTPError (with
+    the httpx response attached) or ValidationError, and network errors raise the matching
+    requests exception.
+
+    httpx is an optional dependency: pip install actionkit[async]
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._client = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    @property
+    def client(self):
+        """
+        The httpx.AsyncClient holding the pool of keep-alive connections to ActionKit.
+
+        It is created on first use, and bound to the event loop running at that time.
+        """
+        if self._client is None:
+            self._client = self._create_client()
+        return self._client
+
+    @property
+    def session(self):
+        return self.client
+
+    def _create_client(self):
+        try:
+            import httpx
+        except ImportError:
+            raise ImportError(
+                "AsyncConnection requires httpx: pip install actionkit[async]"
+            )
+
+        limits = httpx.Limits(
+            max_connections=self.pool_maxsize,
+            max_keepalive_connections=self.pool_maxsize,
+        )
+        # No timeout, as with requests: long report queries take longer than the 5 seconds httpx
+        # waits by default, and POSTs are not retried
+        return httpx.AsyncClient(limits=limits, timeout=None)
+
+    def close(self) -> None:
+        raise TypeError("AsyncConnection must be closed with: await connection.aclose()")
+
+    async def aclose(self) -> None:
+        """
+        Close the pooled connections
+        """
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+    async def prewarm(self, connections: int = 1) -> bool:
+        """
+        Open keep-alive connections to ActionKit ahead of the first requests, see
+        Connection.prewarm
+        """
+        import httpx
+
+        url = self._path("")
+        connections = max(1, min(connections, self.pool_maxsize))
+
+        async def head() -> bool:
+            try:
+                await self.client.head(url, headers=self.request_kwargs["headers"])
+            except httpx.TransportError as e:
+                self.logger.warning(f"Could not prewarm the connection to {self.hostname}: {e}")
+                return False
+            return True
+
+        return all(await asyncio.gather(*(head() for _ in range(connections))))
+
+    @staticmethod
+    def _httpx_kwargs(request_kwargs: dict) -> dict:
+        """
+        Translate requests keyword arguments to their httpx equivalent
+        """
+        httpx_kwargs = dict(request_kwargs)
+        auth = httpx_kwargs.pop("auth", None)
+        if isinstance(auth, requests.auth.HTTPBasicAuth):
+            auth = (auth.username, auth.password)
+        if auth is not None:
+            httpx_kwargs["auth"] = auth
+        data = httpx_kwargs.get("data")
+        if isinstance(data, (bytes, str)):
+            httpx_kwargs["content"] = httpx_kwargs.pop("data")
+        return httpx_kwargs
+
+    async def _make_request(
+        self, http_method: str, path: str, json=None, params=None, data=None, **kwargs
+    ):
+        """
+        Make the request to the ActionKit API with the desired method
+        """
+        _http_method, url, request_kwargs = self._prepare_request(
+            http_method, path, json=json, params=params, data=data, **kwargs
+        )
+        request_kwargs = self._httpx_kwargs(request_kwargs)
+
+        try:
+            return await self._send_with_retries(_http_method, url, request_kwargs)
+        except Exception as e:
+            self._run_hooks("on_error", http_method=_http_method, url=url, error=e)
+            raise
+
+    async def _send_with_retries(self, http_method: str, url: str, request_kwargs: dict):
+        policy = self._retry_policy()
+        started_at = time.monotonic()
+        attempt = 0
+
+        while True:
+            self._before_attempt(http_method, url, request_kwargs, attempt)
+            try:
+                if self.rate_limiter is not None:
+                    delay = self.rate_limiter.delay(http_method, self._api_path(url))
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                sent_at = time.monotonic()
+                response = await self._send(http_method, url, request_kwargs)
+            except BaseException as e:
+                # Whatever the error, including cancellation, it ends the trial request of a
+                # half-open circuit breaker
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.record_failure()
+                if not isinstance(e, policy.retry_exceptions):
+                    raise
+                delay = policy.next_delay(attempt, started_at, http_method, error=e)
+                if delay is None:
+                    raise
+                self._retrying(http_method, url, attempt, delay, e)
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+
+            streamed = request_kwargs.get("stream", False)
+            self._after_response(http_method, url, response, sent_at, attempt, streamed)
+            if response.status_code < 400:
+                return response
+            if streamed:
+                await response.aread()
+
+            error = requests.exceptions.HTTPError(
+                f"{response.status_code} Error for url: {url}", response=response
+            )
+            delay = policy.next_delay(attempt, started_at, http_method, response=response)
+            if delay is not None:
+                await response.aclose()
+                self._retrying(http_method, url, attempt, delay, error)
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            self._raise_http_error(error)
+
+    async def _send(self, http_method: str, url: str, request_kwargs: dict):
+        """
+        Send the request, raising httpx network errors as their requests equivalent so that
+        retry policies and callers handle both connection classes alike
+        """
+        import httpx
+
+        try:
+            if request_kwargs.get("stream"):
+                # The body is read by the caller, e.g. with response.aiter_bytes()
+                kwargs = dict(request_kwargs)
+                del kwargs["stream"]
+                auth = kwargs.pop("auth", httpx.USE_CLIENT_DEFAULT)
+                request = self.client.build_request(http_method, url, **kwargs)
+                return await self.client.send(request, auth=auth, stream=True)
+            return await self.client.request(http_method, url, **request_kwargs)
+        except httpx.ConnectTimeout as e:
+            raise requests.exceptions.ConnectTimeout(str(e)) from e
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.ReadTimeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
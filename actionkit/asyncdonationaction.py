@@ -0,0 +1,287 @@
+import asyncio
+from datetime import datetime
+from decimal import Decimal
+from itertools import islice
+from typing import AsyncIterator, Callable, Iterable, Union
+
+from requests import HTTPError
+
+from .asynchttpmethods import AsyncHttpMethods
+from .checkpoint import Checkpoint
+from .donationaction import DonationAction
+from .donationbatch import STATUS_METHODS, DonationBatch, DonationResult
+
+
+class AsyncDonationBatch(DonationBatch):
+    """
+    Asyncio counterpart of DonationBatch, to be used with an AsyncDonationAction. Up to
+    `concurrency` records are ingested at once by tasks on the running event loop.
+    """
+
+    async def ingest(self, record: dict) -> DonationResult:
+        """
+        See DonationBatch.ingest
+        """
+        key = self.key(record)
+        push_kwargs = dict(record)
+        status = push_kwargs.pop('status', 'incomplete')
+        status_kwargs = push_kwargs.pop('status_kwargs', {})
+        try:
+            if status not in STATUS_METHODS:
+                raise ValueError(f'Unknown donation status {status}')
+
+            response = await self.donation_action.push(**push_kwargs)
+            if response is None:
+                result = DonationResult(key, record, duplicate=True)
+            else:
+                set_push_status = getattr(self.donation_action, STATUS_METHODS[status])
+                resource_uri = await set_push_status(
+                    self.donation_action.connection.decode(response), **status_kwargs
+                )
+                result = DonationResult(key, record, resource_uri=resource_uri)
+        except Exception as e:
+            self.logger.warning(f'Failed to ingest donation {key}: {e}')
+            return DonationResult(key, record, error=e)
+
+        if self.checkpoint is not None and key is not None:
+            self.checkpoint.add(key)
+        return result
+
+    async def run(self, records: Iterable[dict]) -> AsyncIterator[DonationResult]:
+        """
+        See DonationBatch.run
+        """
+        records = iter(self._pending_records(records))
+        in_flight = {
+            asyncio.ensure_future(self.ingest(record))
+            for record in islice(records, self.concurrency)
+        }
+        try:
+            while in_flight:
+                done, in_flight = await asyncio.wait(
+                    in_flight, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    for record in islice(records, 1):
+                        in_flight.add(asyncio.ensure_future(self.ingest(record)))
+                    yield task.result()
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+
+class AsyncDonationAction(AsyncHttpMethods, DonationAction):
+    """
+    Asyncio counterpart of DonationAction, to be used with an AsyncConnection
+    """
+
+    async def get_donationaction(self, resource_uri: str) -> dict:
+        """
+        See DonationAction.get_donationaction
+        """
+        data = self._cached_donationaction(resource_uri)
+        if data is None:
+            data = await self.get(resource_uri)
+            self._cache_donationaction(resource_uri, data)
+        return data
+
+    async def patch(self, resource_uri: str, to_patch: dict, *args, **kwargs):
+        self._uncache_donationaction(resource_uri)
+        return await super().patch(resource_uri, to_patch, *args, **kwargs)
+
+    async def delete(self, resource_uri: str, *args, **kwargs):
+        self._uncache_donationaction(resource_uri)
+        return await super().delete(resource_uri, *args, **kwargs)
+
+    async def push(
+        self,
+        email: str = None,
+        first_name: str = None,
+        last_name: str = None,
+        country: str = None,
+        postal: str = None,
+        amount: Decimal = None,
+        currency: str = None,
+        page: str = None,
+        payment_account: str = None,
+        custom_action_fields: dict = {},
+        recurring_id: str = None,
+        created_at: datetime = None,
+        skip_confirmation: bool = False,
+        akid: str = None,
+        trans_id: str = None,
+        **kwargs
+    ):
+        """
+        See DonationAction.push
+        """
+        payload = self._push_payload(
+            email=email,
+            first_name=first_name,
+            last_name=last_name,
+            country=country,
+            postal=postal,
+            amount=amount,
+            currency=currency,
+            page=page,
+            payment_account=payment_account,
+            custom_action_fields=custom_action_fields,
+            recurring_id=recurring_id,
+            created_at=created_at,
+            skip_confirmation=skip_confirmation,
+            akid=akid,
+            trans_id=trans_id,
+        )
+
+        try:
+            return await self.connection.post("donationpush/", payload)
+        except HTTPError as e:
+            return self._handle_push_error(e)
+
+    def push_batch(
+        self,
+        records: Iterable[dict],
+        concurrency: int = 8,
+        checkpoint: Union[str, Checkpoint] = None,
+        key: Callable[[dict], str] = None,
+    ) -> AsyncIterator[DonationResult]:
+        """
+        See DonationAction.push_batch. The results are iterated with async for.
+        """
+        batch = AsyncDonationBatch(self, concurrency=concurrency, checkpoint=checkpoint, key=key)
+        return batch.run(records)
+
+    async def push_and_set_incomplete(self, *args, **kwargs):
+        """
+        See DonationAction.push_and_set_incomplete
+        """
+        response = await self.push(*args, **kwargs)
+        action = self.connection.decode(response)
+        await self.set_push_status_incomplete(action)
+        return action['resource_uri']
+
+    async def push_and_set_pending(self, *args, **kwargs):
+        """
+        See DonationAction.push_and_set_pending
+        """
+        response = await self.push(*args, **kwargs)
+        action = self.connection.decode(response)
+        await self.set_push_status_pending(action)
+        return action
+
+    async def set_push_status(
+        self,
+        action_status,
+        donationaction_data: dict = None,
+        resource_uri: str = None,
+        order_uri: str = None,
+        transaction_uri: str = None,
+        custom_action_fields: dict = None,
+        created_at: datetime = None,
+        no_action_if_status_is_already_set: bool = False,
+        recurring_id: str = None,
+        order_status: str = None,
+        transaction_status: str = None,
+        concurrent: bool = None,
+        **kwargs,
+    ):
+        """
+        See DonationAction.set_push_status
+        """
+        if concurrent is None:
+            concurrent = self.concurrent_status_updates
+
+        if self._needs_donationaction_data(
+            donationaction_data, resource_uri, order_uri, transaction_uri
+        ):
+            donationaction_data = await self.get_donationaction(resource_uri)
+
+        resource_uri = donationaction_data['resource_uri']
+        if (
+            no_action_if_status_is_already_set
+            and donationaction_data['status'] == action_status
+        ):
+            self.logger.debug(
+                f'donationaction {resource_uri} status is already {action_status}. Skipping update.'
+            )
+            return resource_uri
+
+        self.logger.debug(
+            f'Setting donationaction {resource_uri} status to {action_status}'
+        )
+        status_patches = self._status_patches(
+            action_status,
+            donationaction_data,
+            custom_action_fields=custom_action_fields,
+            created_at=created_at,
+            recurring_id=recurring_id,
+            order_status=order_status,
+            transaction_status=transaction_status,
+            merge_action_fields=concurrent,
+            **kwargs,
+        )
+        try:
+            if concurrent:
+                results = await asyncio.gather(
+                    *(self.connection.patch(uri, payload) for uri, payload in status_patches),
+                    return_exceptions=True,
+                )
+                for result in results:
+                    if isinstance(result, BaseException):
+                        raise result
+            else:
+                for uri, payload in status_patches:
+                    await self.connection.patch(uri, payload)
+        except HTTPError as e:
+            self._uncache_donationaction(resource_uri)
+            self._raise_status_error(action_status, e)
+        except Exception:
+            self._uncache_donationaction(resource_uri)
+            raise
+        self._update_cached_donationaction(resource_uri, status_patches)
+        return resource_uri
+
+    async def delete_donationaction(self, resource_uri: str):
+        """
+        See DonationAction.delete_donationaction
+        """
+        try:
+            data = await self.get_donationaction(resource_uri)
+            if data['status'] == 'incomplete':
+                self._uncache_donationaction(resource_uri)
+                await self.connection.delete(resource_uri)
+        except HTTPError as e:
+            self._uncache_donationaction(resource_uri)
+            if e.response.status_code == 400:
+                raise Exception(
+                    f'Failed to delete donationaction "{resource_uri}":\n{e.response.text}: {e}'
+                )
+            elif e.response.status_code == 404:
+                self.connection.logger.warning(
+                    f'Donationaction {resource_uri} not found. Skipping delete.\n'
+                )
+                return False
+        return True
+
+    async def delete_donationaction_by_resource_id(self, resource_id):
+        if resource_id:
+            await self.delete_donationaction(self.get_resource_uri_from_id(resource_id))
+
+    async def set_push_status_by_resource_id(self, resource_id, status):
+        resource_uri = self.get_resource_uri_from_id(resource_id)
+        await self.set_push_status(status, resource_uri=resource_uri)
+
+    async def set_push_status_incomplete_by_resource_id(self, resource_id):
+        await self.set_push_status_by_resource_id(resource_id, 'incomplete')
+
+    async def extract_resource_uris(self, resource_uri=None, donationaction_data=None):
+        """
+        See DonationAction.extract_resource_uris
+        """
+        if not (resource_uri or donationaction_data):
+            raise KeyError('Must specify either resource_uri or donationaction_data')
+
+        if not donationaction_data:
+            donationaction_data = await self.get_donationaction(resource_uri)
+
+        return self._resource_uris(donationaction_data)
@@ -0,0 +1,206 @@
+import asyncio
+from collections import deque
+from itertools import islice
+from typing import AsyncIterator, List
+
+from requests import HTTPError
+
+from .httpmethods import HttpMethods, page_stride
+
+
+class AsyncHttpMethods(HttpMethods):
+    """
+    Asyncio counterpart of HttpMethods, to be used with an AsyncConnection.
+    The request methods are coroutines, the resource uri helpers are unchanged.
+    """
+
+    _resource_classes = {}
+
+    @classmethod
+    def of(cls, resource_class):
+        """
+        Returns an AsyncHttpMethods subclass for the resource_name of the given HttpMethods class
+        """
+        if resource_class not in cls._resource_classes:
+            cls._resource_classes[resource_class] = type(
+                f"Async{resource_class.__name__}",
+                (cls,),
+                {"resource_name": resource_class.resource_name, "model": resource_class.model},
+            )
+        return cls._resource_classes[resource_class]
+
+    async def search(self, typed: bool = False, **params: dict) -> List[dict]:
+        """
+        Returns a list of paged results from ActionKit for the resource self.resource_name,
+        as self.model records if typed
+        """
+        return [obj async for obj in self.iter_search(typed=typed, **params)]
+
+    async def iter_search(
+        self, cursor: str = None, page_size: int = None, typed: bool = False, **params: dict
+    ) -> AsyncIterator[dict]:
+        """
+        See HttpMethods.iter_search
+        """
+        to_model = self._typed(typed)
+        async for page in self.iter_pages(cursor=cursor, page_size=page_size, **params):
+            for obj in page["objects"]:
+                yield obj if to_model is None else to_model(obj)
+
+    async def iter_pages(
+        self, cursor: str = None, page_size: int = None, **params: dict
+    ) -> AsyncIterator[dict]:
+        """
+        See HttpMethods.iter_pages
+        """
+        if page_size:
+            params["_limit"] = page_size
+        try:
+            page = await (self.get(cursor) if cursor else self.get(**params))
+            yield page
+            while page["meta"]["next"]:
+                page = await self.get(page["meta"]["next"])
+                yield page
+
+        except HTTPError as e:
+            if e.response.status_code == 400:
+                raise Exception(f"Bad request for search(): {e.response.text}: {e}")
+            raise
+
+    async def search_parallel(
+        self, concurrency: int = 4, page_size: int = 100, typed: bool = False, **params: dict
+    ) -> List[dict]:
+        """
+        See HttpMethods.search_parallel
+        """
+        return [
+            obj
+            async for obj in self.iter_search_parallel(
+                concurrency=concurrency, page_size=page_size, typed=typed, **params
+            )
+        ]
+
+    async def iter_search_parallel(
+        self,
+        concurrency: int = 4,
+        page_size: int = 100,
+        ordered: bool = True,
+        typed: bool = False,
+        **params: dict,
+    ) -> AsyncIterator[dict]:
+        """
+        See HttpMethods.iter_search_parallel. Pages are fetched by concurrent tasks on the
+        running event loop.
+        """
+        to_model = self._typed(typed)
+        if to_model is not None:
+            async for obj in self.iter_search_parallel(concurrency, page_size, ordered, **params):
+                yield to_model(obj)
+            return
+        params["_limit"] = page_size
+        start = int(params.pop("_offset", 0))
+        try:
+            first_page = await self.get(**params, _offset=start)
+            for obj in first_page["objects"]:
+                yield obj
+
+            total_count = first_page["meta"].get("total_count")
+            if total_count is None:
+                if first_page["meta"]["next"]:
+                    async for obj in self.iter_search(cursor=first_page["meta"]["next"]):
+                        yield obj
+                return
+
+            stride = page_stride(first_page, page_size)
+            offsets = iter(range(start + stride, total_count, stride))
+
+            async def fetch_page(offset):
+                return (await self.get(**params, _offset=offset))["objects"]
+
+            pending = deque(
+                asyncio.ensure_future(fetch_page(offset))
+                for offset in islice(offsets, concurrency)
+            )
+            try:
+                while pending:
+                    if ordered:
+                        done = pending.popleft()
+                    else:
+                        finished, _ = await asyncio.wait(
+                            pending, return_when=asyncio.FIRST_COMPLETED
+                        )
+                        done = finished.pop()
+                        pending.remove(done)
+                    for offset in islice(offsets, 1):
+                        pending.append(asyncio.ensure_future(fetch_page(offset)))
+                    for obj in await done:
+                        yield obj
+            finally:
+                for task in pending:
+                    task.cancel()
+
+        except HTTPError as e:
+            if e.response.status_code == 400:
+                raise Exception(f"Bad request for search(): {e.response.text}: {e}")
+            raise
+
+    async def delete(
+        self, resource_uri: str, *args, ignore_404=True, dry_run=False, **kwargs
+    ):
+        """
+        Generic delete method for ActionKit resources
+        """
+        if dry_run:
+            self.logger.info(
+                f"Dry run: Would have deleted {self.connection._path(resource_uri)}"
+            )
+            return True
+        try:
+            await self.connection.delete(resource_uri, *args, **kwargs)
+        except HTTPError as e:
+            if e.response.status_code == 404 and ignore_404:
+                return False
+            raise
+        return True
+
+    async def get(self, resource_uri=None, *args, typed: bool = False, **params):
+        """
+        Get an object at path resource_uri from ActionKit, as a self.model record if typed
+
+        param kwargs are passed as query params to the request
+        """
+        to_model = self._typed(typed)
+        response = await self.connection.get(
+            resource_uri or self.resource_name, *args, params=params
+        )
+        data = self.connection.decode(response)
+        return data if to_model is None else to_model(data)
+
+    async def patch(self, resource_uri: str, to_patch: dict, *args, **kwargs):
+        """
+        Generic patch method for ActionKit resources
+        """
+        await self.connection.patch(resource_uri, *args, json=to_patch, **kwargs)
+        return True
+
+    async def put(self, resource_uri: str, to_put: dict, *args, **kwargs):
+        """
+        Generic put method for ActionKit resources
+        """
+        await self.connection.put(resource_uri, *args, json=to_put, **kwargs)
+        return True
+
+    async def post(self, *args, **kwargs):
+        """
+        Post a new payload for type self.resource_name to ActionKit
+
+        Returns the resource_uri of the newly created resource
+        """
+        response = await self.connection.post(self.resource_name, *args, **kwargs)
+        return self.connection.__class__.get_resource_uri(response)
+
+    async def get_by_id(self, id, *args, typed: bool = False, **params):
+        """
+        Get an object by its id from ActionKit
+        """
+        return await self.get(f'{self.resource_name}/{id}', *args, typed=typed, **params)
@@ -0,0 +1,199 @@
+import asyncio
+from collections import deque
+from itertools import islice
+from typing import AsyncIterator, Callable, Iterable, Sequence, Tuple
+
+from .asynchttpmethods import AsyncHttpMethods
+from .chunkedquery import ChunkedQuery
+from .jsonstream import JSONArrayParser
+from .rows import RowMapper
+from .sql import SQL
+
+
+class AsyncChunkedQuery(ChunkedQuery):
+    """
+    Asyncio counterpart of ChunkedQuery, run by AsyncSQL.iter_query_chunked. Up to
+    `concurrency` chunks are fetched at once by tasks on the running event loop.
+    """
+
+    async def get_bounds(self) -> Tuple[int, int]:
+        """
+        See ChunkedQuery.get_bounds
+        """
+        if self.bounds is None:
+            self._set_bounds(await self.sql.run_query(self.bounds_query(), refresh=True))
+        return self.bounds
+
+    async def chunks(self):
+        """
+        See ChunkedQuery.chunks
+        """
+        return self._ranges(await self.get_bounds())
+
+    async def fetch_chunk(self, start: int, end: int) -> list:
+        rows = await self.sql.run_query(
+            self.query, chunk_start=start, chunk_end=end, **self.values
+        )
+        return self._chunk_rows(start, end, rows)
+
+    async def run(self) -> AsyncIterator:
+        """
+        See ChunkedQuery.run
+        """
+        chunks = await self.chunks()
+        pending = deque(
+            (start, asyncio.ensure_future(self.fetch_chunk(start, end)))
+            for start, end in islice(chunks, self.concurrency)
+        )
+        try:
+            while pending:
+                start, task = pending.popleft()
+                for next_start, next_end in islice(chunks, 1):
+                    pending.append(
+                        (next_start, asyncio.ensure_future(self.fetch_chunk(next_start, next_end)))
+                    )
+                for row in await task:
+                    yield row
+                if self.checkpoint is not None:
+                    self.checkpoint.add(start)
+        finally:
+            for _, task in pending:
+                task.cancel()
+
+
+class AsyncSQL(AsyncHttpMethods, SQL):
+    """
+    Asyncio counterpart of SQL, to be used with an AsyncConnection
+    """
+
+    async def run_report(self, report_name: str, **values: dict):
+        """
+        See SQL.run_report
+        """
+        response = await self._run_report(report_name, **values)
+        return self.connection.decode(response)
+
+    async def run_query(self, query: str = '', **values: dict):
+        """
+        See SQL.run_query
+        """
+        rows = self._cached_rows(query, values)
+        if rows is None:
+            response = await self._run_query(query, **values)
+            self._cache_rows(query, values, response)
+            rows = self.connection.decode(response)
+        return rows
+
+    async def iter_query(
+        self,
+        query: str = '',
+        columns: Sequence[str] = None,
+        row_type: Callable = None,
+        converters: dict = None,
+        chunk_size: int = 65536,
+        **values: dict,
+    ):
+        """
+        See SQL.iter_query. Use with: async for row in ak.SQL.iter_query(...)
+        """
+        mapper = RowMapper(columns, row_type, converters)
+        parser = JSONArrayParser()
+        response = await self._stream_query(query, **values)
+        try:
+            async for chunk in response.aiter_bytes(chunk_size):
+                for row in parser.feed(chunk):
+                    yield mapper(row)
+            for row in parser.close():
+                yield mapper(row)
+        finally:
+            await response.aclose()
+
+    def iter_query_chunked(
+        self,
+        query: str,
+        key: str = 'id',
+        table: str = None,
+        chunk_size: int = 10000,
+        concurrency: int = 4,
+        checkpoint=None,
+        **kwargs,
+    ) -> AsyncIterator:
+        """
+        See SQL.iter_query_chunked. Use with: async for row in ak.SQL.iter_query_chunked(...)
+        """
+        chunked_query = AsyncChunkedQuery(
+            self,
+            query,
+            key=key,
+            table=table,
+            chunk_size=chunk_size,
+            concurrency=concurrency,
+            checkpoint=checkpoint,
+            **kwargs,
+        )
+        return chunked_query.run()
+
+    async def fetch_transaction_id_by_trans_id(self, trans_id: str) -> dict:
+        """
+        See SQL.fetch_transaction_id_by_trans_id
+        """
+        query = """
+            SELECT id
+            FROM core_transaction
+            WHERE trans_id = {{ trans_id }}
+        """
+        results = await self.run_query(query, trans_id=trans_id)
+        if results:
+            if len(results) > 1:
+                self.connection.logger.warning(
+                    f'More than 1 result found for trans_id {trans_id} in transaction table'
+                )
+            return results[0][0]
+        return None
+
+    async def fetch_signup_action_ids(self, page_id: int, user_id: int):
+        """
+        See SQL.fetch_signup_action_ids
+        """
+        query = """
+            SELECT id
+            FROM core_action
+            INNER JOIN core_signupaction ON core_signupaction.action_ptr_id = core_action.id
+            WHERE page_id = {{ page_id }} AND user_id = {{ user_id }}
+        """
+        rows = await self.run_query(query, page_id=page_id, user_id=user_id, cache_duration=1)
+        return [id for row in rows for id in row]
+
+    async def _run_queries(self, queries: list, concurrency: int) -> list:
+        """
+        See SQL._run_queries
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(query, values):
+            async with semaphore:
+                return await self.run_query(query, **values)
+
+        return await asyncio.gather(*(run(query, values) for query, values in queries))
+
+    async def fetch_transaction_ids_by_trans_ids(
+        self, trans_ids: Iterable[str], concurrency: int = 4
+    ) -> dict:
+        """
+        See SQL.fetch_transaction_ids_by_trans_ids
+        """
+        trans_ids = list(dict.fromkeys(trans_ids))
+        queries = self._transaction_ids_queries(trans_ids, self.batch_size)
+        results = await self._run_queries(queries, concurrency)
+        return self._transaction_ids_result(trans_ids, results)
+
+    async def fetch_signup_action_ids_by_pairs(
+        self, pairs: Iterable[Tuple[int, int]], concurrency: int = 4
+    ) -> dict:
+        """
+        See SQL.fetch_signup_action_ids_by_pairs
+        """
+        pairs = list(dict.fromkeys((int(page_id), int(user_id)) for page_id, user_id in pairs))
+        queries = self._signup_action_ids_queries(pairs, self.batch_size)
+        results = await self._run_queries(queries, concurrency)
+        return self._signup_action_ids_result(pairs, results)
@@ -0,0 +1,146 @@
+import asyncio
+import copy
+import os
+import time
+from collections import deque
+from typing import Iterable, List, Sequence
+
+from .asynchttpmethods import AsyncHttpMethods
+from .uploadjob import PollBackoff, UploadError, UploadJob, poll_interval
+from .uploads import Uploads, UploadUsersError, users_csv_chunks
+
+
+class AsyncUploadJob(UploadJob):
+    """
+    Asyncio counterpart of UploadJob, returned by the uploads of an AsyncActionKit.
+    refresh, wait and result are coroutines, and warnings and errors async iterators.
+    """
+
+    async def refresh(self) -> dict:
+        self.data = await self.uploads.poll(self.upload_url)
+        return self.data
+
+    async def wait(self, timeout: float = None, backoff: PollBackoff = None) -> dict:
+        """
+        See UploadJob.wait
+        """
+        backoff = backoff or PollBackoff()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            await self.refresh()
+            if self.done:
+                return self.data
+            await asyncio.sleep(poll_interval(backoff, self.progress, deadline, self))
+
+    async def result(self, timeout: float = None) -> dict:
+        """
+        See UploadJob.result
+        """
+        await self.wait(timeout)
+        if self.failed:
+            raise UploadError(self)
+        return self.data
+
+
+class AsyncUploads(AsyncHttpMethods, Uploads):
+    """
+    Asyncio counterpart of Uploads, to be used with an AsyncConnection
+    """
+
+    async def poll(self, upload_url):
+        return await self.get(upload_url)
+
+    def job(self, upload_url: str) -> AsyncUploadJob:
+        """
+        See Uploads.job
+        """
+        return AsyncUploadJob(self, upload_url)
+
+    async def wait_all(
+        self, jobs: List[AsyncUploadJob], timeout: float = None, backoff: PollBackoff = None
+    ) -> List[dict]:
+        """
+        Waits for the processing of several uploads concurrently, see Uploads.wait_all. Each
+        job is polled with a copy of backoff.
+        """
+        return await asyncio.wait_for(
+            asyncio.gather(*(job.wait(backoff=copy.copy(backoff)) for job in jobs)), timeout
+        )
+
+    async def _post_upload(
+        self, file_name: str, upload, import_page: str, autocreate_user_fields: bool = False
+    ) -> str:
+        """
+        See Uploads._post_upload
+        """
+        response = await self.connection.post(
+            self.resource_name,
+            data={
+                'page': import_page,
+                'autocreate_user_fields': 'true' if autocreate_user_fields else 'false',
+            },
+            files={'upload': (file_name, upload, 'text/csv')},
+        )
+        return self.get_resource_uri(response)
+
+    async def upload(
+        self, file_name, import_page, wait: bool = True, timeout: float = None
+    ) -> AsyncUploadJob:
+        """
+        See Uploads.upload
+        """
+        with open(file_name, 'rb') as f:
+            upload_url = await self._post_upload(os.path.basename(file_name), f, import_page)
+        job = self.job(upload_url)
+        if wait:
+            await job.wait(timeout)
+        return job
+
+    async def upload_users(
+        self,
+        users: Iterable[dict],
+        import_page: str,
+        columns: Sequence[str] = None,
+        chunk_size: int = 50000,
+        concurrency: int = 4,
+        autocreate_user_fields: bool = False,
+    ) -> List[AsyncUploadJob]:
+        """
+        See Uploads.upload_users
+        """
+        jobs = {}
+        pending = deque()
+
+        async def next_job():
+            index, task = pending.popleft()
+            try:
+                jobs[index] = self.job(await task)
+            except Exception as e:
+                # Uploads already started are completed, and kept track of
+                others = list(pending)
+                pending.clear()
+                results = await asyncio.gather(
+                    *(other for _, other in others), return_exceptions=True
+                )
+                for (other_index, _), result in zip(others, results):
+                    if not isinstance(result, BaseException):
+                        jobs[other_index] = self.job(result)
+                raise UploadUsersError(jobs, index) from e
+
+        chunks = users_csv_chunks(users, columns, chunk_size)
+        try:
+            for index, (file_name, upload) in enumerate(chunks):
+                if len(pending) >= concurrency:
+                    await next_job()
+                pending.append((
+                    index,
+                    asyncio.ensure_future(
+                        self._post_upload(file_name, upload, import_page, autocreate_user_fields)
+                    ),
+                ))
+            while pending:
+                await next_job()
+        finally:
+            for _, task in pending:
+                task.cancel()
+        return list(jobs.values())
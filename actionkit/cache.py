@@ -0,0 +1,367 @@
+import hashlib
+import json
+import pickle
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+# Quoted literals, kept as they are, or runs of whitespace, collapsed when normalising queries
+query_whitespace_regex = re.compile(r"('(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\")|\s+")
+
+
+class MemoryCache:
+    """
+    Thread-safe in-memory cache with least-recently-used eviction and an optional time to live.
+
+    :param maxsize: The maximum number of entries kept, the least recently used are evicted first
+    :param ttl: The default number of seconds an entry stays valid, None for no expiry
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return self._lookup(key) is not None
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, _ = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get(self, key, default=None):
+        """
+        Returns the value cached for key, or default if it is missing or expired
+        """
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl: float = None) -> None:
+        """
+        Cache value for key, for ttl seconds or the default ttl of the cache
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_prefix(self, prefix: str) -> None:
+        """
+        Delete the entries of the string keys starting with prefix
+        """
+        with self._lock:
+            for key in [k for k in self._entries if isinstance(k, str) and k.startswith(prefix)]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+class SQLiteCache:
+    """
+    Cache persisted in a local SQLite file, with the same interface as MemoryCache.
+    Values are pickled, so it should only be pointed at files written by this client.
+
+    :param file_name: The SQLite database file, created if needed
+    :param maxsize: The maximum number of entries kept, the least recently used are evicted first
+    :param ttl: The default number of seconds an entry stays valid, None for no expiry
+    :param table: The table holding the entries, so that several caches can share a file
+    """
+
+    def __init__(
+        self, file_name: str, maxsize: int = None, ttl: float = None, table: str = "cache"
+    ):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name {table}")
+        self.file_name = file_name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.table = table
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(file_name, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} "
+                "(key TEXT PRIMARY KEY, value BLOB, expires_at REAL, used_at REAL)"
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def __contains__(self, key) -> bool:
+        return self._lookup(key) is not None
+
+    def _lookup(self, key):
+        now = time.time()
+        with self._lock, self._db:
+            row = self._db.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] is not None and row[1] <= now:
+                self._db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                return None
+            self._db.execute(
+                f"UPDATE {self.table} SET used_at = ? WHERE key = ?", (now, key)
+            )
+            return row
+
+    def get(self, key, default=None):
+        """
+        Returns the value cached for key, or default if it is missing or expired
+        """
+        row = self._lookup(key)
+        if row is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return pickle.loads(row[0])
+
+    def set(self, key, value, ttl: float = None) -> None:
+        """
+        Cache value for key, for ttl seconds or the default ttl of the cache
+        """
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        expires_at = None if ttl is None else now + ttl
+        with self._lock, self._db:
+            self._db.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, used_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, pickle.dumps(value), expires_at, now),
+            )
+            if self.maxsize is not None:
+                self._db.execute(
+                    f"DELETE FROM {self.table} WHERE key NOT IN "
+                    f"(SELECT key FROM {self.table} ORDER BY used_at DESC LIMIT ?)",
+                    (self.maxsize,),
+                )
+
+    def delete(self, key) -> None:
+        with self._lock, self._db:
+            self._db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def delete_prefix(self, prefix: str) -> None:
+        """
+        Delete the entries of the keys starting with prefix
+        """
+        with self._lock, self._db:
+            self._db.execute(
+                f"DELETE FROM {self.table} WHERE substr(key, 1, ?) = ?", (len(prefix), prefix)
+            )
+
+    def clear(self) -> None:
+        with self._lock, self._db:
+            self._db.execute(f"DELETE FROM {self.table}")
+
+    def close(self) -> None:
+        self._db.close()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self)}
+
+
+class ResponseCache:
+    """
+    Cache of the JSON responses of GET requests, used by HttpMethods.get when it is set as the
+    response_cache of a resource class or instance.
+
+    Responses are keyed by the URL and the username of the connection, so that a cache shared
+    by several clients only answers the requests of the same ActionKit user. They are fresh for
+    ttl seconds. Once stale, they are revalidated with a conditional request if ActionKit
+    returned an ETag or Last-Modified header, and reused if ActionKit answers 304 Not Modified.
+
+    :param backend: Where responses are stored, a MemoryCache by default. An SQLiteCache keeps
+        them across processes and restarts.
+    :param ttl: The number of seconds a response is used without asking ActionKit
+    """
+
+    def __init__(self, backend=None, ttl: float = 300):
+        self.backend = backend if backend is not None else MemoryCache()
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+    @staticmethod
+    def key(url: str, params: dict = None, username: str = "") -> str:
+        # URLs have no spaces, so usernames cannot make keys collide
+        if params:
+            url = f"{url}?{urlencode(sorted(params.items()), doseq=True)}"
+        return f"{url} {username}"
+
+    def fetch(self, connection, path: str, params: dict = None):
+        """
+        Returns the decoded JSON response of a GET of path with params, from the cache if fresh
+        """
+        key = self.key(connection._path(path), params, connection.username)
+        entry = self.backend.get(key)
+        now = time.time()
+        if entry is not None and entry["fresh_until"] > now:
+            self.hits += 1
+            return connection.codec.loads(entry["content"])
+
+        headers = {}
+        if entry is not None:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = connection.get(path, params=params, headers=headers)
+        if response.status_code == 304 and entry is not None:
+            self.revalidations += 1
+            entry["fresh_until"] = now + self.ttl
+            self.backend.set(key, entry)
+            return connection.codec.loads(entry["content"])
+
+        self.misses += 1
+        self.backend.set(
+            key,
+            {
+                "fresh_until": now + self.ttl,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "content": response.content,
+            },
+        )
+        return connection.decode(response)
+
+    def invalidate(self, connection, path: str) -> None:
+        """
+        Forget the cached responses of a GET of path without params, for all users
+        """
+        self.backend.delete_prefix(self.key(connection._path(path)))
+
+    def invalidate_resource(self, connection, resource_name: str) -> None:
+        """
+        Forget the cached responses of the searches and objects of resource_name, for all users,
+        leaving those of other resources
+        """
+        url = connection._path(resource_name).rstrip("/")
+        for separator in (" ", "/", "?"):
+            self.backend.delete_prefix(url + separator)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "revalidations": self.revalidations}
+
+
+class QueryCache:
+    """
+    Cache of the results of SQL.run_query, used when it is set as the query_cache of SQL:
+
+        SQL.query_cache = QueryCache()
+
+    Results are keyed by the hostname and username of the connection, so that a cache shared by
+    several instances only answers queries run on the same ActionKit with the same rights, the
+    query, with whitespace normalised, and the values bound to it.
+    They are kept for the cache_duration of the query, as ActionKit does, and refresh=True
+    skips the cached result and replaces it with a new one.
+
+    :param backend: Where results are stored, a MemoryCache by default. An SQLiteCache keeps
+        them across processes and restarts.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else MemoryCache()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    @staticmethod
+    def normalise(query: str) -> str:
+        return query_whitespace_regex.sub(lambda m: m.group(1) or " ", query).strip()
+
+    @classmethod
+    def key(cls, query: str, values: dict, hostname: str = "", username: str = "") -> str:
+        document = json.dumps(
+            [hostname, username, cls.normalise(query), values],
+            sort_keys=True,
+            separators=(",", ":"),
+            default=str,
+        )
+        return hashlib.sha256(document.encode()).hexdigest()
+
+    def get(
+        self,
+        query: str,
+        values: dict,
+        refresh: bool = False,
+        loads=json.loads,
+        hostname: str = "",
+        username: str = "",
+    ):
+        """
+        Returns the cached rows of query with values run on hostname as username, decoded with
+        loads, or None
+        """
+        if refresh:
+            self.refreshes += 1
+            return None
+        content = self.backend.get(self.key(query, values, hostname, username))
+        if content is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return loads(content)
+
+    def set(
+        self,
+        query: str,
+        values: dict,
+        content: bytes,
+        ttl: float,
+        hostname: str = "",
+        username: str = "",
+    ) -> None:
+        """
+        Cache the JSON content of the result of query with values, run on hostname as username,
+        for ttl seconds
+        """
+        self.backend.set(self.key(query, values, hostname, username), content, ttl=ttl)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "refreshes": self.refreshes}
@@ -11,8 +11,7 @@ class Campaigns(HttpMethods):
 
     def list(self) -> dict:
         "Return a dictonary mapping campaign ids to campaign names"
-        field_resp = self.connection.get("allowedpagefield/campaign")
-        choices = field_resp.json().get("choices")
+        choices = self.get("allowedpagefield/campaign").get("choices")
         return dict((int(c[0]), c[1]) for c in choices)
 
     def create(self, name: str, campaign_type: str, **params) -> str:
@@ -32,15 +31,12 @@ class Campaigns(HttpMethods):
         self.patch(f"signuppage/{campaign_id}", {"fields": {"campaign": campaign_id}})
 
         # Add campaign option to custom fields
-        camp_options = (
-            self.connection.get("allowedpagefield/campaign").json().get("field_choices")
-        )
+        camp_options = self.get("allowedpagefield/campaign").get("field_choices")
         camp_options += f"\n{campaign_id}={name}"
-        self.connection.patch(
-            "allowedpagefield/campaign", {"field_choices": camp_options}
-        )
-        self.connection.patch(
-            "allowedmailingfield/campaign", {"field_choices": camp_options}
-        )
+        self.patch("allowedpagefield/campaign", {"field_choices": camp_options})
+        self.patch("allowedmailingfield/campaign", {"field_choices": camp_options})
+
+        if self.connection.registry is not None:
+            self.connection.registry.add_campaign(campaign_id, name)
 
         return campaign_uri
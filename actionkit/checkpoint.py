@@ -0,0 +1,37 @@
+import os
+import threading
+
+
+class Checkpoint:
+    """
+    Records the keys of completed items in a text file, one key per line, so that an
+    interrupted batch can be resumed by skipping the items already done.
+
+    Keys are stored as strings. A Checkpoint can be shared by several threads.
+    """
+
+    def __init__(self, file_name: str):
+        self.file_name = file_name
+        self._keys = set()
+        self._lock = threading.Lock()
+        if os.path.exists(file_name):
+            with open(file_name) as f:
+                self._keys = set(line.rstrip("\n") for line in f if line.strip())
+
+    def __contains__(self, key) -> bool:
+        return str(key) in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key) -> None:
+        """
+        Mark the item identified by key as completed
+        """
+        key = str(key)
+        with self._lock:
+            if key in self._keys:
+                return
+            with open(self.file_name, "a") as f:
+                f.write(f"{key}\n")
+            self._keys.add(key)
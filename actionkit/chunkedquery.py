@@ -0,0 +1,135 @@
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Callable, Iterator, Sequence, Tuple, Union
+
+from .checkpoint import Checkpoint
+from .rows import RowMapper
+
+chunk_placeholders = (
+    re.compile(r"{{\s*chunk_start\s*}}"),
+    re.compile(r"{{\s*chunk_end\s*}}"),
+)
+
+
+class ChunkedQuery:
+    """
+    Runs a large SQL query as a series of smaller ones, each covering a range of values of a
+    keyset column, so that none of them hits the report timeouts or row limits of ActionKit.
+
+    The query must restrict the keyset column with the {{ chunk_start }} (inclusive) and
+    {{ chunk_end }} (exclusive) placeholders, and should order the rows by it:
+
+        SELECT id, user_id, created_at FROM core_action
+        WHERE id >= {{ chunk_start }} AND id < {{ chunk_end }}
+        ORDER BY id
+
+    The range of the column is given by bounds, (first, last) inclusive, or else queried from
+    MIN(key) and MAX(key) of table. Up to `concurrency` chunks are fetched at once, and their
+    rows are yielded in order.
+
+    If a checkpoint is given (a file name or a Checkpoint), the start of every chunk whose rows
+    have all been consumed is saved to it, and chunks already there are skipped.
+    """
+
+    def __init__(
+        self,
+        sql,
+        query: str,
+        key: str = 'id',
+        table: str = None,
+        bounds: Tuple[int, int] = None,
+        chunk_size: int = 10000,
+        concurrency: int = 4,
+        checkpoint: Union[str, Checkpoint] = None,
+        columns: Sequence[str] = None,
+        row_type: Callable = None,
+        converters: dict = None,
+        **values: dict,
+    ):
+        for placeholder in chunk_placeholders:
+            if not placeholder.search(query):
+                raise ValueError(
+                    'The query must filter on {{ chunk_start }} and {{ chunk_end }}'
+                )
+        if bounds is None and not table:
+            raise ValueError('Either table or bounds must be provided')
+        self.sql = sql
+        self.query = query
+        self.key = key
+        self.table = table
+        self.bounds = bounds
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+        if isinstance(checkpoint, str):
+            checkpoint = Checkpoint(checkpoint)
+        self.checkpoint = checkpoint
+        self.mapper = RowMapper(columns, row_type, converters)
+        self.values = values
+
+    @property
+    def logger(self):
+        return self.sql.logger
+
+    def bounds_query(self) -> str:
+        return f'SELECT MIN({self.key}), MAX({self.key}) FROM {self.table}'
+
+    def _set_bounds(self, rows: list) -> None:
+        first, last = rows[0] if rows else (None, None)
+        self.bounds = (first, last) if first is not None else None
+
+    def get_bounds(self) -> Tuple[int, int]:
+        """
+        The first and last values of the keyset column, None if the table is empty
+        """
+        if self.bounds is None:
+            self._set_bounds(self.sql.run_query(self.bounds_query(), refresh=True))
+        return self.bounds
+
+    def _ranges(self, bounds: Tuple[int, int]) -> Iterator[Tuple[int, int]]:
+        if bounds is None:
+            return
+        first, last = (int(bound) for bound in bounds)
+        for start in range(first, last + 1, self.chunk_size):
+            if self.checkpoint is not None and start in self.checkpoint:
+                continue
+            yield start, min(start + self.chunk_size, last + 1)
+
+    def chunks(self) -> Iterator[Tuple[int, int]]:
+        """
+        Yields the (chunk_start, chunk_end) ranges still to be fetched
+        """
+        return self._ranges(self.get_bounds())
+
+    def _chunk_rows(self, start: int, end: int, rows: list) -> list:
+        self.logger.debug(f'Fetched {len(rows)} rows for {self.key} in [{start}, {end})')
+        return [self.mapper(row) for row in rows]
+
+    def fetch_chunk(self, start: int, end: int) -> list:
+        rows = self.sql.run_query(self.query, chunk_start=start, chunk_end=end, **self.values)
+        return self._chunk_rows(start, end, rows)
+
+    def run(self) -> Iterator:
+        """
+        Yields the rows of every chunk, in the order of the chunks
+        """
+        chunks = self.chunks()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            pending = deque(
+                (start, executor.submit(self.fetch_chunk, start, end))
+                for start, end in islice(chunks, self.concurrency)
+            )
+            try:
+                while pending:
+                    start, future = pending.popleft()
+                    for next_start, next_end in islice(chunks, 1):
+                        pending.append(
+                            (next_start, executor.submit(self.fetch_chunk, next_start, next_end))
+                        )
+                    yield from future.result()
+                    if self.checkpoint is not None:
+                        self.checkpoint.add(start)
+            finally:
+                for _, future in pending:
+                    future.cancel()
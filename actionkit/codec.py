@@ -0,0 +1,63 @@
+import json
+from datetime import date
+from decimal import Decimal
+from uuid import UUID
+
+
+def encode_default(value):
+    """
+    Encodes the values JSON has no type for: amounts as strings, so that Decimals are not
+    rounded through floats, dates and datetimes in ISO 8601 format, and UUIDs
+    """
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class JSONCodec:
+    """
+    Encodes request bodies and decodes responses with the json module of the standard library
+    """
+
+    name = "json"
+
+    def dumps(self, obj) -> bytes:
+        return json.dumps(obj, default=encode_default).encode()
+
+    def loads(self, content):
+        return json.loads(content)
+
+
+class OrjsonCodec(JSONCodec):
+    """
+    Encodes request bodies and decodes responses with orjson, several times faster than the
+    standard library on large search pages and report results.
+
+    orjson is an optional dependency: pip install actionkit[fast]
+    """
+
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self._orjson = orjson
+
+    def dumps(self, obj) -> bytes:
+        # orjson encodes datetimes and UUIDs itself, in the same format as encode_default
+        return self._orjson.dumps(obj, default=encode_default)
+
+    def loads(self, content):
+        return self._orjson.loads(content)
+
+
+def default_codec() -> JSONCodec:
+    """
+    An OrjsonCodec if orjson is installed, else a JSONCodec
+    """
+    try:
+        return OrjsonCodec()
+    except ImportError:
+        return JSONCodec()
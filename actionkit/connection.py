@@ -1,10 +1,17 @@
 import logging
-import pprint
 import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
 
 import requests
+from requests.adapters import HTTPAdapter
 
+from .codec import JSONCodec, default_codec
+from .ratelimit import RateLimiter
+from .requestlog import RequestLogger
+from .retry import CircuitBreaker, RetryPolicy
 from .validation import ValidationError
 
 resource_uri_id_regex = re.compile(r"/(?P<id>\d+)/$")
@@ -15,15 +22,29 @@ class Connection:
     Provide simple, but useful methods for creating and using an HTTPS session with the ActionKit API.
     """
 
+    # These class attributes make the default RetryPolicy, used unless one is passed to __init__
     # retry_codes are the HTTP error codes that this service will attempt retries on
     # Reference: https://docs.python-requests.org/en/latest/api/#status-code-lookup
-    retry_codes = [requests.codes.internal_server_error]
+    retry_codes = [
+        requests.codes.too_many_requests,
+        requests.codes.internal_server_error,
+        requests.codes.bad_gateway,
+        requests.codes.service_unavailable,
+        requests.codes.gateway_timeout,
+    ]
     # In the case of a response being one of the retry_codes this is how many times we try the
     # request again
     num_retries = 3
-    # The initial_backoff value is the number of seconds we wait before a retry.
-    # This number doubles every time
+    # The initial_backoff value is the upper bound of the number of seconds we wait before a
+    # retry. This number doubles every time, and the actual wait is drawn at random below it
     initial_backoff = 3  # seconds
+    # HTTP methods that can be issued through _make_request
+    http_methods = ("get", "post", "patch", "put", "delete", "head", "options")
+    # The events hooks can be registered for with add_hook
+    hook_events = ("before_request", "after_response", "on_retry", "on_error")
+    # The URL scheme of the API. Only local stand-ins of ActionKit, used in tests and
+    # benchmarks, are served over plain http
+    scheme = "https"
 
     def __init__(
         self,
@@ -31,17 +52,124 @@ class Connection:
         username: str,
         password: str,
         logger=logging.getLogger(__name__),
+        pool_connections: int = 1,
+        pool_maxsize: int = 10,
+        pool_block: bool = False,
+        donationaction_cache=None,
+        retry_policy: RetryPolicy = None,
+        circuit_breaker: CircuitBreaker = None,
+        rate_limiter: RateLimiter = None,
+        request_logger: logging.Logger = None,
+        codec: JSONCodec = None,
     ) -> None:
         """
         Initialise settings and request defaults
+
+        pool_maxsize is the number of keep-alive connections kept open to ActionKit. When the
+        connection is shared by more threads than that, extra sockets are opened and discarded
+        after use, unless pool_block is True in which case threads wait for a free connection.
+
+        donationaction_cache is an optional MemoryCache of the donationaction records fetched by
+        DonationAction, shared by every DonationAction using this connection.
+
+        retry_policy decides which failed requests are retried and when, see RetryPolicy. The
+        optional circuit_breaker makes requests fail fast while ActionKit is down.
+
+        rate_limiter optionally throttles the requests sent, retries included, see RateLimiter.
+
+        Requests and responses are logged at DEBUG level, redacted and truncated, to
+        request_logger if given or else to logger. See RequestLogger.
+
+        codec encodes the JSON bodies of requests and decodes responses. By default it is an
+        OrjsonCodec if orjson is installed, and a JSONCodec otherwise.
         """
 
         self.hostname = hostname
+        self.username = username
         self.request_kwargs = {
             "headers": {"Accept": "application/json"},
             "auth": requests.auth.HTTPBasicAuth(username, password),
         }
         self.logger = logger
+        self.request_log = RequestLogger(request_logger or logger)
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.donationaction_cache = donationaction_cache
+        self.retry_policy = retry_policy
+        self.circuit_breaker = circuit_breaker
+        self.rate_limiter = rate_limiter
+        self.codec = codec if codec is not None else default_codec()
+        self.hooks = {event: [] for event in self.hook_events}
+        # The Registry of reference data, set by ActionKit.registry
+        self.registry = None
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def session(self) -> requests.Session:
+        """
+        The requests.Session holding the pool of keep-alive connections to ActionKit.
+
+        The session is created on first use and can be shared by several threads: the underlying
+        urllib3 connection pool is thread-safe, and the session is only configured once.
+        """
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self._create_session()
+        return self._session
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def close(self) -> None:
+        """
+        Close the pooled connections. The connection can still be used afterwards, in which case
+        a new session is created.
+        """
+        with self._session_lock:
+            session, self._session = self._session, None
+        if session is not None:
+            session.close()
+
+    def prewarm(self, connections: int = 1) -> bool:
+        """
+        Open up to pool_maxsize keep-alive connections to ActionKit ahead of the first requests,
+        so that these don't wait for the TCP and TLS handshakes. The API root is requested with
+        HEAD and the status of the responses is ignored.
+
+        Returns False if ActionKit could not be reached.
+        """
+        url = self._path("")
+        connections = max(1, min(connections, self.pool_maxsize))
+
+        def head(_=None) -> bool:
+            try:
+                self.session.head(url, headers=self.request_kwargs["headers"])
+            except requests.exceptions.RequestException as e:
+                self.logger.warning(f"Could not prewarm the connection to {self.hostname}: {e}")
+                return False
+            return True
+
+        if connections == 1:
+            return head()
+        with ThreadPoolExecutor(max_workers=connections) as executor:
+            return all(list(executor.map(head, range(connections))))
 
     @staticmethod
     def get_resource_uri(response):
@@ -80,20 +208,25 @@ class Connection:
         """
         return f"/rest/v1/{resource_name}/{resource_id}/"
 
-    def _make_request(
+    def _prepare_request(
         self, http_method: str, path: str, json=None, params=None, data=None, **kwargs
     ):
         """
-        Make the request to the ActionKit API with the desired method
+        Validate the request arguments and return the HTTP method, the url and the keyword
+        arguments to send the request with
         """
         _http_method = http_method.lower()
-        request_fn = getattr(requests, _http_method, None)
-        if request_fn is None:
+        if _http_method not in self.http_methods:
             raise NotImplementedError(f"HTTP method {_http_method} not supported")
 
         request_kwargs = {}
         request_kwargs.update(self.request_kwargs)
         request_kwargs.update(kwargs)
+        if "headers" in kwargs:
+            request_kwargs["headers"] = {
+                **self.request_kwargs["headers"],
+                **(kwargs["headers"] or {}),
+            }
 
         if _http_method == "get":
             if json:
@@ -111,44 +244,184 @@ class Connection:
 
         url = self._path(path)
 
-        self.logger.debug(f"Making {_http_method} request to {url}")
-        self.logger.debug(f"Request kwargs:\n{pprint.pformat(request_kwargs)}")
+        self.request_log.request(_http_method, url, request_kwargs)
+
+        if "json" in request_kwargs:
+            # Encoded here rather than by requests, with the codec of the connection
+            request_kwargs["data"] = self.codec.dumps(request_kwargs.pop("json"))
+            request_kwargs["headers"] = {
+                **request_kwargs["headers"],
+                "Content-Type": "application/json",
+            }
+
+        return _http_method, url, request_kwargs
+
+    def _make_request(
+        self, http_method: str, path: str, json=None, params=None, data=None, **kwargs
+    ):
+        """
+        Make the request to the ActionKit API with the desired method
+        """
+        _http_method, url, request_kwargs = self._prepare_request(
+            http_method, path, json=json, params=params, data=data, **kwargs
+        )
+
+        try:
+            return self._send_with_retries(_http_method, url, request_kwargs)
+        except Exception as e:
+            self._run_hooks("on_error", http_method=_http_method, url=url, error=e)
+            raise
 
-        backoff = self.initial_backoff
-        retries_left = self.num_retries
+    def _send_with_retries(self, http_method: str, url: str, request_kwargs: dict):
+        """
+        Send the request, retrying it according to the retry policy
+        """
+        policy = self._retry_policy()
+        started_at = time.monotonic()
+        attempt = 0
 
         # ActionKit REST is notoriously flaky, so we retry requests on certain HTTP error codes
+        # and network errors
         while True:
+            self._before_attempt(http_method, url, request_kwargs, attempt)
+            try:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire(http_method, self._api_path(url))
+                sent_at = time.monotonic()
+                response = self.session.request(http_method, url, **request_kwargs)
+            except BaseException as e:
+                # Whatever the error, it ends the trial request of a half-open circuit breaker
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.record_failure()
+                if not isinstance(e, policy.retry_exceptions):
+                    raise
+                delay = policy.next_delay(attempt, started_at, http_method, error=e)
+                if delay is None:
+                    raise
+                self._retrying(http_method, url, attempt, delay, e)
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            self._after_response(
+                http_method, url, response, sent_at, attempt, request_kwargs.get("stream", False)
+            )
             try:
-                response = request_fn(url, **request_kwargs)
-                self.logger.debug(
-                    f"ActionKit Request headers:\n{pprint.pformat(response.request.headers)}"
-                )
-                if response.content:
-                    if response.headers.get("content-type") == "application/json":
-                        content = pprint.pformat(response.json())
-                    else:
-                        content = response.text
-                    self.logger.debug(f"ActionKit Response body:\n{content}")
                 response.raise_for_status()
                 break
             except requests.exceptions.HTTPError as e:
-                if e.response.status_code in self.retry_codes and retries_left > 0:
-                    time.sleep(backoff)
-                    retries_left -= 1
-                    backoff *= 2
+                delay = policy.next_delay(attempt, started_at, http_method, response=response)
+                if delay is not None:
+                    # Release the connection of streamed responses
+                    response.close()
+                    self._retrying(http_method, url, attempt, delay, e)
+                    time.sleep(delay)
+                    attempt += 1
                     continue
-                if hasattr(e.response, "text") and e.response.text:
-                    self.logger.warning(
-                        f"Text from unsuccessful response: {e.response.text}"
-                    )
-                    raise ValidationError(e.response.text)
-                else:
-                    self.logger.error(e)
-                raise
+                self._raise_http_error(e)
 
         return response
 
+    def add_hook(self, event: str, hook) -> None:
+        """
+        Register a function called with keyword arguments on every occurrence of event:
+        - before_request: http_method, url, request_kwargs, attempt (0 for the first attempt)
+        - after_response: http_method, url, response, elapsed (in seconds), attempt
+        - on_retry: http_method, url, attempt, delay (in seconds), error
+        - on_error: http_method, url, error, raised when the request finally fails
+
+        Exceptions raised by hooks are logged and ignored.
+        """
+        if event not in self.hooks:
+            raise KeyError(f"Unknown hook event {event}, expected one of {list(self.hooks)}")
+        self.hooks[event].append(hook)
+
+    def remove_hook(self, event: str, hook) -> None:
+        self.hooks[event].remove(hook)
+
+    def _run_hooks(self, event: str, **info) -> None:
+        for hook in self.hooks[event]:
+            try:
+                hook(**info)
+            except Exception as e:
+                self.logger.warning(f"ActionKit {event} hook {hook} failed: {e}")
+
+    def _before_attempt(self, http_method: str, url: str, request_kwargs: dict, attempt: int):
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.before_request()
+        self._run_hooks(
+            "before_request",
+            http_method=http_method,
+            url=url,
+            request_kwargs=request_kwargs,
+            attempt=attempt,
+        )
+
+    def _after_response(
+        self,
+        http_method: str,
+        url: str,
+        response,
+        sent_at: float,
+        attempt: int,
+        streamed: bool = False,
+    ):
+        elapsed = time.monotonic() - sent_at
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record_response(response)
+        # The body of streamed responses is left for the caller to read
+        self._log_response(response, log_body=not streamed)
+        self._run_hooks(
+            "after_response",
+            http_method=http_method,
+            url=url,
+            response=response,
+            elapsed=elapsed,
+            attempt=attempt,
+        )
+
+    def _retrying(self, http_method: str, url: str, attempt: int, delay: float, error) -> None:
+        self.logger.warning(
+            f"Retrying {http_method} request to {url} in {delay:.2f}s "
+            f"(retry {attempt + 1}) after: {error}"
+        )
+        self._run_hooks(
+            "on_retry", http_method=http_method, url=url, attempt=attempt, delay=delay, error=error
+        )
+
+    def _retry_policy(self) -> RetryPolicy:
+        """
+        The retry_policy passed to __init__, or one built from the class attributes
+        """
+        if self.retry_policy is not None:
+            return self.retry_policy
+        return RetryPolicy(
+            max_retries=self.num_retries,
+            initial_backoff=self.initial_backoff,
+            retry_statuses=self.retry_codes,
+        )
+
+    def decode(self, response):
+        """
+        The JSON content of response, decoded with the codec of the connection
+        """
+        return self.codec.loads(response.content)
+
+    def _log_response(self, response, log_body: bool = True) -> None:
+        self.request_log.response(response, log_body=log_body)
+
+    def _raise_http_error(self, error: requests.exceptions.HTTPError):
+        """
+        Raise the error of a request that will not be retried, wrapped in a ValidationError
+        if ActionKit explained what went wrong
+        """
+        if hasattr(error.response, "text") and error.response.text:
+            self.logger.warning(f"Text from unsuccessful response: {error.response.text}")
+            raise ValidationError(self.codec.loads(error.response.content))
+        else:
+            self.logger.error(error)
+        raise error
+
     def _path(self, path: str) -> str:
         "Handle common cases of path inputs - try to be friendly without getting fancy."
         if path.startswith("http"):
@@ -156,10 +429,18 @@ class Connection:
 
         # already an API path
         if path.startswith("/rest/v1"):
-            return f"https://{self.hostname}{path}"
+            return f"{self.scheme}://{self.hostname}{path}"
 
         # prepend API path. remove // in case the provided path has a / at the beginning
-        return f"https://{self.hostname}" + f"/rest/v1/{path}".replace("//", "/")
+        return f"{self.scheme}://{self.hostname}" + f"/rest/v1/{path}".replace("//", "/")
+
+    @staticmethod
+    def _api_path(url: str) -> str:
+        "The path of url relative to the REST API root, e.g. user/1/"
+        path = urlsplit(url).path
+        if path.startswith("/rest/v1/"):
+            return path[len("/rest/v1/"):]
+        return path.lstrip("/")
 
     def get(self, path: str, *args, params: dict = None, **kwargs) -> dict:
         return self._make_request("get", path, *args, params=params, **kwargs)
@@ -1,18 +1,98 @@
+import copy
 import sys
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from decimal import Decimal
+from typing import Callable, Iterable, Iterator, Union
 
 from requests import HTTPError
 
+from .checkpoint import Checkpoint
+from .donationbatch import DonationBatch, DonationResult
 from .httpmethods import HttpMethods
+from .models import DonationActionRecord
 
 
 class DonationAction(HttpMethods):
     resource_name = 'donationaction'
+    model = DonationActionRecord
+    # Default of set_push_status's concurrent argument, which the set_push_status_* wrappers
+    # do not expose
+    concurrent_status_updates = False
 
-    def push(
-        self,
+    @property
+    def cache(self):
+        """
+        The optional cache of donationaction records of the connection
+        """
+        return self.connection.donationaction_cache
+
+    def _cache_key(self, resource_uri: str) -> str:
+        return self.connection._path(resource_uri)
+
+    def _cached_donationaction(self, resource_uri: str):
+        """
+        Returns a copy of the cached donationaction record at resource_uri, if any
+        """
+        if self.cache is None:
+            return None
+        data = self.cache.get(self._cache_key(resource_uri))
+        return copy.deepcopy(data) if data is not None else None
+
+    def _cache_donationaction(self, resource_uri: str, data: dict) -> None:
+        if self.cache is not None:
+            self.cache.set(self._cache_key(resource_uri), copy.deepcopy(data))
+
+    def _uncache_donationaction(self, resource_uri: str) -> None:
+        if self.cache is not None:
+            self.cache.delete(self._cache_key(resource_uri))
+
+    def _update_cached_donationaction(self, resource_uri: str, patches: list) -> None:
+        """
+        Apply the status PATCHes sent for the donationaction at resource_uri to its cached record:
+        to the action itself and its order, and to its transactions and orderrecurrings when
+        they are nested objects rather than URIs
+        """
+        data = self._cached_donationaction(resource_uri)
+        if data is None:
+            return
+        order = data.get('order') or {}
+        records = [data, order]
+        for key in ('transactions', 'orderrecurrings'):
+            records.extend(r for r in order.get(key) or () if isinstance(r, dict))
+        by_key = {
+            self._cache_key(record['resource_uri']): record
+            for record in records
+            if record.get('resource_uri')
+        }
+        for uri, payload in patches:
+            record = by_key.get(self._cache_key(uri))
+            if record is not None:
+                record.update(payload)
+        self._cache_donationaction(resource_uri, data)
+
+    def get_donationaction(self, resource_uri: str) -> dict:
+        """
+        Get the donationaction at resource_uri, from the connection's donationaction_cache
+        if it is enabled and holds the record
+        """
+        data = self._cached_donationaction(resource_uri)
+        if data is None:
+            data = self.get(resource_uri)
+            self._cache_donationaction(resource_uri, data)
+        return data
+
+    def patch(self, resource_uri: str, to_patch: dict, *args, **kwargs):
+        self._uncache_donationaction(resource_uri)
+        return super().patch(resource_uri, to_patch, *args, **kwargs)
+
+    def delete(self, resource_uri: str, *args, **kwargs):
+        self._uncache_donationaction(resource_uri)
+        return super().delete(resource_uri, *args, **kwargs)
+
+    @staticmethod
+    def _push_payload(
         email: str = None,
         first_name: str = None,
         last_name: str = None,
@@ -28,14 +108,9 @@ class DonationAction(HttpMethods):
         skip_confirmation: bool = False,
         akid: str = None,
         trans_id: str = None,
-        **kwargs  # just accept everything for now, we'll need to fix the calls later
-    ):
+    ) -> dict:
         """
-        Creates a new donationpush action in ActionKit and returns the requests.Response object
-        If recurring_id is set then the donation will be set to recurring and the recurring_id will
-        be set in ActionKit accordingly.
-
-        https://action.wemove.eu/docs/manual/api/rest/donationpush.html
+        Validates the arguments of push and builds the donationpush payload
         """
         for required in [
             'amount',
@@ -100,19 +175,72 @@ class DonationAction(HttpMethods):
                 )
             )
 
+        return payload
+
+    def push(
+        self,
+        email: str = None,
+        first_name: str = None,
+        last_name: str = None,
+        country: str = None,
+        postal: str = None,
+        amount: Decimal = None,
+        currency: str = None,
+        page: str = None,
+        payment_account: str = None,
+        custom_action_fields: dict = {},
+        recurring_id: str = None,
+        created_at: datetime = None,
+        skip_confirmation: bool = False,
+        akid: str = None,
+        trans_id: str = None,
+        **kwargs  # just accept everything for now, we'll need to fix the calls later
+    ):
+        """
+        Creates a new donationpush action in ActionKit and returns the requests.Response object
+        If recurring_id is set then the donation will be set to recurring and the recurring_id will
+        be set in ActionKit accordingly.
+
+        https://action.wemove.eu/docs/manual/api/rest/donationpush.html
+        """
+        payload = self._push_payload(
+            email=email,
+            first_name=first_name,
+            last_name=last_name,
+            country=country,
+            postal=postal,
+            amount=amount,
+            currency=currency,
+            page=page,
+            payment_account=payment_account,
+            custom_action_fields=custom_action_fields,
+            recurring_id=recurring_id,
+            created_at=created_at,
+            skip_confirmation=skip_confirmation,
+            akid=akid,
+            trans_id=trans_id,
+        )
+
         try:
             return self.connection.post("donationpush/", payload)
         except HTTPError as e:
-            if e.response.status_code == 409:
-                sys.stderr.write(
-                    f"Duplicate donation_import_id. Can't create this donation: {e.response.text}\n"
-                )
-                return
-            if e.response.status_code == 400:
-                raise Exception(
-                    f'Creation of donationaction failure:\n{e.response.text}: {e}'
-                )
-            raise
+            return self._handle_push_error(e)
+
+    @staticmethod
+    def _handle_push_error(error: HTTPError):
+        """
+        Duplicate donations are reported and skipped, other errors are raised
+        """
+        if error.response.status_code == 409:
+            sys.stderr.write(
+                f"Duplicate donation_import_id. Can't create this donation: {error.response.text}\n"
+            )
+            return
+        if error.response.status_code == 400:
+            raise Exception(
+                f'Creation of donationaction failure:\n{error.response.text}: {error}'
+            )
+        raise error
 
     def push_and_set_incomplete(
         self,
@@ -152,7 +280,7 @@ class DonationAction(HttpMethods):
             skip_confirmation,
             akid,
         )
-        action = response.json()
+        action = self.connection.decode(response)
         # TODO: Do this async?
         self.set_push_status_incomplete(action)
         return action['resource_uri']
@@ -194,10 +322,136 @@ class DonationAction(HttpMethods):
             skip_confirmation,
             akid,
         )
-        action = response.json()
+        action = self.connection.decode(response)
         self.set_push_status_pending(action)
         return action
 
+    def push_batch(
+        self,
+        records: Iterable[dict],
+        concurrency: int = 8,
+        checkpoint: Union[str, Checkpoint] = None,
+        key: Callable[[dict], str] = None,
+    ) -> Iterator[DonationResult]:
+        """
+        Pushes a stream of donation records and sets their status, several at once.
+        Yields a DonationResult for each record as it completes.
+
+        See DonationBatch for the format of the records and the checkpoint behaviour
+        """
+        batch = DonationBatch(self, concurrency=concurrency, checkpoint=checkpoint, key=key)
+        return batch.run(records)
+
+    @staticmethod
+    def _needs_donationaction_data(
+        donationaction_data: dict = None,
+        resource_uri: str = None,
+        order_uri: str = None,
+        transaction_uri: str = None,
+    ) -> bool:
+        """
+        Validates the combination of arguments identifying the donationaction of set_push_status,
+        and returns whether its data must be fetched from ActionKit
+        """
+        if not donationaction_data:
+            if resource_uri:
+                if bool(order_uri) ^ bool(transaction_uri):
+                    raise KeyError(
+                        'If transaction_uri or order_uri is passed in addition to resource_uri, you '
+                        'must specify all three'
+                    )
+                return True
+            else:
+                raise KeyError(
+                    'If donationaction_data is not passed, you must specify resource_uri'
+                )
+        elif resource_uri or order_uri or transaction_uri:
+            raise KeyError('When passing donationaction_data, do not specify the uris')
+        return False
+
+    def _status_patches(
+        self,
+        action_status,
+        donationaction_data: dict,
+        custom_action_fields: dict = None,
+        created_at: datetime = None,
+        recurring_id: str = None,
+        order_status: str = None,
+        transaction_status: str = None,
+        merge_action_fields: bool = False,
+        **kwargs,
+    ) -> list:
+        """
+        Returns the list of (resource_uri, payload) PATCH requests that set the status of a
+        donationaction, in the order they are sent by set_push_status
+
+        If merge_action_fields is True, the custom action fields are sent with the action status
+        rather than in a second PATCH of the action, so that every PATCH targets a different
+        resource.
+        """
+        uris = self._resource_uris(donationaction_data)
+        resource_uri = uris['resource_uri']
+        orderrecurring_uris = uris['orderrecurring_uris']
+        base_action_fields = donationaction_data.get('fields', {})
+
+        # Set the donation action in ActionKit to the given status
+        action_payload = {'status': action_status}
+        patches = [(resource_uri, action_payload)]
+
+        # Set the corresponding order also to the given status
+        order_payload = action_payload.copy()
+        order_payload['status'] = order_status or action_status
+
+        if created_at:
+            # fmt: off
+            order_payload['created_at'] = created_at.astimezone(tz=timezone.utc).isoformat()
+            # fmt: on
+
+        patches.append((uris['order_uri'], order_payload))
+
+        # Set the corresponding transaction to the given status, adding the merchant trans_id
+        # if it is passed in
+        transaction_payload = action_payload.copy()
+        transaction_payload['status'] = transaction_status or action_status
+
+        for key in ['failure_message', 'failure_description', 'trans_id']:
+            if key in kwargs and kwargs[key] is not None:
+                transaction_payload[key] = kwargs[key]
+        patches.append((uris['transaction_uri'], transaction_payload))
+
+        # Update the action fields if they are passed in
+        if custom_action_fields:
+            # Update the action fields, preserving what was there before
+            base_action_fields.update(custom_action_fields)
+            if merge_action_fields:
+                action_payload['fields'] = base_action_fields
+            else:
+                patches.append((resource_uri, {'fields': base_action_fields}))
+
+        # Set the recurring_id if it is passed in
+        if recurring_id and orderrecurring_uris:
+            # We only set this when the donation is new so we can just reference the first
+            # orderrecurring uri for the update
+            patches.append(
+                (
+                    orderrecurring_uris[0],
+                    {
+                        'recurring_id': recurring_id,
+                        'recurring_period': 'months',
+                    },
+                )
+            )
+
+        return patches
+
+    @staticmethod
+    def _raise_status_error(action_status, error: HTTPError):
+        if error.response.status_code == 400:
+            raise Exception(
+                f'Failed to set donationaction status "{action_status}":\n{error.response.text}: {error}'
+            )
+        raise error
+
     def set_push_status(
         self,
         action_status,
@@ -211,6 +465,7 @@ class DonationAction(HttpMethods):
         recurring_id: str = None,
         order_status: str = None,
         transaction_status: str = None,
+        concurrent: bool = None,
         **kwargs,
     ):
         """
@@ -235,6 +490,10 @@ class DonationAction(HttpMethods):
         no_action_if_status_is_already_set, if True, will result in this method not making any
         requests if status is already the same as what was passed in
 
+        concurrent, if True, sends the action status and custom fields in a single PATCH, and the
+        action, order, transaction and orderrecurring PATCHes at the same time. The first failed
+        PATCH is raised once all of them have completed. Defaults to concurrent_status_updates
+
         kwargs can be one of:
         trans_id: The payment provider's transaction id. Typically a subscription or single payment id
         failure_message: The payment provider's failure reason, if any
@@ -242,99 +501,57 @@ class DonationAction(HttpMethods):
 
         Returns the resource_uri of the donationpush action
         """
-        if not donationaction_data:
-            if resource_uri:
-                if bool(order_uri) ^ bool(transaction_uri):
-                    raise KeyError(
-                        'If transaction_uri or order_uri is passed in addition to resource_uri, you '
-                        'must specify all three'
-                    )
-                donationaction_data = self.get(resource_uri)
-            else:
-                raise KeyError(
-                    'If donationaction_data is not passed, you must specify resource_uri'
-                )
-        elif resource_uri or order_uri or transaction_uri:
-            raise KeyError('When passing donationaction_data, do not specify the uris')
-
-        base_action_fields = {}
+        if concurrent is None:
+            concurrent = self.concurrent_status_updates
 
-        if donationaction_data:
-            uris = self.extract_resource_uris(donationaction_data=donationaction_data)
-            resource_uri = uris['resource_uri']
-            order_uri = uris['order_uri']
-            transaction_uri = uris['transaction_uri']
-            orderrecurring_uris = uris['orderrecurring_uris']
-            base_action_fields = donationaction_data.get('fields', {})
+        if self._needs_donationaction_data(
+            donationaction_data, resource_uri, order_uri, transaction_uri
+        ):
+            donationaction_data = self.get_donationaction(resource_uri)
 
+        resource_uri = donationaction_data['resource_uri']
         if (
             no_action_if_status_is_already_set
             and donationaction_data['status'] == action_status
         ):
             self.logger.debug(
-                f'donationaction status is already {action_status}. Skipping update.'
+                f'donationaction {resource_uri} status is already {action_status}. Skipping update.'
             )
             return resource_uri
 
+        self.logger.debug(
+            f'Setting donationaction {resource_uri} status to {action_status}'
+        )
+        status_patches = self._status_patches(
+            action_status,
+            donationaction_data,
+            custom_action_fields=custom_action_fields,
+            created_at=created_at,
+            recurring_id=recurring_id,
+            order_status=order_status,
+            transaction_status=transaction_status,
+            merge_action_fields=concurrent,
+            **kwargs,
+        )
         try:
-            self.logger.debug(
-                f'Setting donationaction {resource_uri} status to {action_status}'
-            )
-            action_payload = {'status': action_status}
-
-            # Set the donation action in ActionKit to the given status
-            self.connection.patch(resource_uri, action_payload)
-
-            # Set the corresponding order also to the given status
-            order_payload = action_payload.copy()
-            order_payload['status'] = order_status or action_status
-
-            if created_at:
-                # fmt: off
-                order_payload['created_at'] = created_at.astimezone(tz=timezone.utc).isoformat()
-                # fmt: on
-
-            self.connection.patch(order_uri, order_payload)
-
-            # Set the corresponding transaction to the given status, adding the merchant trans_id
-            # if it is passed in
-            transaction_payload = action_payload.copy()
-            transaction_payload['status'] = transaction_status or action_status
-
-            for key in ['failure_message', 'failure_description', 'trans_id']:
-                if key in kwargs and kwargs[key] is not None:
-                    transaction_payload[key] = kwargs[key]
-            self.connection.patch(transaction_uri, transaction_payload)
-
-            # Update the action fields if they are passed in
-            if custom_action_fields:
-                # Update the action fields, preserving what was there before
-                base_action_fields.update(custom_action_fields)
-                self.connection.patch(
-                    resource_uri,
-                    {
-                        'fields': base_action_fields,
-                    },
-                )
-
-            # Set the recurring_id if it is passed in
-            if recurring_id and orderrecurring_uris:
-                # We only set this when the donation is new so we can just reference the first
-                # orderrecurring uri for the update
-                self.connection.patch(
-                    orderrecurring_uris[0],
-                    {
-                        'recurring_id': recurring_id,
-                        'recurring_period': 'months',
-                    },
-                )
-
+            if concurrent:
+                with ThreadPoolExecutor(max_workers=len(status_patches)) as executor:
+                    futures = [
+                        executor.submit(self.connection.patch, uri, payload)
+                        for uri, payload in status_patches
+                    ]
+                for future in futures:
+                    future.result()
+            else:
+                for uri, payload in status_patches:
+                    self.connection.patch(uri, payload)
         except HTTPError as e:
-            if e.response.status_code == 400:
-                raise Exception(
-                    f'Failed to set donationaction status "{action_status}":\n{e.response.text}: {e}'
-                )
+            self._uncache_donationaction(resource_uri)
+            self._raise_status_error(action_status, e)
+        except Exception:
+            self._uncache_donationaction(resource_uri)
             raise
+        self._update_cached_donationaction(resource_uri, status_patches)
         return resource_uri
 
     def set_push_status_incomplete(
@@ -473,11 +690,13 @@ class DonationAction(HttpMethods):
         """
         try:
             # Check to see if the donationaction exists
-            data = self.get(resource_uri)
+            data = self.get_donationaction(resource_uri)
             # Only delete if the donationaction is incomplete
             if data['status'] == 'incomplete':
+                self._uncache_donationaction(resource_uri)
                 self.connection.delete(resource_uri)
         except HTTPError as e:
+            self._uncache_donationaction(resource_uri)
             if e.response.status_code == 400:
                 raise Exception(
                     f'Failed to delete donationaction "{resource_uri}":\n{e.response.text}: {e}'
@@ -525,11 +744,20 @@ class DonationAction(HttpMethods):
             raise KeyError('Must specify either resource_uri or donationaction_data')
 
         if not donationaction_data:
-            donationaction_data = self.get(resource_uri)
+            donationaction_data = self.get_donationaction(resource_uri)
+
+        return self._resource_uris(donationaction_data)
+
+    @staticmethod
+    def _resource_uris(donationaction_data: dict) -> dict:
+        def uri(related):
+            # Related objects are URIs, or nested objects in full records
+            return related['resource_uri'] if isinstance(related, dict) else related
 
+        order = donationaction_data['order']
         return dict(
             resource_uri=donationaction_data['resource_uri'],
-            order_uri=donationaction_data['order']['resource_uri'],
-            transaction_uri=donationaction_data['order']['transactions'][0],
-            orderrecurring_uris=donationaction_data['order']['orderrecurrings'],
+            order_uri=order['resource_uri'],
+            transaction_uri=uri(order['transactions'][0]),
+            orderrecurring_uris=[uri(r) for r in order['orderrecurrings']],
         )
@@ -0,0 +1,133 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
+from typing import Callable, Iterable, Iterator, Union
+
+from .checkpoint import Checkpoint
+
+# The statuses a pushed donation can be set to, and the DonationAction method doing it
+STATUS_METHODS = {
+    'incomplete': 'set_push_status_incomplete',
+    'pending': 'set_push_status_pending',
+    'completed': 'set_push_status_completed',
+    'failed': 'set_push_status_failed',
+}
+
+
+class DonationResult:
+    """
+    Outcome of the ingestion of one donation record
+    """
+
+    __slots__ = ('key', 'record', 'resource_uri', 'error', 'duplicate')
+
+    def __init__(self, key, record, resource_uri=None, error=None, duplicate=False):
+        self.key = key
+        self.record = record
+        self.resource_uri = resource_uri
+        self.error = error
+        self.duplicate = duplicate
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self):
+        if self.error:
+            return f'<DonationResult {self.key} failed: {self.error!r}>'
+        if self.duplicate:
+            return f'<DonationResult {self.key} duplicate>'
+        return f'<DonationResult {self.key} {self.resource_uri}>'
+
+
+class DonationBatch:
+    """
+    Ingests a stream of donation records with DonationAction.push followed by a status update.
+
+    Each record is a dict of DonationAction.push arguments, with optionally:
+    - status: one of STATUS_METHODS, 'incomplete' by default
+    - status_kwargs: extra arguments for the status update, e.g. failure_message
+
+    Up to `concurrency` records are in flight at once, so the push of a record overlaps with
+    the status updates of the previous ones. Only about `concurrency` records are read ahead
+    from the input, so it can be a generator over a large source.
+
+    If a checkpoint is given (a file name or a Checkpoint), the key of every record processed
+    successfully is saved to it, and records whose key is already there are skipped.
+    """
+
+    def __init__(
+        self,
+        donation_action,
+        concurrency: int = 8,
+        checkpoint: Union[str, Checkpoint] = None,
+        key: Callable[[dict], str] = None,
+    ):
+        self.donation_action = donation_action
+        self.concurrency = concurrency
+        if isinstance(checkpoint, str):
+            checkpoint = Checkpoint(checkpoint)
+        self.checkpoint = checkpoint
+        self.key = key or (lambda record: record.get('trans_id'))
+
+    @property
+    def logger(self):
+        return self.donation_action.logger
+
+    def ingest(self, record: dict) -> DonationResult:
+        """
+        Push one donation record and set its status, capturing any error in the result
+        """
+        key = self.key(record)
+        push_kwargs = dict(record)
+        status = push_kwargs.pop('status', 'incomplete')
+        status_kwargs = push_kwargs.pop('status_kwargs', {})
+        try:
+            if status not in STATUS_METHODS:
+                raise ValueError(f'Unknown donation status {status}')
+
+            response = self.donation_action.push(**push_kwargs)
+            if response is None:
+                # push reports and skips duplicate donations
+                result = DonationResult(key, record, duplicate=True)
+            else:
+                set_push_status = getattr(self.donation_action, STATUS_METHODS[status])
+                resource_uri = set_push_status(
+                    self.donation_action.connection.decode(response), **status_kwargs
+                )
+                result = DonationResult(key, record, resource_uri=resource_uri)
+        except Exception as e:
+            self.logger.warning(f'Failed to ingest donation {key}: {e}')
+            return DonationResult(key, record, error=e)
+
+        if self.checkpoint is not None and key is not None:
+            self.checkpoint.add(key)
+        return result
+
+    def run(self, records: Iterable[dict]) -> Iterator[DonationResult]:
+        """
+        Ingest the records, yielding a DonationResult for each of them as they complete
+        """
+        records = iter(self._pending_records(records))
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            in_flight = deque(
+                executor.submit(self.ingest, record)
+                for record in islice(records, self.concurrency)
+            )
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    in_flight.remove(future)
+                    for record in islice(records, 1):
+                        in_flight.append(executor.submit(self.ingest, record))
+                    yield future.result()
+
+    def _pending_records(self, records: Iterable[dict]) -> Iterator[dict]:
+        for record in records:
+            if self.checkpoint is not None:
+                key = self.key(record)
+                if key is None:
+                    raise ValueError(f'Cannot checkpoint a donation record without key: {record}')
+                if key in self.checkpoint:
+                    continue
+            yield record
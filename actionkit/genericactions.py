@@ -1,10 +1,12 @@
 from datetime import datetime, timezone
 
 from .httpmethods import HttpMethods
+from .models import ActionRecord
 
 
 class GenericActions(HttpMethods):
     resource_name = "action"
+    model = ActionRecord
 
     def update(
         self,
@@ -1,9 +1,28 @@
-from typing import List
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
+from typing import Iterator, List
 
 from requests import HTTPError
 
 
+def page_stride(first_page: dict, page_size: int) -> int:
+    """
+    The offset between pages, as ActionKit may serve fewer objects per page than the _limit
+    asked for: the limit of the first page, or else its number of objects
+    """
+    stride = first_page["meta"].get("limit") or len(first_page["objects"])
+    return int(stride) if stride else page_size
+
+
 class HttpMethods:
+    # Optional ResponseCache of the GET requests sent by get(). It can be set on a resource
+    # class to be shared by all its instances, or on a single instance. The writes sent through
+    # the resource invalidate its cached responses.
+    response_cache = None
+    # The Record class the objects of the resource are returned as with typed=True, if any
+    model = None
+
     def __init__(self, connection):
         self.connection = connection
 
@@ -15,20 +34,141 @@ class HttpMethods:
     def resource_name(self):
         raise NotImplementedError('ActionKit resource_name must be defined')
 
-    def search(self, **params: dict) -> List[dict]:
+    def _typed(self, typed: bool):
+        """
+        The function converting objects of the resource: self.model.from_dict if typed,
+        else None
+        """
+        if not typed:
+            return None
+        if self.model is None:
+            raise ValueError(f'ActionKit resource {self.resource_name} has no typed model')
+        return self.model.from_dict
+
+    def search(self, typed: bool = False, **params: dict) -> List[dict]:
         """
-        Returns a list of paged results from ActionKit for the resource self.resource_name
+        Returns a list of paged results from ActionKit for the resource self.resource_name,
+        as self.model records if typed
         """
+        return list(self.iter_search(typed=typed, **params))
+
+    def iter_search(
+        self, cursor: str = None, page_size: int = None, typed: bool = False, **params: dict
+    ) -> Iterator[dict]:
+        """
+        Yields the results from ActionKit for the resource self.resource_name, one page at a time.
+        Only the current page is held in memory. If typed, results are self.model records.
+
+        See iter_pages for the cursor and page_size parameters.
+        """
+        to_model = self._typed(typed)
+        for page in self.iter_pages(cursor=cursor, page_size=page_size, **params):
+            if to_model is None:
+                yield from page["objects"]
+            else:
+                yield from map(to_model, page["objects"])
+
+    def iter_pages(
+        self, cursor: str = None, page_size: int = None, **params: dict
+    ) -> Iterator[dict]:
+        """
+        Yields the pages of results from ActionKit for the resource self.resource_name, following
+        meta.next until the last page.
+
+        :param cursor: The meta.next url of a previously fetched page. The iteration resumes from
+            that page, and params and page_size are ignored since the url already contains them.
+        :param page_size: The number of objects per page (the _limit query param)
+        """
+        if page_size:
+            params["_limit"] = page_size
         try:
-            resource = self.get(**params)
+            page = self.get(cursor) if cursor else self.get(**params)
+            yield page
+            while page["meta"]["next"]:
+                page = self.get(page["meta"]["next"])
+                yield page
 
-            to_return = resource["objects"]
-            while resource["meta"]["next"]:
-                response = self.connection.get(resource["meta"]["next"])
-                resource = response.json()
-                to_return.extend(resource["objects"])
+        except HTTPError as e:
+            if e.response.status_code == 400:
+                raise Exception(f"Bad request for search(): {e.response.text}: {e}")
+            raise
 
-            return to_return
+    def search_parallel(
+        self, concurrency: int = 4, page_size: int = 100, typed: bool = False, **params: dict
+    ):
+        """
+        Returns a list of all results for the resource self.resource_name, fetching several
+        pages at once. See iter_search_parallel.
+        """
+        return list(
+            self.iter_search_parallel(
+                concurrency=concurrency, page_size=page_size, typed=typed, **params
+            )
+        )
+
+    def iter_search_parallel(
+        self,
+        concurrency: int = 4,
+        page_size: int = 100,
+        ordered: bool = True,
+        typed: bool = False,
+        **params: dict,
+    ) -> Iterator[dict]:
+        """
+        Yields the results for the resource self.resource_name, fetching up to `concurrency`
+        pages at once on a pool of threads.
+
+        The first page gives meta.total_count, from which the _offset of every other page is
+        computed. If ordered is False, pages are yielded as soon as they arrive rather than in
+        the order of the results. At most `concurrency` pages are fetched ahead of the consumer.
+
+        The connection pool_maxsize should be at least `concurrency` for the pages to reuse
+        keep-alive connections. If typed, results are self.model records.
+        """
+        to_model = self._typed(typed)
+        if to_model is not None:
+            yield from map(
+                to_model,
+                self.iter_search_parallel(concurrency, page_size, ordered, **params),
+            )
+            return
+        params["_limit"] = page_size
+        start = int(params.pop("_offset", 0))
+        try:
+            first_page = self.get(**params, _offset=start)
+            yield from first_page["objects"]
+
+            total_count = first_page["meta"].get("total_count")
+            if total_count is None:
+                # Without a total count, the only way forward is to follow the next links
+                if first_page["meta"]["next"]:
+                    yield from self.iter_search(cursor=first_page["meta"]["next"])
+                return
+
+            stride = page_stride(first_page, page_size)
+            offsets = iter(range(start + stride, total_count, stride))
+
+            def fetch_page(offset):
+                return self.get(**params, _offset=offset)["objects"]
+
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                pending = deque(
+                    executor.submit(fetch_page, offset)
+                    for offset in islice(offsets, concurrency)
+                )
+                try:
+                    while pending:
+                        if ordered:
+                            done = pending.popleft()
+                        else:
+                            done = next(as_completed(pending))
+                            pending.remove(done)
+                        for offset in islice(offsets, 1):
+                            pending.append(executor.submit(fetch_page, offset))
+                        yield from done.result()
+                finally:
+                    for future in pending:
+                        future.cancel()
 
         except HTTPError as e:
             if e.response.status_code == 400:
@@ -46,6 +186,7 @@ class HttpMethods:
                 f"Dry run: Would have deleted {self.connection._path(resource_uri)}"
             )
             return True
+        self._invalidate_response_cache(resource_uri)
         try:
             self.connection.delete(resource_uri, *args, **kwargs)
         except HTTPError as e:
@@ -54,21 +195,29 @@ class HttpMethods:
             raise
         return True
 
-    def get(self, resource_uri=None, *args, **params):
+    def get(self, resource_uri=None, *args, typed: bool = False, **params):
         """
-        Get an object at path resource_uri from ActionKit
+        Get an object at path resource_uri from ActionKit, as a self.model record if typed
 
         param kwargs are passed as query params to the request
         """
-        response = self.connection.get(
-            resource_uri or self.resource_name, *args, params=params
-        )
-        return response.json()
+        to_model = self._typed(typed)
+        if self.response_cache is not None and not args:
+            data = self.response_cache.fetch(
+                self.connection, resource_uri or self.resource_name, params=params
+            )
+        else:
+            response = self.connection.get(
+                resource_uri or self.resource_name, *args, params=params
+            )
+            data = self.connection.decode(response)
+        return data if to_model is None else to_model(data)
 
     def patch(self, resource_uri: str, to_patch: dict, *args, **kwargs):
         """
         Generic patch method for ActionKit resources
         """
+        self._invalidate_response_cache(resource_uri)
         self.connection.patch(resource_uri, *args, json=to_patch, **kwargs)
         return True
 
@@ -76,9 +225,20 @@ class HttpMethods:
         """
         Generic put method for ActionKit resources
         """
+        self._invalidate_response_cache(resource_uri)
         self.connection.put(resource_uri, *args, json=to_put, **kwargs)
         return True
 
+    def _invalidate_response_cache(self, resource_uri: str = None) -> None:
+        """
+        Writes can change any cached search of the resource, so they forget the cached responses
+        of the resource, and of the written object if it is of another resource
+        """
+        if self.response_cache is not None:
+            self.response_cache.invalidate_resource(self.connection, self.resource_name)
+            if resource_uri:
+                self.response_cache.invalidate(self.connection, resource_uri)
+
     def post(self, *args, **kwargs):
         """
         Post a new payload for type self.resource_name to ActionKit, passing kwargs directly
@@ -86,6 +246,7 @@ class HttpMethods:
 
         Returns the resource_uri of the newly created resource
         """
+        self._invalidate_response_cache()
         response = self.connection.post(self.resource_name, *args, **kwargs)
         return self.connection.__class__.get_resource_uri(response)
 
@@ -114,8 +275,10 @@ class HttpMethods:
         """
         return self.connection.get_resource_uri_id_from_response(response)
 
-    def get_by_id(self, id, *args, **params):
+    def get_by_id(self, id, *args, typed: bool = False, **params):
         """
         Get an object by its id from ActionKit
         """
-        return self.get(*args, resource_uri=f'{self.resource_name}/{id}', params=params)
+        return self.get(
+            *args, resource_uri=f'{self.resource_name}/{id}', typed=typed, params=params
+        )
@@ -0,0 +1,90 @@
+import codecs
+import json
+from typing import Iterable, Iterator
+
+_whitespace = " \t\n\r"
+
+
+class JSONArrayParser:
+    """
+    Incremental parser of a JSON array, such as the rows of a report: feed() it the document
+    piece by piece, and it returns the items completed so far. Only the item being received is
+    kept in memory, rather than the whole document.
+    """
+
+    def __init__(self, encoding: str = "utf-8", decoder: json.JSONDecoder = None):
+        self._decoder = decoder or json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder(encoding)()
+        self._buffer = ""
+        self._started = False
+        self._finished = False
+
+    def feed(self, data) -> list:
+        """
+        Parse the next piece of the document, bytes or str, and return the items it completed
+        """
+        if isinstance(data, bytes):
+            data = self._text_decoder.decode(data)
+        self._buffer += data
+        return self._parse(final=False)
+
+    def close(self) -> list:
+        """
+        Return the last items, and raise ValueError if the document is incomplete
+        """
+        self._buffer += self._text_decoder.decode(b"", final=True)
+        items = self._parse(final=True)
+        if not self._finished:
+            raise ValueError("Incomplete JSON array")
+        return items
+
+    def _skip(self, pos: int, characters: str) -> int:
+        buffer = self._buffer
+        while pos < len(buffer) and buffer[pos] in characters:
+            pos += 1
+        return pos
+
+    def _parse(self, final: bool) -> list:
+        items = []
+        buffer = self._buffer
+        pos = self._skip(0, _whitespace)
+        if not self._started:
+            if pos == len(buffer):
+                return items
+            if buffer[pos] != "[":
+                raise ValueError(f"Expected a JSON array, got: {buffer[pos:pos + 20]!r}")
+            self._started = True
+            pos += 1
+
+        while not self._finished:
+            pos = self._skip(pos, _whitespace + ",")
+            if pos == len(buffer):
+                break
+            if buffer[pos] == "]":
+                self._finished = True
+                pos += 1
+                break
+            try:
+                item, end = self._decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if final:
+                    raise
+                break
+            if end == len(buffer) and not final:
+                # A number may continue in the next piece
+                break
+            items.append(item)
+            pos = end
+
+        self._buffer = buffer[pos:]
+        return items
+
+
+def iter_json_array(chunks: Iterable, encoding: str = "utf-8") -> Iterator:
+    """
+    Yields the items of the JSON array made of chunks (bytes or str) as soon as they are complete
+    """
+    parser = JSONArrayParser(encoding)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
@@ -6,11 +6,20 @@ class Lists(HttpMethods):
 
     def get_or_create(self, list_name, notes=None):
         """Find or create a list."""
+        registry = self.connection.registry
+        if registry is not None:
+            known_list = registry.list(list_name)
+            if known_list:
+                return known_list
+
         lists = self.get(name=list_name)
 
         if lists["meta"]["total_count"] == 0:
             # sigh, terrible design. second request to get the object we just created. bad past aaron.
-            return self.get(self.post({"name": list_name, "notes": notes}))
+            new_list = self.get(self.post({"name": list_name, "notes": notes}))
+            if registry is not None:
+                registry.add_list(new_list)
+            return new_list
 
         return lists["objects"][0]
 
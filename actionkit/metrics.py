@@ -0,0 +1,215 @@
+import bisect
+import threading
+
+from .connection import Connection
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def resource_name(url: str) -> str:
+    """
+    The resource a request is accounted to: the first segment of its API path (e.g. "user"),
+    or the report name for reports (e.g. "report/run/sql")
+    """
+    segments = [s for s in Connection._api_path(url).split("/") if s]
+    if segments[:2] == ["report", "run"]:
+        return "/".join(segments[:3])
+    return segments[0] if segments else ""
+
+
+def _body_size(body) -> int:
+    if isinstance(body, str):
+        return len(body.encode())
+    if isinstance(body, bytes):
+        return len(body)
+    return 0
+
+
+def _bytes_sent(response) -> int:
+    request = getattr(response, "request", None)
+    if request is None:
+        return 0
+    length = request.headers.get("content-length")
+    if length is not None and length.isdigit():
+        return int(length)
+    # requests exposes the prepared body, httpx the content
+    body = getattr(request, "body", None)
+    if body is None:
+        body = getattr(request, "content", None)
+    return _body_size(body)
+
+
+def _bytes_received(response) -> int:
+    """
+    Never reads the body, which may be streamed
+    """
+    length = response.headers.get("content-length")
+    if length is not None and length.isdigit():
+        return int(length)
+    return _body_size(getattr(response, "_content", None))
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """
+        (upper bound, number of observations at or below it) pairs, ending with +Inf
+        """
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            yield bound, total
+
+    def to_dict(self) -> dict:
+        return dict(
+            count=self.count,
+            sum=self.sum,
+            buckets={_format_bound(bound): count for bound, count in self.cumulative()},
+        )
+
+
+class ResourceMetrics:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.requests = {}
+        self.errors = 0
+        self.retries = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latency = Histogram(buckets)
+
+    def to_dict(self) -> dict:
+        return dict(
+            requests=dict(self.requests),
+            errors=self.errors,
+            retries=self.retries,
+            bytes_sent=self.bytes_sent,
+            bytes_received=self.bytes_received,
+            latency=self.latency.to_dict(),
+        )
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+class MetricsCollector:
+    """
+    Collects per resource request counts (by HTTP method and status), latencies, retries,
+    errors and bytes transferred, using the hooks of a Connection:
+
+        metrics = MetricsCollector()
+        metrics.install(ak.connection)
+        ...
+        print(metrics.to_prometheus())
+
+    Each attempt of a request is counted, so a request retried twice counts three times.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS, prefix: str = "actionkit"):
+        self.buckets = tuple(buckets)
+        self.prefix = prefix
+        self.resources = {}
+        self._lock = threading.Lock()
+
+    def install(self, connection: Connection) -> "MetricsCollector":
+        connection.add_hook("after_response", self.after_response)
+        connection.add_hook("on_retry", self.on_retry)
+        connection.add_hook("on_error", self.on_error)
+        return self
+
+    def uninstall(self, connection: Connection) -> None:
+        connection.remove_hook("after_response", self.after_response)
+        connection.remove_hook("on_retry", self.on_retry)
+        connection.remove_hook("on_error", self.on_error)
+
+    def _resource(self, url: str) -> ResourceMetrics:
+        name = resource_name(url)
+        if name not in self.resources:
+            self.resources[name] = ResourceMetrics(self.buckets)
+        return self.resources[name]
+
+    def after_response(self, http_method, url, response, elapsed, **kwargs) -> None:
+        key = (http_method, response.status_code)
+        with self._lock:
+            resource = self._resource(url)
+            resource.requests[key] = resource.requests.get(key, 0) + 1
+            resource.latency.observe(elapsed)
+            resource.bytes_sent += _bytes_sent(response)
+            resource.bytes_received += _bytes_received(response)
+
+    def on_retry(self, http_method, url, **kwargs) -> None:
+        with self._lock:
+            self._resource(url).retries += 1
+
+    def on_error(self, http_method, url, **kwargs) -> None:
+        with self._lock:
+            self._resource(url).errors += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self.resources = {}
+
+    def to_dict(self) -> dict:
+        """
+        The metrics of every resource, with request counts keyed by "METHOD status"
+        """
+        with self._lock:
+            metrics = {name: resource.to_dict() for name, resource in self.resources.items()}
+        for resource in metrics.values():
+            resource["requests"] = {
+                f"{method.upper()} {status}": count
+                for (method, status), count in resource["requests"].items()
+            }
+        return metrics
+
+    def to_prometheus(self) -> str:
+        """
+        The metrics in the Prometheus text exposition format
+        """
+        prefix = self.prefix
+        histogram = f"{prefix}_request_duration_seconds"
+        with self._lock:
+            resources = [
+                (f'resource="{_escape(name)}"', resource)
+                for name, resource in sorted(self.resources.items())
+            ]
+            lines = [f"# TYPE {prefix}_requests_total counter"]
+            for label, resource in resources:
+                for (method, status), count in sorted(resource.requests.items()):
+                    lines.append(
+                        f'{prefix}_requests_total{{{label},method="{method.upper()}",'
+                        f'status="{status}"}} {count}'
+                    )
+            for name, attribute in (
+                ("errors_total", "errors"),
+                ("retries_total", "retries"),
+                ("sent_bytes_total", "bytes_sent"),
+                ("received_bytes_total", "bytes_received"),
+            ):
+                lines.append(f"# TYPE {prefix}_{name} counter")
+                for label, resource in resources:
+                    lines.append(f"{prefix}_{name}{{{label}}} {getattr(resource, attribute)}")
+            lines.append(f"# TYPE {histogram} histogram")
+            for label, resource in resources:
+                for bound, count in resource.latency.cumulative():
+                    lines.append(
+                        f'{histogram}_bucket{{{label},le="{_format_bound(bound)}"}} {count}'
+                    )
+                lines.append(f"{histogram}_sum{{{label}}} {resource.latency.sum}")
+                lines.append(f"{histogram}_count{{{label}}} {resource.latency.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
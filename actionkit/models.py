@@ -0,0 +1,206 @@
+from typing import Callable
+
+from .rows import to_datetime, to_decimal
+
+
+class Decoded:
+    """
+    Descriptor of a record field decoded on first access, e.g. a timestamp to a datetime or a
+    nested object to a record. The raw value is kept in the slot _<name> until then.
+    """
+
+    __slots__ = ("decode", "slot", "bit")
+
+    def __init__(self, decode: Callable, slot, bit: int):
+        self.decode = decode
+        self.slot = slot
+        self.bit = bit
+
+    def __get__(self, record, owner=None):
+        if record is None:
+            return self
+        value = self.slot.__get__(record, owner)
+        if value is not None and not record._decoded & self.bit:
+            value = self.decode(value)
+            self.slot.__set__(record, value)
+            record._decoded |= self.bit
+        return value
+
+    def __set__(self, record, value):
+        self.slot.__set__(record, value)
+        record._decoded |= self.bit
+
+
+class RecordType(type):
+    """
+    Metaclass of the records, giving them a slot for each of their record_fields
+    """
+
+    def __new__(mcs, name, bases, namespace):
+        inherited = [field for base in bases for field in getattr(base, "record_fields", ())]
+        decoders = {}
+        for base in bases:
+            decoders.update(getattr(base, "decoders", {}))
+        decoders.update(namespace.get("decoders", {}))
+        fields = [field for field in namespace.get("record_fields", ()) if field not in inherited]
+
+        namespace["__slots__"] = tuple(
+            f"_{field}" if field in decoders else field for field in fields
+        ) + namespace.get("__slots__", ())
+        namespace["record_fields"] = tuple(inherited + fields)
+        namespace["decoders"] = decoders
+        cls = super().__new__(mcs, name, bases, namespace)
+
+        # The setters of the slots by field name, in which from_dict stores raw values
+        cls._setters = {}
+        for field in cls.record_fields:
+            if field in decoders:
+                slot = getattr(cls, f"_{field}")
+                bit = 1 << list(decoders).index(field)
+                setattr(cls, field, Decoded(decoders[field], slot, bit))
+            else:
+                slot = getattr(cls, field)
+            cls._setters[field] = slot.__set__
+        return cls
+
+
+def nested(record_type: RecordType) -> Callable:
+    """
+    Decoder of a nested object, or list of objects, to records. Resource URIs are left as is.
+    """
+
+    def decode(value):
+        if isinstance(value, dict):
+            return record_type.from_dict(value)
+        if isinstance(value, list):
+            return [decode(item) for item in value]
+        return value
+
+    return decode
+
+
+class Record(metaclass=RecordType):
+    """
+    Base of the compact typed models of ActionKit objects, returned by get and the search
+    methods of resources with typed=True:
+
+        for user in ak.Users.iter_search(country="FR", typed=True):
+            print(user.email, user.created_at.year)
+
+    The record_fields are held in slots, missing ones are None, and any other key of the object
+    is kept in the extra dict. Fields with a decoder, like timestamps, amounts and nested objects,
+    are only decoded when first accessed.
+    """
+
+    __slots__ = ("_decoded", "extra")
+    record_fields = ()
+    decoders = {}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Record":
+        record = cls.__new__(cls)
+        record._decoded = 0
+        extra = None
+        setters = cls._setters
+        for key, value in data.items():
+            setter = setters.get(key)
+            if setter is not None:
+                setter(record, value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        record.extra = extra
+        return record
+
+    def __getattr__(self, name):
+        # Only called for unset slots and unknown attributes
+        if name in type(self).record_fields:
+            return None
+        extra = self.extra if name != "extra" else None
+        if extra and name in extra:
+            return extra[name]
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
+    def to_dict(self) -> dict:
+        """
+        The fields of the record, decoded, with nested records as dicts
+        """
+
+        def plain(value):
+            if isinstance(value, Record):
+                return value.to_dict()
+            if isinstance(value, list):
+                return [plain(item) for item in value]
+            return value
+
+        data = {}
+        for field in self.record_fields:
+            value = getattr(self, field)
+            if value is not None:
+                data[field] = plain(value)
+        data.update(self.extra or {})
+        return data
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.resource_uri or self.id}>"
+
+
+class UserRecord(Record):
+    record_fields = (
+        "id", "resource_uri", "email", "prefix", "first_name", "middle_name", "last_name",
+        "suffix", "address1", "address2", "city", "state", "region", "postal", "zip", "plus4",
+        "country", "lang", "source", "subscription_status", "rand_id", "token", "fields",
+        "phones", "location", "created_at", "updated_at",
+    )
+    decoders = dict(created_at=to_datetime, updated_at=to_datetime)
+
+
+class ActionRecord(Record):
+    record_fields = (
+        "id", "resource_uri", "user", "page", "akid", "source", "status", "link", "mailing",
+        "referring_user", "referring_mailing", "is_forwarded", "opq_id", "subscribed_user",
+        "created_user", "taf_emails_sent", "fields", "created_at", "updated_at",
+    )
+    decoders = dict(user=nested(UserRecord), created_at=to_datetime, updated_at=to_datetime)
+
+
+class TransactionRecord(Record):
+    record_fields = (
+        "id", "resource_uri", "order", "account", "type", "status", "success", "trans_id",
+        "amount", "amount_converted", "currency", "test_mode", "failure_code",
+        "failure_description", "failure_message", "created_at", "updated_at",
+    )
+    decoders = dict(
+        amount=to_decimal,
+        amount_converted=to_decimal,
+        created_at=to_datetime,
+        updated_at=to_datetime,
+    )
+
+
+class OrderRecord(Record):
+    record_fields = (
+        "id", "resource_uri", "action", "user", "user_detail", "status", "total",
+        "total_converted", "currency", "payment_method", "card_num_last_four", "import_id",
+        "orderdetails", "orderrecurrings", "transactions", "shipping_address", "reverse",
+        "created_at", "updated_at",
+    )
+    decoders = dict(
+        user=nested(UserRecord),
+        total=to_decimal,
+        total_converted=to_decimal,
+        transactions=nested(TransactionRecord),
+        created_at=to_datetime,
+        updated_at=to_datetime,
+    )
+
+
+class DonationActionRecord(ActionRecord):
+    record_fields = ActionRecord.record_fields + ("order",)
+    decoders = dict(order=nested(OrderRecord))
@@ -1,10 +1,12 @@
 from decimal import Decimal
 
 from .httpmethods import HttpMethods
+from .models import OrderRecord
 
 
 class Orders(HttpMethods):
     resource_name = "order"
+    model = OrderRecord
 
     def update(
         self,
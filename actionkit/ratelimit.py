@@ -0,0 +1,159 @@
+import os
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Token bucket allowing `rate` requests per second on average, with bursts of up to `capacity`.
+
+    reserve() takes a token and returns how long the caller must wait before using it, so it can
+    be used from threads (sleeping) and from asyncio (awaiting) alike.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self, tokens: float, available: float, updated_at: float, now: float):
+        """
+        Returns the tokens left after taking `tokens`, possibly negative, and the wait this implies
+        """
+        available = min(self.capacity, available + (now - updated_at) * self.rate)
+        available -= tokens
+        wait = -available / self.rate if available < 0 else 0.0
+        return available, wait
+
+    def reserve(self, tokens: float = 1) -> float:
+        """
+        Take tokens from the bucket and return the number of seconds to wait before sending
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens, wait = self._take(tokens, self._tokens, self._updated_at, now)
+            self._updated_at = now
+            return wait
+
+
+class FileTokenBucket(TokenBucket):
+    """
+    Token bucket whose state lives in a local file, locked while it is updated, so that every
+    process on the host using the same file shares the same budget. Requires fcntl (POSIX).
+    """
+
+    def __init__(self, file_name: str, rate: float, capacity: float = None):
+        super().__init__(rate, capacity)
+        self.file_name = file_name
+
+    def reserve(self, tokens: float = 1) -> float:
+        import fcntl
+
+        with self._lock:
+            fd = os.open(self.file_name, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                state = os.read(fd, 64).split()
+                now = time.time()
+                if len(state) == 2:
+                    available, updated_at = float(state[0]), float(state[1])
+                else:
+                    available, updated_at = self.capacity, now
+                available, wait = self._take(tokens, available, updated_at, now)
+                os.lseek(fd, 0, os.SEEK_SET)
+                os.ftruncate(fd, 0)
+                os.write(fd, f"{available!r} {now!r}".encode())
+            finally:
+                os.close(fd)
+            return wait
+
+
+class RateLimitRule:
+    """
+    Applies a token bucket to the requests matching an HTTP method and/or an API path prefix
+    (relative to /rest/v1/, e.g. "report/run" or "donationpush"). None matches everything.
+    """
+
+    def __init__(self, bucket: TokenBucket, method: str = None, path_prefix: str = None):
+        self.bucket = bucket
+        self.method = method.lower() if method else None
+        self.path_prefix = path_prefix.strip("/") if path_prefix else None
+        self.waits = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def name(self) -> str:
+        return f"{self.method or '*'} {self.path_prefix or '*'}"
+
+    def matches(self, http_method: str, path: str) -> bool:
+        if self.method and self.method != http_method.lower():
+            return False
+        return not self.path_prefix or path.strip("/").startswith(self.path_prefix)
+
+
+class RateLimiter:
+    """
+    Client-side rate limiting of the requests sent by a Connection.
+
+    Every rule matching a request takes a token from its bucket, and the request waits for the
+    slowest of them. For example, to send at most 10 requests per second overall and one
+    report query every 2 seconds:
+
+        limiter = RateLimiter(rate=10)
+        limiter.add_rule(TokenBucket(rate=0.5), path_prefix="report/run")
+        actionkit.ActionKit(rate_limiter=limiter)
+
+    Use FileTokenBucket to share a budget between the processes of a host.
+    """
+
+    def __init__(self, rate: float = None, capacity: float = None):
+        self.rules = []
+        self._lock = threading.Lock()
+        if rate is not None:
+            self.add_rule(TokenBucket(rate, capacity))
+
+    def add_rule(
+        self, bucket: TokenBucket, method: str = None, path_prefix: str = None
+    ) -> RateLimitRule:
+        rule = RateLimitRule(bucket, method=method, path_prefix=path_prefix)
+        self.rules.append(rule)
+        return rule
+
+    def delay(self, http_method: str, path: str) -> float:
+        """
+        Reserve the tokens of a request and return the number of seconds it must wait
+        """
+        delay = 0.0
+        for rule in self.rules:
+            if rule.matches(http_method, path):
+                wait = rule.bucket.reserve()
+                if wait > 0:
+                    with self._lock:
+                        rule.waits += 1
+                        rule.total_wait += wait
+                        rule.max_wait = max(rule.max_wait, wait)
+                delay = max(delay, wait)
+        return delay
+
+    def acquire(self, http_method: str, path: str) -> float:
+        """
+        Wait until the request can be sent, and return how long it waited
+        """
+        delay = self.delay(http_method, path)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def stats(self) -> dict:
+        """
+        Per rule: how many requests had to wait, and the total and maximum waits in seconds
+        """
+        return {
+            rule.name: dict(waits=rule.waits, total_wait=rule.total_wait, max_wait=rule.max_wait)
+            for rule in self.rules
+        }
@@ -0,0 +1,165 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Registry:
+    """
+    In-memory lookup tables of ActionKit reference data: languages, groups, lists and campaigns.
+
+    Each table is loaded from ActionKit on first use, or all at once, in parallel, with load().
+    start_refresh() reloads them periodically in a background thread. Lookups are dict accesses
+    and never hit the API once a table is loaded.
+
+    Lists.get_or_create and Campaigns.create add the items they create, so the registry does not
+    need a refresh to know about them.
+    """
+
+    tables = ("languages", "groups", "lists", "campaigns")
+
+    def __init__(self, actionkit):
+        self.actionkit = actionkit
+        self._tables = {}
+        self._lock = threading.RLock()
+        self._stop_refresh = None
+        self._refresh_thread = None
+
+    @property
+    def logger(self):
+        return self.actionkit.connection.logger
+
+    def load(self, *tables: str, parallel: bool = True) -> None:
+        """
+        (Re)load the given tables, all of them by default
+        """
+        tables = tables or self.tables
+        for name in tables:
+            if name not in self.tables:
+                raise KeyError(f"Unknown registry table {name}")
+        if parallel and len(tables) > 1:
+            with ThreadPoolExecutor(max_workers=len(tables)) as executor:
+                loaded = list(executor.map(self._fetch, tables))
+        else:
+            loaded = [self._fetch(name) for name in tables]
+        with self._lock:
+            self._tables.update(zip(tables, loaded))
+
+    def _fetch(self, name: str) -> dict:
+        return getattr(self, f"_fetch_{name}")()
+
+    def _fetch_languages(self) -> dict:
+        by_code = self.actionkit.Languages.by_code()
+        return dict(
+            by_code=by_code,
+            by_id={int(l["id"]): l for l in by_code.values()},
+            by_uri={l["resource_uri"]: l for l in by_code.values()},
+        )
+
+    def _fetch_groups(self) -> dict:
+        groups = self.actionkit.Groups.search()
+        return dict(
+            by_name={g["name"]: g for g in groups},
+            by_id={int(g["id"]): g for g in groups},
+        )
+
+    def _fetch_lists(self) -> dict:
+        lists = self.actionkit.Lists.search()
+        return dict(
+            by_name={l["name"]: l for l in lists},
+            by_id={int(l["id"]): l for l in lists},
+        )
+
+    def _fetch_campaigns(self) -> dict:
+        by_id = self.actionkit.Campaigns.list()
+        return dict(by_id=by_id, by_name={name: id for id, name in by_id.items()})
+
+    def _index(self, table: str, index: str) -> dict:
+        if table not in self._tables:
+            # Fetched outside the lock, not to hold up lookups in the other tables meanwhile
+            loaded = self._fetch(table)
+            with self._lock:
+                self._tables.setdefault(table, loaded)
+        return self._tables[table][index]
+
+    def language(self, iso_code: str) -> dict:
+        """
+        Returns the language with the given (actual) ISO code, or None
+        """
+        return self._index("languages", "by_code").get(iso_code)
+
+    def language_by_id(self, id: int) -> dict:
+        return self._index("languages", "by_id").get(int(id))
+
+    def language_uri(self, iso_code: str) -> str:
+        language = self.language(iso_code)
+        return language["resource_uri"] if language else None
+
+    def group(self, name: str) -> dict:
+        return self._index("groups", "by_name").get(name)
+
+    def group_by_id(self, id: int) -> dict:
+        return self._index("groups", "by_id").get(int(id))
+
+    def group_uri(self, name: str) -> str:
+        group = self.group(name)
+        return group["resource_uri"] if group else None
+
+    def list(self, name: str) -> dict:
+        return self._index("lists", "by_name").get(name)
+
+    def list_by_id(self, id: int) -> dict:
+        return self._index("lists", "by_id").get(int(id))
+
+    def campaign_name(self, id: int) -> str:
+        return self._index("campaigns", "by_id").get(int(id))
+
+    def campaign_id(self, name: str) -> int:
+        return self._index("campaigns", "by_name").get(name)
+
+    def add_list(self, list_: dict) -> None:
+        """
+        Register a list created after the lists table was loaded
+        """
+        with self._lock:
+            if "lists" in self._tables:
+                self._tables["lists"]["by_name"][list_["name"]] = list_
+                self._tables["lists"]["by_id"][int(list_["id"])] = list_
+
+    def add_campaign(self, id: int, name: str) -> None:
+        """
+        Register a campaign created after the campaigns table was loaded
+        """
+        with self._lock:
+            if "campaigns" in self._tables:
+                self._tables["campaigns"]["by_id"][int(id)] = name
+                self._tables["campaigns"]["by_name"][name] = int(id)
+
+    def start_refresh(self, interval: float) -> None:
+        """
+        Reload every table every `interval` seconds in a background thread, until stop_refresh()
+        """
+        self.stop_refresh()
+        stop = threading.Event()
+
+        def refresh():
+            while not stop.wait(interval):
+                try:
+                    self.load()
+                except Exception as e:
+                    self.logger.warning(f"Failed to refresh the ActionKit registry: {e}")
+
+        self._stop_refresh = stop
+        self._refresh_thread = threading.Thread(
+            target=refresh, name="actionkit-registry", daemon=True
+        )
+        self._refresh_thread.start()
+
+    def stop_refresh(self) -> None:
+        """
+        Stop the background refresh, waiting for a reload in progress to finish
+        """
+        if self._stop_refresh is not None:
+            self._stop_refresh.set()
+            self._stop_refresh = None
+        thread, self._refresh_thread = self._refresh_thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
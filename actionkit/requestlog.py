@@ -0,0 +1,127 @@
+import json
+import logging
+import pprint
+
+# Request headers and payload fields never written to the logs
+REDACTED_HEADERS = frozenset(["authorization", "proxy-authorization", "cookie", "set-cookie"])
+REDACTED_FIELDS = frozenset(
+    ["auth", "card_num", "card_code", "exp_date_month", "exp_date_year", "password"]
+)
+REDACTED = "<redacted>"
+
+
+class LazyFormat:
+    """
+    Defers a formatting function until the log record is actually emitted
+    """
+
+    __slots__ = ("fn", "args")
+
+    def __init__(self, fn, *args):
+        self.fn = fn
+        self.args = args
+
+    def __str__(self):
+        return self.fn(*self.args)
+
+
+def redact(value, fields=REDACTED_FIELDS):
+    """
+    Returns a copy of value where the items of dicts with a key in fields are masked
+    """
+    if isinstance(value, dict):
+        return {
+            k: REDACTED if str(k).lower() in fields else redact(v, fields)
+            for k, v in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [redact(v, fields) for v in value]
+    return value
+
+
+def truncate(text: str, max_length: int) -> str:
+    if max_length is None or len(text) <= max_length:
+        return text
+    return f"{text[:max_length]}... [{len(text) - max_length} more characters]"
+
+
+class RequestLogger:
+    """
+    Logs the requests sent to ActionKit and their responses.
+
+    Nothing is formatted unless the logger is enabled for `level`. Authentication headers and
+    card fields are redacted, and bodies are truncated to max_body characters.
+
+    :param logger: Where request and response events are sent. Connection uses its own logger
+        unless given a separate request_logger.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        level: int = logging.DEBUG,
+        max_body: int = 2000,
+        redact_headers=REDACTED_HEADERS,
+        redact_fields=REDACTED_FIELDS,
+    ):
+        self.logger = logger
+        self.level = level
+        self.max_body = max_body
+        self.redact_headers = frozenset(h.lower() for h in redact_headers)
+        self.redact_fields = frozenset(f.lower() for f in redact_fields)
+
+    @property
+    def enabled(self) -> bool:
+        return self.logger.isEnabledFor(self.level)
+
+    def _redact_headers(self, headers) -> dict:
+        return {
+            k: REDACTED if k.lower() in self.redact_headers else v
+            for k, v in dict(headers).items()
+        }
+
+    def _format_headers(self, headers) -> str:
+        return pprint.pformat(self._redact_headers(headers))
+
+    def _format_kwargs(self, request_kwargs: dict) -> str:
+        kwargs = dict(request_kwargs)
+        if "headers" in kwargs:
+            kwargs["headers"] = self._redact_headers(kwargs["headers"] or {})
+        return truncate(pprint.pformat(redact(kwargs, self.redact_fields)), self.max_body)
+
+    def _format_body(self, response) -> str:
+        text = response.text
+        if response.headers.get("content-type", "").startswith("application/json"):
+            try:
+                body = redact(json.loads(text), self.redact_fields)
+            except ValueError:
+                return truncate(text, self.max_body)
+            if len(text) <= self.max_body:
+                return pprint.pformat(body)
+            return truncate(json.dumps(body), self.max_body)
+        return truncate(text, self.max_body)
+
+    def request(self, http_method: str, url: str, request_kwargs: dict) -> None:
+        if not self.enabled:
+            return
+        self.logger.log(self.level, "Making %s request to %s", http_method, url)
+        self.logger.log(
+            self.level, "Request kwargs:\n%s", LazyFormat(self._format_kwargs, request_kwargs)
+        )
+
+    def response(self, response, log_body: bool = True) -> None:
+        """
+        Log the headers sent with the request and the response body. log_body should be False
+        for streamed responses, whose body must not be read here.
+        """
+        if not self.enabled:
+            return
+        self.logger.log(
+            self.level,
+            "ActionKit Request headers:\n%s",
+            LazyFormat(self._format_headers, response.request.headers),
+        )
+        if log_body and response.content:
+            self.logger.log(
+                self.level, "ActionKit Response body:\n%s", LazyFormat(self._format_body, response)
+            )
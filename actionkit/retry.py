@@ -0,0 +1,196 @@
+import email.utils
+import random
+import threading
+import time
+
+import requests
+
+# Methods that can safely be sent again when we don't know whether ActionKit received them
+IDEMPOTENT_METHODS = frozenset(["get", "head", "options", "put", "delete"])
+# Statuses with which ActionKit turns a request away before processing it, so that even
+# non-idempotent requests can be sent again
+UNPROCESSED_STATUSES = frozenset([429, 503])
+
+
+class RetryPolicy:
+    """
+    Decides whether and when a failed request to ActionKit is sent again.
+
+    Delays grow exponentially from initial_backoff with "full jitter": each delay is drawn at
+    random between 0 and the exponential value, so that clients failing together don't retry
+    together. A Retry-After header sent with a retryable status takes precedence.
+
+    :param max_retries: The maximum number of retries of a request
+    :param initial_backoff: The upper bound of the first delay, in seconds
+    :param max_backoff: The upper bound of any delay, in seconds. Requests that Retry-After
+        asks to wait longer are not retried.
+    :param max_elapsed: Give up once this many seconds have passed since the first attempt
+    :param retry_statuses: The HTTP status codes retried for idempotent methods. Other methods,
+        like POST, are only retried on 429 and 503, with which the request was not processed:
+        a 500 or a gateway 504 doesn't prove that a donation push didn't go through.
+    :param retry_exceptions: The exceptions retried for idempotent methods. Connection timeouts
+        are retried for all methods since the request was not sent.
+    :param jitter: Whether to randomise delays
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        initial_backoff: float = 3,
+        max_backoff: float = 60,
+        max_elapsed: float = None,
+        retry_statuses=(429, 500, 502, 503, 504),
+        retry_exceptions=(requests.exceptions.ConnectionError, requests.exceptions.Timeout),
+        jitter: bool = True,
+    ):
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.max_elapsed = max_elapsed
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_exceptions = tuple(retry_exceptions)
+        self.jitter = jitter
+
+    def retries_status(self, status_code: int, http_method: str = "get") -> bool:
+        if status_code not in self.retry_statuses:
+            return False
+        return http_method.lower() in IDEMPOTENT_METHODS or status_code in UNPROCESSED_STATUSES
+
+    def retries_exception(self, error: Exception, http_method: str) -> bool:
+        if not isinstance(error, self.retry_exceptions):
+            return False
+        return (
+            http_method.lower() in IDEMPOTENT_METHODS
+            or isinstance(error, requests.exceptions.ConnectTimeout)
+        )
+
+    def backoff(self, attempt: int) -> float:
+        """
+        The delay before retry number attempt + 1
+        """
+        delay = min(self.max_backoff, self.initial_backoff * 2 ** attempt)
+        return random.uniform(0, delay) if self.jitter else delay
+
+    @staticmethod
+    def retry_after(response) -> float:
+        """
+        The delay requested by the Retry-After header of the response, if any
+        """
+        value = response.headers.get("Retry-After") if response is not None else None
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, retry_at.timestamp() - time.time())
+
+    def next_delay(
+        self,
+        attempt: int,
+        started_at: float,
+        http_method: str,
+        response=None,
+        error: Exception = None,
+    ) -> float:
+        """
+        Returns the number of seconds to wait before retrying a failed request, or None if the
+        request should not be retried.
+
+        :param attempt: The number of retries already made
+        :param started_at: The time.monotonic() of the first attempt
+        :param response: The response with an error status, if any
+        :param error: The exception raised by the request, if any
+        """
+        if attempt >= self.max_retries:
+            return None
+        if error is not None:
+            if not self.retries_exception(error, http_method):
+                return None
+        elif response is None or not self.retries_status(response.status_code, http_method):
+            return None
+
+        delay = self.retry_after(response)
+        if delay is None:
+            delay = self.backoff(attempt)
+        elif delay > self.max_backoff:
+            return None
+        if self.max_elapsed is not None:
+            if time.monotonic() + delay - started_at > self.max_elapsed:
+                return None
+        return delay
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of sending a request while the circuit breaker is open
+    """
+
+
+class CircuitBreaker:
+    """
+    Fails fast when ActionKit is down.
+
+    After failure_threshold consecutive failures (server errors, connection errors or timeouts)
+    the circuit opens and requests raise CircuitOpenError without being sent. After
+    reset_timeout seconds, one trial request is let through: the circuit closes if it succeeds
+    and opens again if it fails.
+
+    It holds no I/O, so a single breaker can be shared by Connection and AsyncConnection objects.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def before_request(self) -> None:
+        """
+        Raise CircuitOpenError if the request should not be sent
+        """
+        with self._lock:
+            state = self.state
+            if state == self.OPEN or (state == self.HALF_OPEN and self._trial_in_flight):
+                raise CircuitOpenError(
+                    f"ActionKit circuit breaker is open after {self.failures} failures"
+                )
+            if state == self.HALF_OPEN:
+                self._trial_in_flight = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def record_response(self, response) -> None:
+        if response.status_code >= 500:
+            self.record_failure()
+        else:
+            self.record_success()
@@ -0,0 +1,104 @@
+import re
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Callable, Sequence
+
+timestamp_regex = re.compile(
+    r"^(\d{4})-(\d\d)-(\d\d)(?:[T ](\d\d):(\d\d)(?::(\d\d)(?:\.(\d{1,6}))?)?)?"
+    r"([+-]\d\d:?\d\d)?$"
+)
+
+
+def to_decimal(value) -> Decimal:
+    """
+    Converts an amount to a Decimal, through its string representation so that floats are not
+    rounded in binary
+    """
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def to_datetime(value) -> datetime:
+    """
+    Converts an ActionKit timestamp, e.g. "2024-01-31 12:00:00" or "2024-01-31T12:00:00+00:00",
+    to a datetime
+    """
+    if isinstance(value, datetime):
+        return value
+    return fromisoformat(value.replace("Z", "+00:00"))
+
+
+def parse_timestamp(value: str) -> datetime:
+    """
+    Parses the ISO 8601 timestamps of ActionKit, for Python 3.6 which has no
+    datetime.fromisoformat
+    """
+    match = timestamp_regex.match(value)
+    if match is None:
+        raise ValueError(f"Invalid isoformat string: {value!r}")
+    *fields, fraction, offset = match.groups()
+    tzinfo = None
+    if offset is not None:
+        minutes = int(offset[1:3]) * 60 + int(offset[-2:])
+        tzinfo = timezone(timedelta(minutes=-minutes if offset[0] == "-" else minutes))
+    return datetime(
+        *(int(field) for field in fields if field is not None),
+        microsecond=int(fraction.ljust(6, "0")) if fraction else 0,
+        tzinfo=tzinfo,
+    )
+
+
+fromisoformat = getattr(datetime, "fromisoformat", parse_timestamp)
+
+
+class RowMapper:
+    """
+    Maps the rows of a report, lists of values, to Python objects:
+
+    - converters maps column names (or indexes) to functions converting their values, e.g.
+      dict(amount=to_decimal, created_at=to_datetime). None values are not converted.
+    - row_type is a class the row values are passed to, by name if columns are given and by
+      position otherwise, e.g. a namedtuple or a dataclass. When columns are given without
+      row_type, rows are mapped to a namedtuple with these fields.
+
+    Without columns, row_type or converters, rows are returned as they are.
+    """
+
+    def __init__(
+        self,
+        columns: Sequence[str] = None,
+        row_type: Callable = None,
+        converters: dict = None,
+    ):
+        self.columns = list(columns) if columns else None
+        if row_type is None and self.columns:
+            row_type = namedtuple("Row", self.columns, rename=True)
+            # rename replaces invalid field names, which must then be passed by position
+            self._by_name = list(row_type._fields) == self.columns
+        else:
+            self._by_name = self.columns is not None
+        self.row_type = row_type
+        self.converters = self._converter_indexes(converters or {})
+
+    def _converter_indexes(self, converters: dict) -> list:
+        indexes = []
+        for column, converter in converters.items():
+            if isinstance(column, int):
+                indexes.append((column, converter))
+            elif self.columns and column in self.columns:
+                indexes.append((self.columns.index(column), converter))
+            else:
+                raise KeyError(f"Unknown column {column} for converter")
+        return indexes
+
+    def __call__(self, row: list):
+        if self.converters:
+            row = list(row)
+            for index, converter in self.converters:
+                if row[index] is not None:
+                    row[index] = converter(row[index])
+        if self.row_type is None:
+            return row
+        if self._by_name:
+            return self.row_type(**dict(zip(self.columns, row)))
+        return self.row_type(*row)
@@ -1,15 +1,46 @@
+from concurrent.futures import ThreadPoolExecutor
 from os import path
+from typing import Callable, Iterable, Iterator, Sequence, Tuple
 
-from .donationaction import DonationAction
+from .chunkedquery import ChunkedQuery
 from .httpmethods import HttpMethods
+from .jsonstream import iter_json_array
+from .rows import RowMapper
+
+
+def chunks(items: list, size: int) -> Iterator[list]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def placeholders(prefix: str, count: int) -> str:
+    """
+    Numbered query placeholders, e.g. "{{ t0 }}, {{ t1 }}" for IN clauses
+    """
+    return ', '.join(f'{{{{ {prefix}{i} }}}}' for i in range(count))
+
+
+# Default number of seconds ActionKit, and the query_cache, keep the results of a query
+CACHE_DURATION = 600
 
 
 class SQL(HttpMethods):
     resource_name = 'report/run'
+    # Optional QueryCache of the results of run_query
+    query_cache = None
+    # Number of keys looked up by each query of the batched fetch_* methods
+    batch_size = 500
+
+    @property
+    def donation_action(self):
+        """
+        A DonationAction sharing the connection, created on first use
+        """
+        if self.__dict__.get('_donation_action') is None:
+            from .donationaction import DonationAction
 
-    def __init__(self, connection):
-        self.donation_action = DonationAction(connection)
-        super().__init__(connection)
+            self._donation_action = DonationAction(self.connection)
+        return self._donation_action
 
     def _run_report(self, report_name: str, **values: dict):
         if not report_name:
@@ -28,11 +59,22 @@ class SQL(HttpMethods):
         https://action.wemove.eu/docs/manual/api/rest/reports.html
         """
         response = self._run_report(report_name, **values)
-        return response.json()
+        return self.connection.decode(response)
 
-    def _run_query(
-        self, query: str = '', refresh=False, cache_duration=600, **values: dict
+    @staticmethod
+    def _query_payload(
+        query: str = '', refresh=False, cache_duration=CACHE_DURATION, **values: dict
     ):
+        if not query:
+            raise ValueError('Query must be provided')
+        return dict(
+            query=query,
+            refresh=refresh,
+            cache_duration=cache_duration,
+            **values,
+        )
+
+    def _run_query(self, query: str = '', **values: dict):
         """
         Runs an arbitrary SQL query against the ActionKit database.
         Returns the result.
@@ -43,16 +85,16 @@ class SQL(HttpMethods):
         :param query: The SQL query to run.
         :param values: The values to be substituted into the query, if any.
         """
-        if not query:
-            raise ValueError('Query must be provided')
         return self.connection.post(
             path.join(self.resource_name, 'sql'),
-            json=dict(
-                query=query,
-                refresh=refresh,
-                cache_duration=cache_duration,
-                **values,
-            ),
+            json=self._query_payload(query, **values),
+        )
+
+    def _stream_query(self, query: str = '', **values: dict):
+        return self.connection.post(
+            path.join(self.resource_name, 'sql'),
+            json=self._query_payload(query, **values),
+            stream=True,
         )
 
     def run_query(self, query: str = '', **values: dict):
@@ -62,9 +104,111 @@ class SQL(HttpMethods):
 
         For reference see:
         https://action.wemove.eu/docs/manual/api/rest/reports.html#running-an-ad-hoc-query
+
+        If a query_cache is set, identical queries are answered from it for cache_duration
+        seconds, unless refresh is True.
+        """
+        rows = self._cached_rows(query, values)
+        if rows is None:
+            response = self._run_query(query, **values)
+            self._cache_rows(query, values, response)
+            rows = self.connection.decode(response)
+        return rows
+
+    @staticmethod
+    def _bound_values(values: dict) -> dict:
+        "The values substituted into a query, without the options of its execution"
+        return {k: v for k, v in values.items() if k not in ('refresh', 'cache_duration')}
+
+    def _cached_rows(self, query: str, values: dict):
+        if self.query_cache is None:
+            return None
+        return self.query_cache.get(
+            query,
+            self._bound_values(values),
+            refresh=values.get('refresh', False),
+            loads=self.connection.codec.loads,
+            hostname=self.connection.hostname,
+            username=self.connection.username,
+        )
+
+    def _cache_rows(self, query: str, values: dict, response) -> None:
+        ttl = values.get('cache_duration', CACHE_DURATION)
+        if self.query_cache is not None and ttl and ttl > 0:
+            self.query_cache.set(
+                query,
+                self._bound_values(values),
+                response.content,
+                ttl=ttl,
+                hostname=self.connection.hostname,
+                username=self.connection.username,
+            )
+
+    def iter_query(
+        self,
+        query: str = '',
+        columns: Sequence[str] = None,
+        row_type: Callable = None,
+        converters: dict = None,
+        chunk_size: int = 65536,
+        **values: dict,
+    ) -> Iterator:
         """
-        response = self._run_query(query, **values)
-        return response.json()
+        Runs an arbitrary SQL query against the ActionKit database, like run_query, and yields
+        the rows as they are received rather than loading the whole result in memory.
+
+        Rows are lists of values, unless columns, row_type or converters are given, see RowMapper:
+
+            rows = ak.SQL.iter_query(
+                "SELECT id, total, created_at FROM core_order",
+                columns=["id", "total", "created_at"],
+                converters=dict(total=to_decimal, created_at=to_datetime),
+            )
+            for row in rows:
+                print(row.id, row.total)
+        """
+        mapper = RowMapper(columns, row_type, converters)
+        with self._stream_query(query, **values) as response:
+            for row in iter_json_array(response.iter_content(chunk_size)):
+                yield mapper(row)
+
+    def iter_query_chunked(
+        self,
+        query: str,
+        key: str = 'id',
+        table: str = None,
+        chunk_size: int = 10000,
+        concurrency: int = 4,
+        checkpoint=None,
+        **kwargs,
+    ) -> Iterator:
+        """
+        Runs a query over a whole table in ranges of its keyset column, several at once, and
+        yields the rows in order. Use it for extracts too large for a single run_query.
+
+            rows = ak.SQL.iter_query_chunked(
+                '''
+                SELECT id, user_id, created_at FROM core_action
+                WHERE id >= {{ chunk_start }} AND id < {{ chunk_end }}
+                ORDER BY id
+                ''',
+                table='core_action',
+                checkpoint='core_action.checkpoint',
+            )
+
+        See ChunkedQuery for the other arguments, which include those of iter_query
+        """
+        chunked_query = ChunkedQuery(
+            self,
+            query,
+            key=key,
+            table=table,
+            chunk_size=chunk_size,
+            concurrency=concurrency,
+            checkpoint=checkpoint,
+            **kwargs,
+        )
+        return chunked_query.run()
 
     def fetch_transaction_id_by_trans_id(self, trans_id: str) -> dict:
         """
@@ -104,3 +248,96 @@ class SQL(HttpMethods):
             )
             for id in row
         ]
+
+    def _run_queries(self, queries: list, concurrency: int) -> list:
+        """
+        Runs (query, values) pairs, up to `concurrency` at once, and returns their results in order
+        """
+        if len(queries) <= 1 or concurrency <= 1:
+            return [self.run_query(query, **values) for query, values in queries]
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(executor.map(lambda q: self.run_query(q[0], **q[1]), queries))
+
+    @staticmethod
+    def _transaction_ids_queries(trans_ids: list, batch_size: int) -> list:
+        queries = []
+        for batch in chunks(trans_ids, batch_size):
+            query = f"""
+                SELECT trans_id, id
+                FROM core_transaction
+                WHERE trans_id IN ({placeholders('t', len(batch))})
+                ORDER BY id
+            """
+            queries.append((query, {f't{i}': trans_id for i, trans_id in enumerate(batch)}))
+        return queries
+
+    def _transaction_ids_result(self, trans_ids: list, results: list) -> dict:
+        transaction_ids = dict.fromkeys(trans_ids)
+        # MySQL compares trans_ids regardless of case, so rows can differ in case from the keys
+        keys = {}
+        for trans_id in trans_ids:
+            keys.setdefault(str(trans_id).lower(), []).append(trans_id)
+        duplicates = []
+        for rows in results:
+            for row_trans_id, transaction_id in rows:
+                for trans_id in keys.get(str(row_trans_id).lower(), ()):
+                    if transaction_ids[trans_id] is None:
+                        transaction_ids[trans_id] = transaction_id
+                    elif trans_id not in duplicates:
+                        duplicates.append(trans_id)
+        for trans_id in duplicates:
+            self.connection.logger.warning(
+                f'More than 1 result found for trans_id {trans_id} in transaction table'
+            )
+        return transaction_ids
+
+    def fetch_transaction_ids_by_trans_ids(
+        self, trans_ids: Iterable[str], concurrency: int = 4
+    ) -> dict:
+        """
+        Batched fetch_transaction_id_by_trans_id: maps each trans_id to the id of its transaction
+        record, or None if there is none. Runs one query per batch_size trans_ids, up to
+        `concurrency` at once.
+        """
+        trans_ids = list(dict.fromkeys(trans_ids))
+        queries = self._transaction_ids_queries(trans_ids, self.batch_size)
+        return self._transaction_ids_result(trans_ids, self._run_queries(queries, concurrency))
+
+    @staticmethod
+    def _signup_action_ids_queries(pairs: list, batch_size: int) -> list:
+        queries = []
+        for batch in chunks(pairs, batch_size):
+            in_pairs = ', '.join(
+                f'({{{{ p{i} }}}}, {{{{ u{i} }}}})' for i in range(len(batch))
+            )
+            query = f"""
+                SELECT page_id, user_id, id
+                FROM core_action
+                INNER JOIN core_signupaction ON core_signupaction.action_ptr_id = core_action.id
+                WHERE (page_id, user_id) IN ({in_pairs})
+            """
+            values = dict(cache_duration=1)
+            for i, (page_id, user_id) in enumerate(batch):
+                values[f'p{i}'] = page_id
+                values[f'u{i}'] = user_id
+            queries.append((query, values))
+        return queries
+
+    @staticmethod
+    def _signup_action_ids_result(pairs: list, results: list) -> dict:
+        action_ids = {pair: [] for pair in pairs}
+        for rows in results:
+            for page_id, user_id, action_id in rows:
+                action_ids.setdefault((page_id, user_id), []).append(action_id)
+        return action_ids
+
+    def fetch_signup_action_ids_by_pairs(
+        self, pairs: Iterable[Tuple[int, int]], concurrency: int = 4
+    ) -> dict:
+        """
+        Batched fetch_signup_action_ids: maps each (page_id, user_id) pair to the list of its
+        signup action ids, empty if there are none
+        """
+        pairs = list(dict.fromkeys((int(page_id), int(user_id)) for page_id, user_id in pairs))
+        queries = self._signup_action_ids_queries(pairs, self.batch_size)
+        return self._signup_action_ids_result(pairs, self._run_queries(queries, concurrency))
@@ -4,6 +4,7 @@ from os import path
 from requests import HTTPError
 
 from .httpmethods import HttpMethods
+from .models import TransactionRecord
 from .orders import Orders
 from .validation import ValidationError
 
@@ -12,6 +13,7 @@ TRANSACTION_TYPES = ['sale', 'refund', 'credit']
 
 class Transactions(HttpMethods):
     resource_name = 'transaction'
+    model = TransactionRecord
 
     def reverse(self, transaction_uri: str = None, transaction_id: str = None):
         """
@@ -0,0 +1,162 @@
+import time
+from typing import Iterator, List
+
+# Statuses of uploads that ActionKit stopped processing before the end
+FAILED_STATUSES = ('died', 'failed', 'stopped')
+
+
+class UploadError(Exception):
+    """
+    Raised by UploadJob.result when ActionKit failed to process an upload
+    """
+
+    def __init__(self, job: 'UploadJob'):
+        super().__init__(f'Upload {job.upload_url} {job.status}')
+        self.job = job
+
+
+class PollBackoff:
+    """
+    Polling intervals growing from `initial` to `maximum` seconds while nothing changes, and
+    back to `initial` when the polled progress moves
+    """
+
+    def __init__(self, initial: float = 1, maximum: float = 30, factor: float = 1.5):
+        self.initial = initial
+        self.maximum = maximum
+        self.factor = factor
+        self.interval = initial
+        self._progress = None
+
+    def next_interval(self, progress=None) -> float:
+        if progress is not None and progress != self._progress:
+            self._progress = progress
+            self.interval = self.initial
+        interval = self.interval
+        self.interval = min(self.maximum, self.interval * self.factor)
+        return interval
+
+
+class UploadJob:
+    """
+    Handle on an upload that ActionKit processes in the background, returned by Uploads.upload,
+    Uploads.upload_users and Uploads.job:
+
+        job = ak.Uploads.upload('users.csv', 'import_page', wait=False)
+        ...
+        job.result(timeout=3600)
+
+    The properties reflect the upload resource as of the last refresh(). Many jobs can be
+    waited for at once with Uploads.wait_all.
+    """
+
+    def __init__(self, uploads, upload_url: str, data: dict = None):
+        self.uploads = uploads
+        self.upload_url = upload_url
+        self.data = data
+
+    def __repr__(self):
+        return f'<UploadJob {self.upload_url} {self.status}>'
+
+    def refresh(self) -> dict:
+        self.data = self.uploads.poll(self.upload_url)
+        return self.data
+
+    def _field(self, name: str, default=None):
+        return (self.data or {}).get(name, default)
+
+    @property
+    def status(self) -> str:
+        return self._field('status')
+
+    @property
+    def progress(self):
+        return self._field('progress')
+
+    @property
+    def done(self) -> bool:
+        return bool(self._field('is_completed')) or self.failed
+
+    @property
+    def failed(self) -> bool:
+        return self.status in FAILED_STATUSES
+
+    @property
+    def has_errors(self) -> bool:
+        return bool(self._field('has_errors'))
+
+    @property
+    def has_warnings(self) -> bool:
+        return bool(self._field('has_warnings'))
+
+    def _related_uri(self, field: str, resource: str) -> str:
+        uri = self._field(field)
+        if isinstance(uri, str):
+            return uri
+        upload_id = self.uploads.get_resource_uri_id(self.upload_url)
+        return f'{resource}/?upload={upload_id}'
+
+    def warnings(self) -> Iterator[dict]:
+        """
+        Yields the warnings ActionKit reported about the rows of the upload
+        """
+        return self.uploads.iter_search(cursor=self._related_uri('warnings', 'uploadwarning'))
+
+    def errors(self) -> Iterator[dict]:
+        """
+        Yields the errors ActionKit reported about the rows of the upload
+        """
+        return self.uploads.iter_search(cursor=self._related_uri('errors', 'uploaderror'))
+
+    def wait(self, timeout: float = None, backoff: PollBackoff = None) -> dict:
+        """
+        Polls the upload until ActionKit is done with it and returns the upload resource.
+        Raises TimeoutError if that takes more than timeout seconds.
+        """
+        backoff = backoff or PollBackoff()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            self.refresh()
+            if self.done:
+                return self.data
+            time.sleep(poll_interval(backoff, self.progress, deadline, self))
+
+    def result(self, timeout: float = None) -> dict:
+        """
+        Waits for the upload like wait, and raises UploadError if ActionKit failed to process it
+        """
+        self.wait(timeout)
+        if self.failed:
+            raise UploadError(self)
+        return self.data
+
+
+def poll_interval(backoff: PollBackoff, progress, deadline: float, job: UploadJob) -> float:
+    """
+    The time to sleep before the next poll, raising TimeoutError if the deadline is reached
+    """
+    interval = backoff.next_interval(progress)
+    if deadline is not None:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f'Upload {job.upload_url} still {job.status}')
+        interval = min(interval, remaining)
+    return interval
+
+
+def wait_all(jobs: List[UploadJob], timeout: float = None, backoff: PollBackoff = None):
+    """
+    Waits for several uploads from a single thread, polling the ones still in progress in
+    turn, and returns their upload resources
+    """
+    backoff = backoff or PollBackoff()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    pending = list(jobs)
+    while True:
+        for job in pending:
+            job.refresh()
+        pending = [job for job in pending if not job.done]
+        if not pending:
+            return [job.data for job in jobs]
+        progress = tuple(job.progress for job in pending)
+        time.sleep(poll_interval(backoff, progress, deadline, pending[0]))
@@ -1,13 +1,63 @@
-import sys
-import time
-
-from requests_toolbelt import MultipartEncoderMonitor
+import csv
+import io
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count, islice
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
 
 from .httpmethods import HttpMethods
+from .uploadjob import PollBackoff, UploadJob, wait_all
+
+# ActionKit matches uploaded rows to users by one of these columns
+USER_KEY_COLUMNS = ('email', 'user_id', 'akid')
+
+
+def users_csv(users: Sequence[dict], columns: Sequence[str] = None) -> io.BytesIO:
+    """
+    Writes users to an in-memory CSV file, with the given columns or else every key of the users
+    """
+    if columns is None:
+        columns = list(dict.fromkeys(key for user in users for key in user))
+    if not any(column in USER_KEY_COLUMNS for column in columns):
+        raise ValueError(f'Uploaded users need one of the columns {", ".join(USER_KEY_COLUMNS)}')
+
+    buffer = io.BytesIO()
+    text = io.TextIOWrapper(buffer, encoding='utf-8', newline='')
+    writer = csv.DictWriter(text, columns)
+    writer.writeheader()
+    writer.writerows(users)
+    text.flush()
+    text.detach()
+    buffer.seek(0)
+    return buffer
 
 
-def progressing(monitor):
-    sys.stdout.write(".")
+def users_csv_chunks(
+    users: Iterable[dict], columns: Sequence[str] = None, chunk_size: int = 50000
+) -> Iterator[Tuple[str, io.BytesIO]]:
+    """
+    Yields (file name, CSV file) pairs of chunk_size users, see users_csv
+    """
+    users = iter(users)
+    for index in count():
+        chunk = list(islice(users, chunk_size))
+        if not chunk:
+            return
+        yield f'users-{index:04d}.csv', users_csv(chunk, columns)
+
+
+class UploadUsersError(Exception):
+    """
+    Raised by upload_users when a chunk could not be sent, with the index of the failed chunk
+    and the jobs of all the chunks that were uploaded, by chunk index, so that they are not
+    lost. They can include chunks after the failed one, which were being sent at the time.
+    """
+
+    def __init__(self, jobs: Dict[int, UploadJob], chunk: int):
+        super().__init__(f'Upload of chunk {chunk} of users failed')
+        self.jobs = jobs
+        self.chunk = chunk
 
 
 class Uploads(HttpMethods):
@@ -16,19 +66,127 @@ class Uploads(HttpMethods):
     def poll(self, upload_url):
         return self.get(upload_url)
 
-    def upload(self, file_name, import_page):
+    def job(self, upload_url: str) -> UploadJob:
+        """
+        A handle on the upload at upload_url, to follow its processing by ActionKit
+        """
+        return UploadJob(self, upload_url)
+
+    def wait_all(
+        self, jobs: List[UploadJob], timeout: float = None, backoff: PollBackoff = None
+    ) -> List[dict]:
+        """
+        Waits for the processing of several uploads, polled in turn from this thread, and
+        returns their upload resources. Raises TimeoutError after timeout seconds.
+        """
+        return wait_all(jobs, timeout=timeout, backoff=backoff)
+
+    def _post_upload(
+        self,
+        file_name: str,
+        upload,
+        import_page: str,
+        autocreate_user_fields: bool = False,
+        progress: Callable[[str, int, int], None] = None,
+    ) -> str:
+        """
+        Posts the CSV file object upload and returns the URL of the upload resource
+        """
+        # Only uploads need requests_toolbelt, which is slow to import
+        from requests_toolbelt import MultipartEncoderMonitor
+
+        def callback(monitor):
+            if progress is not None:
+                progress(file_name, monitor.bytes_read, monitor.len)
+
         m = MultipartEncoderMonitor.from_fields(
             fields={
                 'page': import_page,
-                'upload': (file_name, open(file_name, 'rb'), 'text/csv'),
-                'autocreate_user_fields': 'false',
+                'upload': (file_name, upload, 'text/csv'),
+                'autocreate_user_fields': 'true' if autocreate_user_fields else 'false',
             },
-            callback=progressing,
+            callback=callback,
         )
+        return self.post(data=m, headers={'Content-Type': m.content_type})
+
+    def upload(
+        self,
+        file_name,
+        import_page,
+        progress: Callable[[str, int, int], None] = None,
+        wait: bool = True,
+        timeout: float = None,
+    ) -> UploadJob:
+        """
+        Uploads the CSV file file_name to the import page import_page, and returns the UploadJob
+        following its processing by ActionKit. Unless wait is False, the job is only returned
+        once ActionKit is done with the upload, or after timeout seconds with TimeoutError.
+
+        progress is called with the file name, the number of bytes sent so far and the size of
+        the request as the file is sent.
+        """
+        with open(file_name, 'rb') as f:
+            upload_url = self._post_upload(
+                os.path.basename(file_name), f, import_page, progress=progress
+            )
+
+        job = self.job(upload_url)
+        if wait:
+            job.wait(timeout)
+        return job
+
+    def upload_users(
+        self,
+        users: Iterable[dict],
+        import_page: str,
+        columns: Sequence[str] = None,
+        chunk_size: int = 50000,
+        concurrency: int = 4,
+        autocreate_user_fields: bool = False,
+        progress: Callable[[str, int, int], None] = None,
+    ) -> List[UploadJob]:
+        """
+        Imports users, dicts of user fields, into ActionKit with as few uploads as possible
+        rather than one request per user. Returns an UploadJob for each upload, which ActionKit
+        processes in the background: see wait_all to wait for them.
+
+        The users are written as CSV in memory, chunk_size users at a time, and each chunk is
+        sent as a separate upload, up to `concurrency` at once. users can be a generator: only
+        the chunks being sent are held in memory.
+
+        Each chunk has the given columns, or else every key of its users, one of which must be
+        email, user_id or akid. progress is called as in upload, with chunk file names.
 
-        upload_url = self.post(data=m, headers={'Content-Type': m.content_type})
+        If a chunk cannot be sent, no more chunks are, the uploads in progress are completed and
+        UploadUsersError is raised with the jobs of all the uploaded chunks.
+        """
+        def post(file_name, upload):
+            return self._post_upload(
+                file_name, upload, import_page, autocreate_user_fields, progress
+            )
 
-        upload = self.poll(upload_url)
-        while not upload['is_completed']:
-            upload = self.poll(upload_url)
-            time.sleep(1)
+        jobs = {}
+        chunks = enumerate(users_csv_chunks(users, columns, chunk_size))
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            pending = deque(
+                (index, executor.submit(post, *chunk))
+                for index, chunk in islice(chunks, concurrency)
+            )
+            try:
+                while pending:
+                    index, future = pending.popleft()
+                    try:
+                        jobs[index] = self.job(future.result())
+                    except Exception as e:
+                        # Uploads already started are completed, and kept track of
+                        for other_index, other in pending:
+                            if not other.cancel() and other.exception() is None:
+                                jobs[other_index] = self.job(other.result())
+                        pending.clear()
+                        raise UploadUsersError(jobs, index) from e
+                    for index, chunk in islice(chunks, 1):
+                        pending.append((index, executor.submit(post, *chunk)))
+            finally:
+                for _, future in pending:
+                    future.cancel()
+        return list(jobs.values())
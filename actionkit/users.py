@@ -1,19 +1,170 @@
 import re
+from typing import Dict, Iterable, List, Sequence
+
+from requests import HTTPError
 
 from .httpmethods import HttpMethods
-from .utils import verify_hashed_value
+from .models import UserRecord
+from .utils import HashVerifier
+
+# The user fields returned by get_by_akid and resolve_akids when limited
+LIMITED_FIELDS = ("first_name", "last_name", "email")
+# The user fields returned by get_by_emails by default, and kept in the email_index
+EMAIL_FIELDS = ("id", "email", "first_name", "last_name")
+column_regex = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+
+def normalise_email(email: str) -> str:
+    """
+    The form of email addresses they are matched by, as ActionKit ignores their case
+    """
+    return email.strip().lower()
+
+
+def user_columns(fields: Sequence[str]) -> tuple:
+    """
+    Validates the core_user columns interpolated in SQL lookups
+    """
+    fields = tuple(fields)
+    for field in fields:
+        if not column_regex.match(field):
+            raise ValueError(f"Invalid user field {field}")
+    return fields
 
 
 class Users(HttpMethods):
     resource_name = "user"
+    model = UserRecord
+    # Seconds the users fetched by resolve_akids are cached, by this client and by ActionKit
+    akid_cache_ttl = 60
+    # Maximum number of users cached by resolve_akids
+    akid_cache_size = 10000
+    # Optional index of users by normalised email, a bounded MemoryCache or an SQLiteCache. It
+    # is filled by get_by_emails and get_by_email, and looked up by both before ActionKit.
+    email_index = None
+
+    @property
+    def sql(self):
+        """
+        An SQL resource sharing the connection, created on first use
+        """
+        if self.__dict__.get("_sql") is None:
+            from .sql import SQL
+
+            self._sql = SQL(self.connection)
+        return self._sql
+
+    @property
+    def akid_cache(self):
+        """
+        The MemoryCache of the users fetched by resolve_akids, created on first use
+        """
+        if self.__dict__.get("_akid_cache") is None:
+            from .cache import MemoryCache
+
+            self._akid_cache = MemoryCache(maxsize=self.akid_cache_size, ttl=self.akid_cache_ttl)
+        return self._akid_cache
+
+    def hash_verifier(self, actionkit_secret_key: str = None) -> HashVerifier:
+        """
+        The HashVerifier of akids for actionkit_secret_key, or the ACTIONKIT_SECRET_KEY
+        environment variable, kept for the following calls
+        """
+        verifiers = self.__dict__.setdefault("_hash_verifiers", {})
+        if actionkit_secret_key not in verifiers:
+            verifiers[actionkit_secret_key] = HashVerifier(actionkit_secret_key)
+        return verifiers[actionkit_secret_key]
 
     def get_by_email(self, email):
+        """
+        Returns the user with the given email, or None.
+
+        Users in the email_index are fetched by id, a primary key lookup for ActionKit rather than
+        a search of core_user by email. Entries of users deleted or whose email changed since
+        they were indexed are evicted, and the email searched.
+        """
+        address = normalise_email(email)
+        if self.email_index is not None:
+            indexed = self.email_index.get(address)
+            if indexed is not None:
+                try:
+                    user = self.get(self.uri(indexed["id"]))
+                except HTTPError as e:
+                    if e.response.status_code != 404:
+                        raise
+                else:
+                    if normalise_email(user.get("email") or "") == address:
+                        return user
+                self.email_index.delete(address)
+
         users = self.search(email=email)
         if len(users) == 0:
             return None
         else:
+            if self.email_index is not None:
+                self.email_index.set(address, {k: users[0].get(k) for k in EMAIL_FIELDS})
             return users[0]
 
+    def get_by_emails(
+        self, emails: Iterable[str], fields: Sequence[str] = EMAIL_FIELDS, concurrency: int = 4
+    ) -> Dict[str, dict]:
+        """
+        Looks up many email addresses at once, e.g. to match a partner CSV file against
+        ActionKit. Returns a dict of the given core_user fields of the user of each email, or
+        None if there is none. Emails are matched regardless of case and surrounding spaces.
+
+        Users are fetched with one SQL query per SQL.batch_size emails, up to `concurrency` at
+        once, except those found in the email_index, to which the fetched users are added.
+        """
+        fields = user_columns(fields)
+        addresses = {email: normalise_email(email) for email in emails}
+        users = {}
+        missing = []
+        for address in dict.fromkeys(addresses.values()):
+            user = self._indexed_user(address, fields)
+            if user is not None:
+                users[address] = user
+            else:
+                missing.append(address)
+
+        if missing:
+            from .sql import chunks, placeholders
+
+            columns = user_columns(dict.fromkeys(("id", "email") + fields))
+            queries = []
+            for batch in chunks(missing, self.sql.batch_size):
+                query = f"""
+                    SELECT {', '.join(columns)}
+                    FROM core_user
+                    WHERE email IN ({placeholders('e', len(batch))})
+                    ORDER BY id
+                """
+                queries.append((query, {f"e{i}": address for i, address in enumerate(batch)}))
+
+            for rows in self.sql._run_queries(queries, concurrency):
+                for row in rows:
+                    user = dict(zip(columns, row))
+                    address = normalise_email(user["email"])
+                    if address in users:
+                        self.logger.warning(f"More than 1 user found for email {address}")
+                        continue
+                    users[address] = {field: user[field] for field in fields}
+                    if self.email_index is not None:
+                        self.email_index.set(address, user)
+
+        return {email: users.get(address) for email, address in addresses.items()}
+
+    def _indexed_user(self, address: str, fields: tuple) -> dict:
+        """
+        The given fields of the user indexed for address, if the email_index holds them all
+        """
+        if self.email_index is None:
+            return None
+        user = self.email_index.get(address)
+        if user is None or any(field not in user for field in fields):
+            return None
+        return {field: user[field] for field in fields}
+
     def create(self, user):
         return self.post(user)
 
@@ -30,21 +181,99 @@ class Users(HttpMethods):
         else:
             raise Exception(f"{uri} is not a user URI")
 
+    @staticmethod
+    def _akid_user_id(verifier: HashVerifier, akid: str) -> int:
+        """
+        The id of the user of akid, raising an Exception if its hash is wrong
+        """
+        return int(verifier.verify(akid).split(".")[1])
+
     def get_by_akid(self, akid, limited=True, actionkit_secret_key: str = None):
         """
         Returns user info for a given akid.
-        If limited is False, all of the user's data is returned
+        If limited is False, all of the user's data is returned, otherwise only the
+        LIMITED_FIELDS, fetched and cached like resolve_akids does.
         """
 
         try:
 
-            verify_hashed_value(akid, actionkit_secret_key)
-            chunks = akid.split(".")
-            if chunks:
-                user = self.get(self.uri(chunks[1]))
-                if limited:
-                    return {k: user[k] for k in ['first_name', 'last_name', 'email']}
+            user_id = self._akid_user_id(self.hash_verifier(actionkit_secret_key), akid)
+            if limited:
+                user = self._fetch_users([user_id], LIMITED_FIELDS).get(user_id)
+                if user is None:
+                    raise Exception(f"User {user_id} not found")
                 return user
+            return self.get(self.uri(user_id))
 
         except Exception as e:
             raise ValueError(f"Invalid akid: {akid}: {e}")
+
+    def resolve_akids(
+        self,
+        akids: Iterable[str],
+        fields: Sequence[str] = LIMITED_FIELDS,
+        actionkit_secret_key: str = None,
+        concurrency: int = 4,
+    ) -> Dict[str, dict]:
+        """
+        Resolves many akids at once, e.g. for the visitors of mailing landing pages. Returns a
+        dict of the given fields of the user of each akid, or None if the akid is invalid or
+        its user doesn't exist.
+
+        The akids are verified locally, and the users not cached yet are fetched with one SQL
+        query per SQL.batch_size users, up to `concurrency` at once. They are then cached for
+        akid_cache_ttl seconds.
+        """
+        verifier = self.hash_verifier(actionkit_secret_key)
+        user_ids = {}
+        for akid in akids:
+            try:
+                user_ids[akid] = self._akid_user_id(verifier, akid)
+            except Exception as e:
+                self.logger.debug(f"Invalid akid: {akid}: {e}")
+                user_ids[akid] = None
+
+        users = self._fetch_users(
+            [user_id for user_id in user_ids.values() if user_id is not None],
+            fields,
+            concurrency,
+        )
+        return {akid: users.get(user_id) for akid, user_id in user_ids.items()}
+
+    def _fetch_users(
+        self, user_ids: List[int], fields: Sequence[str], concurrency: int = 4
+    ) -> Dict[int, dict]:
+        """
+        The given fields of the existing users among user_ids, by id, from the akid_cache or
+        else from core_user
+        """
+        fields = user_columns(fields)
+        users = {}
+        missing = []
+        for user_id in dict.fromkeys(user_ids):
+            user = self.akid_cache.get((user_id, fields))
+            if user is not None:
+                users[user_id] = dict(user)
+            else:
+                missing.append(user_id)
+        if not missing:
+            return users
+
+        from .sql import chunks, placeholders
+
+        queries = []
+        for batch in chunks(missing, self.sql.batch_size):
+            query = f"""
+                SELECT id, {', '.join(fields)}
+                FROM core_user
+                WHERE id IN ({placeholders('u', len(batch))})
+            """
+            values = {f"u{i}": user_id for i, user_id in enumerate(batch)}
+            queries.append((query, dict(values, cache_duration=self.akid_cache_ttl)))
+
+        for rows in self.sql._run_queries(queries, concurrency):
+            for row in rows:
+                user = dict(zip(fields, row[1:]))
+                users[row[0]] = user
+                self.akid_cache.set((row[0], fields), dict(user))
+        return users
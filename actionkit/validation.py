@@ -17,6 +17,7 @@ class ValidationError(Exception):
     def __init__(self, response_text):
         """
          Wraps a response from the server in a custom exception.
+         response_text is the JSON text of the response, or the already decoded errors.
          Example response_text:
         {
          "signuppage": {
@@ -24,7 +25,10 @@ class ValidationError(Exception):
              }
          }
         """
-        response = json.loads(response_text)
+        if isinstance(response_text, (str, bytes)):
+            response = json.loads(response_text)
+        else:
+            response = response_text
         self.error_dict = response
 
         self.errors = list(response.values())
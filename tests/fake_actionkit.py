@@ -0,0 +1,364 @@
+"""
+A local stand-in for the ActionKit REST API, to exercise and benchmark the client without a live
+instance:
+
+    with FakeActionKit(latency=0.01, error_rate=0.05) as server:
+        ak = server.connect()
+        ak.Users.search(email="someone@example.com")
+
+It stores resources in memory and mimics the Tastypie conventions ActionKit follows: paginated
+lists with meta/objects, Location headers on creation, donationpush creating a donationaction
+with its order and transaction, ad-hoc and saved reports, and uploads. Requests can be slowed
+down by a fixed latency, and randomly answered with a 500 or a 429 with Retry-After.
+
+Tests of how the client handles specific responses, which need no stored resources, use a
+FakeAdapter instead: it is mounted on the session of a connection and answers its requests
+without a server.
+"""
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+
+import actionkit
+
+API_ROOT = "/rest/v1/"
+path_regex = re.compile(r"^/rest/v1/(?P<resource>[a-z_]+)(?:/(?P<id>\d+))?/?$")
+report_regex = re.compile(r"^/rest/v1/report/run/(?P<name>[\w-]+)/?$")
+
+
+class FakeActionKit:
+    """
+    :param latency: Seconds every request takes.
+    :param error_rate: Share of the requests answered with a 500 Internal Server Error.
+    :param throttle_rate: Share of the requests answered with a 429 Too Many Requests.
+    :param upload_polls: Number of times uploads are polled before they are completed.
+    :param reports: Rows returned by saved reports, by report name, or a function of the posted
+        values returning them. Ad-hoc queries return the rows in reports["sql"].
+    """
+
+    def __init__(
+        self,
+        latency: float = 0,
+        error_rate: float = 0,
+        throttle_rate: float = 0,
+        reports: dict = None,
+        upload_polls: int = 0,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.upload_polls = upload_polls
+        self.reports = {"sql": [[1]]}
+        self.reports.update(reports or {})
+        self.resources = {}
+        self.requests = []
+        # The bodies of the upload requests received
+        self.uploads = []
+        self._ids = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self) -> "FakeActionKit":
+        handler = type("Handler", (FakeActionKitHandler,), {"fake": self})
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs=dict(poll_interval=0.05), daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    @property
+    def hostname(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"{host}:{port}"
+
+    def connect(self, cls=actionkit.ActionKit, **kwargs):
+        """
+        An ActionKit client (or AsyncActionKit with cls) connected to this server
+        """
+        kwargs.setdefault("retry_policy", actionkit.RetryPolicy(initial_backoff=0.01))
+        ak = cls(self.hostname, "user", "password", **kwargs)
+        ak.connection.scheme = "http"
+        return ak
+
+    def create(self, resource: str, **fields) -> dict:
+        """
+        Store a new object of resource and return it
+        """
+        with self._lock:
+            self._ids[resource] = self._ids.get(resource, 0) + 1
+            obj_id = self._ids[resource]
+            obj = dict(fields, id=obj_id, resource_uri=f"{API_ROOT}{resource}/{obj_id}/")
+            self.resources.setdefault(resource, {})[obj_id] = obj
+        return obj
+
+    def populate(self, resource: str, count: int, **fields) -> None:
+        for _ in range(count):
+            self.create(resource, **fields)
+
+    def fault(self):
+        """
+        The injected error status for the next request, if any
+        """
+        with self._lock:
+            draw = self._random.random()
+        if draw < self.error_rate:
+            return 500
+        if draw < self.error_rate + self.throttle_rate:
+            return 429
+        return None
+
+    def push_donation(self, payload: dict) -> dict:
+        user = self.create("user", **payload.get("user", {}))
+        order_fields = {
+            k: v for k, v in payload.get("order", {}).items() if not k.startswith(("card", "exp"))
+        }
+        order = self.create("order", user=user["resource_uri"], status="completed", **order_fields)
+        transaction = self.create(
+            "transaction", order=order["resource_uri"], status="completed", amount=order.get("amount")
+        )
+        orderrecurrings = []
+        if order.get("recurring_id"):
+            orderrecurrings.append(
+                self.create("orderrecurring", order=order["resource_uri"])["resource_uri"]
+            )
+        order.update(transactions=[transaction["resource_uri"]], orderrecurrings=orderrecurrings)
+        action = self.create(
+            "donationaction",
+            user=user["resource_uri"],
+            page=payload.get("donationpage", {}).get("name"),
+            status="complete",
+            fields=payload.get("action", {}).get("fields", {}),
+        )
+        action["order"] = order
+        return action
+
+    def poll_upload(self, upload: dict) -> None:
+        """
+        Advances the processing of an upload by one poll
+        """
+        upload["polls"] += 1
+        upload["progress"] = upload["polls"]
+        if upload["polls"] >= self.upload_polls:
+            upload.update(is_completed=True, status="complete")
+
+    def run_report(self, name: str, values: dict):
+        rows = self.reports.get(name)
+        if rows is None:
+            return None
+        return rows(values) if callable(rows) else rows
+
+
+class FakeActionKitHandler(BaseHTTPRequestHandler):
+    fake = None
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, which Nagle's algorithm would delay
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _respond(self, status: int, body=None, headers: dict = None) -> None:
+        content = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if body is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def _json(self) -> dict:
+        body = self._body()
+        return json.loads(body) if body else {}
+
+    def _handle(self, method: str) -> None:
+        fake = self.fake
+        url = urlsplit(self.path)
+        fake.requests.append((method, url.path))
+        if fake.latency:
+            time.sleep(fake.latency)
+
+        status = fake.fault()
+        if status is not None:
+            self._body()
+            self._respond(status, headers={"Retry-After": "0"} if status == 429 else None)
+            return
+
+        report = report_regex.match(url.path)
+        if report:
+            rows = fake.run_report(report.group("name"), self._json())
+            if rows is None:
+                self._respond(404)
+            else:
+                self._respond(200, rows)
+            return
+
+        match = path_regex.match(url.path)
+        if not match:
+            self._respond(404)
+            return
+        resource, obj_id = match.group("resource"), match.group("id")
+        getattr(self, f"_{method}")(resource, int(obj_id) if obj_id else None, url)
+
+    def _get(self, resource, obj_id, url) -> None:
+        stored = self.fake.resources.get(resource, {})
+        if obj_id is not None:
+            if obj_id in stored:
+                if resource == "upload":
+                    self.fake.poll_upload(stored[obj_id])
+                self._respond(200, stored[obj_id])
+            else:
+                self._respond(404)
+            return
+
+        params = dict(parse_qsl(url.query))
+        limit = int(params.pop("_limit", 20))
+        offset = int(params.pop("_offset", 0))
+        params.pop("order_by", None)
+        objects = [
+            obj
+            for obj in list(stored.values())
+            if all(str(obj.get(k)) == v for k, v in params.items())
+        ]
+        next_page = None
+        if offset + limit < len(objects):
+            query = urlencode(dict(params, _limit=limit, _offset=offset + limit))
+            next_page = f"{API_ROOT}{resource}/?{query}"
+        self._respond(
+            200,
+            dict(
+                meta=dict(
+                    limit=limit,
+                    offset=offset,
+                    total_count=len(objects),
+                    next=next_page,
+                    previous=None,
+                ),
+                objects=objects[offset:offset + limit],
+            ),
+        )
+
+    def _post(self, resource, obj_id, url) -> None:
+        if resource == "upload":
+            self.fake.uploads.append(self._body())
+            obj = self.fake.create(
+                "upload", is_completed=False, status="loading", progress=0, polls=-1
+            )
+            self.fake.poll_upload(obj)
+            self._respond(201, headers={"Location": obj["resource_uri"]})
+            return
+        if resource == "donationpush":
+            obj = self.fake.push_donation(self._json())
+            self._respond(201, obj, headers={"Location": obj["resource_uri"]})
+            return
+        obj = self.fake.create(resource, **self._json())
+        self._respond(201, headers={"Location": obj["resource_uri"]})
+
+    def _patch(self, resource, obj_id, url) -> None:
+        obj = self.fake.resources.get(resource, {}).get(obj_id)
+        payload = self._json()
+        if obj is None:
+            self._respond(404)
+            return
+        obj.update(payload)
+        self._respond(202)
+
+    _put = _patch
+
+    def _delete(self, resource, obj_id, url) -> None:
+        self._body()
+        if self.fake.resources.get(resource, {}).pop(obj_id, None) is None:
+            self._respond(404)
+        else:
+            self._respond(204)
+
+    def do_GET(self):
+        self._handle("get")
+
+    def do_HEAD(self):
+        self.fake.requests.append(("head", urlsplit(self.path).path))
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        self._handle("post")
+
+    def do_PATCH(self):
+        self._handle("patch")
+
+    def do_PUT(self):
+        self._handle("put")
+
+    def do_DELETE(self):
+        self._handle("delete")
+
+
+class FakeAdapter(BaseAdapter):
+    """
+    Transport adapter recording the requests sent through it, and answering each with the
+    outcome of respond(request): a status code, a (status, body) or (status, body, headers)
+    tuple, or an exception raised to simulate a network error. Bodies are sent as JSON, unless
+    they are bytes or None. By default every request is answered with an empty JSON object.
+
+        adapter = FakeAdapter(lambda request: (404, {}))
+        ak.connection.session.mount("https://", adapter)
+    """
+
+    def __init__(self, respond=None):
+        super().__init__()
+        self.respond = respond or (lambda request: (200, {}))
+        self.lock = threading.Lock()
+        self.requests = []
+        self.closed = False
+
+    def send(self, request, **kwargs):
+        with self.lock:
+            self.requests.append(request)
+        outcome = self.respond(request)
+        if not isinstance(outcome, tuple):
+            outcome = (outcome,)
+        status, body, headers = outcome + (None,) * (3 - len(outcome))
+
+        response = requests.Response()
+        response.status_code = status
+        response.headers.update(headers or {})
+        if body is None or isinstance(body, bytes):
+            response._content = body or b""
+        else:
+            response.headers["content-type"] = "application/json"
+            response._content = json.dumps(body).encode()
+        response.request = request
+        response.url = request.url
+        return response
+
+    def close(self):
+        self.closed = True
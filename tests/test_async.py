@@ -0,0 +1,91 @@
+import asyncio
+import json
+import unittest
+
+import pytest
+
+import actionkit
+from actionkit import ValidationError
+
+httpx = pytest.importorskip("httpx")
+
+
+class AsyncClientTest(unittest.TestCase):
+    def setUp(self):
+        self.requests = []
+        self.responses = {}
+        self.ak = actionkit.AsyncActionKit("example.com", "user", "password")
+        self.ak.connection.initial_backoff = 0
+        self.ak.connection._client = httpx.AsyncClient(
+            transport=httpx.MockTransport(self.handle)
+        )
+
+    def handle(self, request):
+        self.requests.append(request)
+        key = (request.method, request.url.path)
+        status, body = self.responses[key].pop(0)
+        return httpx.Response(status, json=body)
+
+    def run_async(self, coroutine):
+        async def run():
+            try:
+                return await coroutine
+            finally:
+                await self.ak.aclose()
+
+        return asyncio.run(run())
+
+    def test_get_retries_server_errors(self):
+        self.responses[("GET", "/rest/v1/user/1/")] = [(500, {}), (200, {"id": 1})]
+        self.assertEqual(self.run_async(self.ak.Users.get("user/1/")), {"id": 1})
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(
+            self.requests[0].headers["authorization"],
+            httpx.BasicAuth("user", "password")._auth_header,
+        )
+
+    def test_slow_responses_are_not_cut_off(self):
+        self.ak.connection._client = None
+        self.assertEqual(self.ak.connection.client.timeout, httpx.Timeout(None))
+        self.run_async(asyncio.sleep(0))
+
+    def test_validation_error(self):
+        self.responses[("POST", "/rest/v1/user")] = [(400, {"email": ["Invalid"]})]
+        with self.assertRaises(ValidationError) as cm:
+            self.run_async(self.ak.Users.post({"email": "nope"}))
+        self.assertEqual(cm.exception["email"], ["Invalid"])
+
+    def test_search_follows_pages(self):
+        self.responses[("GET", "/rest/v1/language")] = [
+            (200, {"meta": {"next": "/rest/v1/language?_offset=1"}, "objects": [1]}),
+            (200, {"meta": {"next": None}, "objects": [2]}),
+        ]
+        self.assertEqual(self.run_async(self.ak.Languages.search()), [1, 2])
+
+    def test_set_push_status(self):
+        donationaction = {
+            "resource_uri": "/rest/v1/donationaction/1/",
+            "status": "incomplete",
+            "fields": {},
+            "order": {
+                "resource_uri": "/rest/v1/order/2/",
+                "transactions": ["/rest/v1/transaction/3/"],
+                "orderrecurrings": [],
+            },
+        }
+        for path in ["donationaction/1/", "order/2/", "transaction/3/"]:
+            self.responses[("PATCH", f"/rest/v1/{path}")] = [(202, {})]
+
+        resource_uri = self.run_async(
+            self.ak.DonationAction.set_push_status_completed(donationaction, trans_id="ch_1")
+        )
+
+        self.assertEqual(resource_uri, "/rest/v1/donationaction/1/")
+        self.assertEqual(
+            [json.loads(r.content) for r in self.requests],
+            [
+                {"status": "completed"},
+                {"status": "completed"},
+                {"status": "completed", "trans_id": "ch_1"},
+            ],
+        )
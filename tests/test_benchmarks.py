@@ -0,0 +1,143 @@
+"""
+Client throughput benchmarks against the local FakeActionKit server, run with pytest-benchmark:
+
+    pytest tests/test_benchmarks.py --benchmark-only --benchmark-group-by=group
+
+Each benchmark runs a few rounds, so that the suite stays fast enough for the regular test run.
+Use --benchmark-disable to only check that they work.
+"""
+import asyncio
+import subprocess
+import sys
+from decimal import Decimal
+
+import pytest
+
+import actionkit
+from fake_actionkit import FakeActionKit
+
+pytest.importorskip("pytest_benchmark")
+
+USERS = 500
+ROUNDS = 3
+
+
+@pytest.fixture(scope="module")
+def server():
+    with FakeActionKit(latency=0.002) as server:
+        server.populate("user", USERS, country="FR")
+        yield server
+
+
+@pytest.fixture
+def ak(server):
+    with server.connect() as ak:
+        yield ak
+
+
+def run(benchmark, fn, *args, **kwargs):
+    return benchmark.pedantic(fn, args=args, kwargs=kwargs, rounds=ROUNDS, warmup_rounds=1)
+
+
+def python(code):
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+@pytest.mark.benchmark(group="startup")
+def test_import_requests(benchmark):
+    # The baseline of test_import_actionkit, which can't get much below it
+    run(benchmark, python, "import requests")
+
+
+@pytest.mark.benchmark(group="startup")
+def test_import_actionkit(benchmark):
+    run(benchmark, python, "import actionkit")
+
+
+@pytest.mark.benchmark(group="startup")
+def test_first_request(benchmark, server):
+    def first_request():
+        with server.connect() as ak:
+            ak.Users.get("user/1/")
+
+    run(benchmark, first_request)
+
+
+@pytest.mark.benchmark(group="search")
+def test_search(benchmark, ak):
+    assert len(run(benchmark, ak.Users.search, country="FR", _limit=100)) == USERS
+
+
+@pytest.mark.benchmark(group="search")
+def test_search_parallel(benchmark, ak):
+    users = run(benchmark, ak.Users.search_parallel, country="FR", page_size=100, concurrency=5)
+    assert len(users) == USERS
+
+
+@pytest.mark.benchmark(group="search")
+def test_search_parallel_typed(benchmark, ak):
+    users = run(
+        benchmark, ak.Users.search_parallel, country="FR", page_size=100, concurrency=5, typed=True
+    )
+    assert len(users) == USERS
+
+
+@pytest.mark.benchmark(group="search")
+def test_search_async(benchmark, server):
+    async def search():
+        async with server.connect(actionkit.AsyncActionKit) as ak:
+            return await ak.Users.search_parallel(country="FR", page_size=100, concurrency=5)
+
+    assert len(run(benchmark, lambda: asyncio.run(search()))) == USERS
+
+
+def push_donations(ak, count=10):
+    for i in range(count):
+        ak.DonationAction.push_and_set_incomplete(
+            f"donor{i}@example.com", "Some", "One", "FR", "75001", Decimal("5"), "EUR",
+            "donate", "Stripe",
+        )
+
+
+@pytest.mark.benchmark(group="donations")
+def test_push_and_set_incomplete(benchmark, ak):
+    run(benchmark, push_donations, ak)
+
+
+@pytest.mark.benchmark(group="donations")
+def test_push_and_set_incomplete_concurrent_status(benchmark, ak):
+    ak.DonationAction.concurrent_status_updates = True
+    run(benchmark, push_donations, ak)
+
+
+@pytest.mark.benchmark(group="donations")
+def test_push_batch(benchmark, ak):
+    records = [
+        dict(
+            email=f"donor{i}@example.com", amount=Decimal("5"), currency="EUR", page="donate",
+            payment_account="Stripe", trans_id=f"batch-{i}", status="incomplete",
+        )
+        for i in range(10)
+    ]
+    results = run(benchmark, lambda: list(ak.DonationAction.push_batch(records, concurrency=5)))
+    assert all(result.ok for result in results)
+
+
+@pytest.mark.benchmark(group="sql")
+def test_run_query(benchmark, ak, server):
+    server.reports["sql"] = [[i, f"user{i}@example.com"] for i in range(1000)]
+    assert len(run(benchmark, ak.SQL.run_query, "select id, email from core_user")) == 1000
+
+
+@pytest.mark.benchmark(group="uploads")
+def test_upload(benchmark, ak, tmp_path):
+    file_name = tmp_path / "users.csv"
+    file_name.write_text("email,country\n" + "".join(f"user{i}@example.com,FR\n" for i in range(1000)))
+    run(benchmark, ak.Uploads.upload, str(file_name), "import_page")
+
+
+@pytest.mark.benchmark(group="uploads")
+def test_upload_users(benchmark, ak):
+    users = [{"email": f"user{i}@example.com", "country": "FR"} for i in range(20000)]
+    jobs = run(benchmark, ak.Uploads.upload_users, users, "import_page", chunk_size=5000)
+    assert len(jobs) == 4
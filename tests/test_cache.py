@@ -0,0 +1,166 @@
+import os
+import tempfile
+import time
+import unittest
+
+import actionkit
+from actionkit import MemoryCache, QueryCache, ResponseCache, SQLiteCache
+
+from fake_actionkit import FakeActionKit, FakeAdapter
+
+
+def etag_respond(request):
+    """
+    Serves languages with an ETag, answering 304 to matching requests
+    """
+    headers = {"ETag": '"v1"'}
+    if request.headers.get("If-None-Match") == '"v1"':
+        return 304, None, headers
+    return 200, {"meta": {"next": None}, "objects": [{"name": "English"}]}, headers
+
+
+class MemoryCacheTest(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = MemoryCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+
+    def test_ttl(self):
+        cache = MemoryCache(ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=0)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.stats(), {"hits": 1, "misses": 1, "size": 1})
+
+
+class SQLiteCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.file_name = os.path.join(tempfile.mkdtemp(), "cache.sqlite")
+
+    def test_values_persist(self):
+        cache = SQLiteCache(self.file_name)
+        cache.set("a", {"objects": [1, 2]})
+        cache.close()
+        self.assertEqual(SQLiteCache(self.file_name).get("a"), {"objects": [1, 2]})
+
+    def test_delete_prefix(self):
+        cache = SQLiteCache(self.file_name)
+        for key in ("list/1", "list/2", "language/1"):
+            cache.set(key, 1)
+        cache.delete_prefix("list/")
+        self.assertEqual(len(cache), 1)
+        self.assertIn("language/1", cache)
+
+    def test_lru_eviction_and_ttl(self):
+        cache = SQLiteCache(self.file_name, maxsize=2)
+        cache.set("a", 1)
+        time.sleep(0.01)
+        cache.set("b", 2)
+        time.sleep(0.01)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        cache.set("d", 4, ttl=0)
+        self.assertIsNone(cache.get("d"))
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.ak = actionkit.ActionKit("example.com", "user", "password")
+        self.adapter = FakeAdapter(etag_respond)
+        self.ak.connection.session.mount("https://", self.adapter)
+
+    def test_fresh_responses_are_reused(self):
+        self.ak.Languages.response_cache = ResponseCache(ttl=60)
+        self.ak.Languages.search()
+        languages = self.ak.Languages.search()
+        self.assertEqual(languages, [{"name": "English"}])
+        self.assertEqual(len(self.adapter.requests), 1)
+        self.assertEqual(self.ak.Languages.response_cache.stats()["hits"], 1)
+
+    def test_stale_responses_are_revalidated(self):
+        self.ak.Languages.response_cache = ResponseCache(ttl=0)
+        self.ak.Languages.search()
+        self.assertEqual(self.ak.Languages.search(), [{"name": "English"}])
+        self.assertEqual(len(self.adapter.requests), 2)
+        self.assertEqual(self.adapter.requests[1].headers["If-None-Match"], '"v1"')
+        self.assertEqual(self.adapter.requests[1].headers["Accept"], "application/json")
+        self.assertEqual(self.ak.Languages.response_cache.revalidations, 1)
+
+    def test_writes_invalidate_the_resource(self):
+        response_cache = ResponseCache(ttl=60)
+        self.ak.Lists.response_cache = self.ak.Languages.response_cache = response_cache
+        self.ak.Lists.get(name="members")
+        self.ak.Lists.get("list/1/")
+        self.ak.Languages.search()
+        self.ak.Lists.patch("list/1/", {"name": "members"})
+        self.assertEqual(len(response_cache.backend), 1)
+        self.ak.Languages.search()
+        self.assertEqual(response_cache.stats()["hits"], 1)
+
+    def test_responses_are_cached_by_user(self):
+        response_cache = ResponseCache(ttl=60)
+        other = actionkit.ActionKit("example.com", "other", "password")
+        self.addCleanup(other.close)
+        other.connection.session.mount("https://", self.adapter)
+        for ak in (self.ak, other, self.ak):
+            ak.Languages.response_cache = response_cache
+            ak.Languages.search()
+        self.assertEqual(len(self.adapter.requests), 2)
+        self.assertEqual(response_cache.stats()["hits"], 1)
+
+
+class QueryCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeActionKit().start()
+        self.addCleanup(self.server.stop)
+        self.ak = self.server.connect()
+        self.addCleanup(self.ak.close)
+        self.ak.SQL.query_cache = QueryCache()
+
+    def test_identical_queries_are_cached(self):
+        self.assertEqual(self.ak.SQL.run_query("SELECT  1\n FROM core_user", id=1), [[1]])
+        rows = self.ak.SQL.run_query("SELECT 1 FROM core_user", id=1)
+        rows.append("mutated")
+        self.assertEqual(self.ak.SQL.run_query("SELECT 1 FROM core_user", id=1), [[1]])
+        self.ak.SQL.run_query("SELECT 1 FROM core_user", id=2)
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_refresh_and_cache_duration(self):
+        self.ak.SQL.run_query("SELECT 1", cache_duration=0.05)
+        self.ak.SQL.run_query("SELECT 1", refresh=True)
+        self.assertEqual(len(self.server.requests), 2)
+        self.ak.SQL.run_query("SELECT 1")
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(self.ak.SQL.query_cache.stats(), {"hits": 1, "misses": 1, "refreshes": 1})
+
+        self.ak.SQL.run_query("SELECT 2", cache_duration=0.01)
+        time.sleep(0.02)
+        self.ak.SQL.run_query("SELECT 2")
+        self.assertEqual(len(self.server.requests), 4)
+
+    def test_shared_cache_is_scoped_to_the_connection(self):
+        query_cache = self.ak.SQL.query_cache
+        self.ak.SQL.run_query("SELECT 1")
+        other_server = FakeActionKit().start()
+        self.addCleanup(other_server.stop)
+        with other_server.connect() as other:
+            other.SQL.query_cache = query_cache
+            other.SQL.run_query("SELECT 1")
+        self.assertEqual(len(other_server.requests), 1)
+        self.assertNotEqual(
+            QueryCache.key("SELECT 1", {}, "example.com", "reader"),
+            QueryCache.key("SELECT 1", {}, "example.com", "admin"),
+        )
+
+    def test_normalise_keeps_literals(self):
+        self.assertEqual(
+            QueryCache.normalise(" SELECT *\n  FROM t WHERE a = 'x  y' "),
+            "SELECT * FROM t WHERE a = 'x  y'",
+        )
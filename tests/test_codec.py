@@ -0,0 +1,81 @@
+import json
+import sys
+import unittest
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest import mock
+
+import requests
+
+import actionkit
+from actionkit.codec import JSONCodec, OrjsonCodec, default_codec
+
+from fake_actionkit import FakeAdapter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+PAYLOAD = {
+    "amount": Decimal("10.10"),
+    "created_at": datetime(2024, 1, 31, 12, 0, 0, 123456, tzinfo=timezone.utc),
+    "fields": {"name": "café"},
+}
+
+
+class CodecTest(unittest.TestCase):
+    def test_json_codec(self):
+        codec = JSONCodec()
+        self.assertEqual(
+            json.loads(codec.dumps(PAYLOAD)),
+            {
+                "amount": "10.10",
+                "created_at": "2024-01-31T12:00:00.123456+00:00",
+                "fields": {"name": "café"},
+            },
+        )
+        self.assertEqual(codec.loads(b'{"id": 1}'), {"id": 1})
+        with self.assertRaises(TypeError):
+            codec.dumps({"value": object()})
+
+    @unittest.skipIf(orjson is None, "orjson is not installed")
+    def test_orjson_codec_encodes_like_json_codec(self):
+        self.assertEqual(
+            json.loads(OrjsonCodec().dumps(PAYLOAD)), json.loads(JSONCodec().dumps(PAYLOAD))
+        )
+        self.assertIsInstance(default_codec(), OrjsonCodec)
+
+    def test_fallback_without_orjson(self):
+        with mock.patch.dict(sys.modules, {"orjson": None}):
+            self.assertIsInstance(default_codec(), JSONCodec)
+            connection = actionkit.Connection("example.com", "user", "password")
+        self.assertEqual(connection.codec.name, "json")
+
+
+class ConnectionCodecTest(unittest.TestCase):
+    def setUp(self):
+        self.ak = actionkit.ActionKit("example.com", "user", "password", codec=JSONCodec())
+        self.adapter = FakeAdapter()
+        self.ak.connection.session.mount("https://", self.adapter)
+
+    def test_request_bodies_are_encoded_by_the_codec(self):
+        self.ak.Orders.patch("order/1/", {"total": Decimal("5.00")})
+        request = self.adapter.requests[0]
+        self.assertEqual(request.headers["Content-Type"], "application/json")
+        self.assertEqual(json.loads(request.body), {"total": "5.00"})
+
+    def test_responses_are_decoded_by_the_codec(self):
+        codec = mock.Mock(wraps=JSONCodec())
+        self.ak.connection.codec = codec
+        self.assertEqual(self.ak.Users.get("user/1/"), {})
+        codec.loads.assert_called_once_with(b"{}")
+
+    def test_validation_error(self):
+        response = requests.Response()
+        response.status_code = 400
+        response._content = b'{"email": ["Enter a valid email address."]}'
+        error = requests.HTTPError(response=response)
+        with self.assertRaises(actionkit.ValidationError) as raised:
+            self.ak.connection._raise_http_error(error)
+        self.assertEqual(raised.exception["email"], ["Enter a valid email address."])
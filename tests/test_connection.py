@@ -0,0 +1,83 @@
+import subprocess
+import sys
+import threading
+import unittest
+
+import actionkit
+from fake_actionkit import FakeActionKit, FakeAdapter
+
+
+class SessionTest(unittest.TestCase):
+    def setUp(self):
+        self.ak = actionkit.ActionKit("example.com", "user", "password", pool_maxsize=4)
+        self.adapter = FakeAdapter()
+        self.ak.connection.session.mount("https://", self.adapter)
+
+    def test_session_is_reused(self):
+        session = self.ak.connection.session
+        self.ak.Users.get("user/1/")
+        self.ak.Orders.get("order/1/")
+        self.assertIs(self.ak.connection.session, session)
+        self.assertEqual(len(self.adapter.requests), 2)
+        self.assertEqual(
+            self.adapter.requests[0].url, "https://example.com/rest/v1/user/1/"
+        )
+
+    def test_pool_size_is_configurable(self):
+        connection = actionkit.Connection("example.com", "user", "password", pool_maxsize=7)
+        adapter = connection.session.get_adapter("https://example.com/")
+        self.assertEqual(adapter._pool_maxsize, 7)
+
+    def test_session_is_created_once_across_threads(self):
+        connection = actionkit.Connection("example.com", "user", "password")
+        sessions = []
+        threads = [
+            threading.Thread(target=lambda: sessions.append(connection.session))
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(set(map(id, sessions))), 1)
+
+    def test_context_manager_closes_session(self):
+        with self.ak as ak:
+            ak.Users.get("user/1/")
+        self.assertTrue(self.adapter.closed)
+        self.assertIsNone(self.ak.connection._session)
+
+    def test_unsupported_method(self):
+        with self.assertRaises(NotImplementedError):
+            self.ak.connection._make_request("trace", "user/1/")
+
+
+class StartupTest(unittest.TestCase):
+    def test_import_is_lazy(self):
+        code = (
+            "import sys, actionkit; "
+            "print(sorted({'asyncio', 'httpx', 'requests_toolbelt', 'actionkit.sql'} "
+            "& set(sys.modules)))"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        ).stdout
+        self.assertEqual(output.strip(), "[]")
+
+    def test_resources_are_created_on_first_access(self):
+        ak = actionkit.ActionKit("example.com", "user", "password")
+        self.assertNotIn("SQL", vars(ak))
+        self.assertIs(ak.SQL, ak.SQL)
+        self.assertIsInstance(ak.SQL, actionkit.SQL)
+        self.assertIs(ak.SQL.connection, ak.connection)
+        self.assertIn("Users", dir(ak))
+        with self.assertRaises(AttributeError):
+            ak.Nothing
+
+    def test_prewarm(self):
+        with FakeActionKit() as server:
+            connection = server.connect().connection
+            self.assertTrue(connection.prewarm(connections=3))
+            self.assertEqual(server.requests, [("head", "/rest/v1/")] * 3)
+            connection.close()
+        self.assertFalse(connection.prewarm())
@@ -0,0 +1,155 @@
+import json
+import unittest
+
+import actionkit
+from fake_actionkit import FakeAdapter
+
+DONATIONACTION = {
+    "resource_uri": "/rest/v1/donationaction/1/",
+    "status": "incomplete",
+    "fields": {"source": "web"},
+    "order": {
+        "resource_uri": "/rest/v1/order/2/",
+        "transactions": ["/rest/v1/transaction/3/"],
+        "orderrecurrings": ["/rest/v1/orderrecurring/4/"],
+    },
+}
+
+
+def patch_adapter(failing_urls=()) -> FakeAdapter:
+    """
+    Adapter serving DONATIONACTION and accepting PATCH requests, failing those sent to
+    failing_urls
+    """
+
+    def respond(request):
+        if request.method == "GET":
+            return 200, DONATIONACTION
+        if request.method == "PATCH":
+            return 400 if request.path_url in failing_urls else 202
+        return 204
+
+    return FakeAdapter(respond)
+
+
+def patches(adapter: FakeAdapter) -> list:
+    return [(r.path_url, json.loads(r.body)) for r in adapter.requests if r.method == "PATCH"]
+
+
+def calls(adapter: FakeAdapter) -> list:
+    return [(r.method, r.path_url) for r in adapter.requests]
+
+
+class ConcurrentStatusTest(unittest.TestCase):
+    def setUp(self):
+        self.ak = actionkit.ActionKit("example.com", "user", "password")
+
+    def mount(self, adapter):
+        self.ak.connection.session.mount("https://", adapter)
+        return adapter
+
+    def test_sequential_patches(self):
+        adapter = self.mount(patch_adapter())
+        self.ak.DonationAction.set_push_status(
+            "completed",
+            json.loads(json.dumps(DONATIONACTION)),
+            custom_action_fields={"campaign": "1"},
+            recurring_id="sub_1",
+        )
+        self.assertEqual(
+            [uri for uri, _ in patches(adapter)],
+            [
+                "/rest/v1/donationaction/1/",
+                "/rest/v1/order/2/",
+                "/rest/v1/transaction/3/",
+                "/rest/v1/donationaction/1/",
+                "/rest/v1/orderrecurring/4/",
+            ],
+        )
+
+    def test_concurrent_patches_merge_action_fields(self):
+        adapter = self.mount(patch_adapter())
+        self.ak.DonationAction.concurrent_status_updates = True
+        self.ak.DonationAction.set_push_status_incomplete(
+            json.loads(json.dumps(DONATIONACTION)),
+            custom_action_fields={"campaign": "1"},
+            recurring_id="sub_1",
+        )
+        patches_by_uri = dict(patches(adapter))
+        self.assertEqual(len(patches(adapter)), 4)
+        self.assertEqual(
+            patches_by_uri["/rest/v1/donationaction/1/"],
+            {"status": "incomplete", "fields": {"source": "web", "campaign": "1"}},
+        )
+        self.assertEqual(
+            patches_by_uri["/rest/v1/orderrecurring/4/"],
+            {"recurring_id": "sub_1", "recurring_period": "months"},
+        )
+
+    def test_concurrent_patch_failure(self):
+        adapter = self.mount(patch_adapter(failing_urls=["/rest/v1/transaction/3/"]))
+        with self.assertRaises(Exception) as cm:
+            self.ak.DonationAction.set_push_status(
+                "failed", json.loads(json.dumps(DONATIONACTION)), concurrent=True
+            )
+        self.assertIn('Failed to set donationaction status "failed"', str(cm.exception))
+        self.assertEqual(len(patches(adapter)), 3)
+
+
+class DonationActionCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.ak = actionkit.ActionKit(
+            "example.com",
+            "user",
+            "password",
+            donationaction_cache=actionkit.MemoryCache(maxsize=10, ttl=60),
+        )
+        self.failing_urls = []
+        self.adapter = patch_adapter(self.failing_urls)
+        self.ak.connection.session.mount("https://", self.adapter)
+
+    def test_status_transitions_reuse_cached_record(self):
+        self.ak.DonationAction.set_push_status_by_resource_id(1, "completed")
+        self.ak.DonationAction.set_push_status("failed", resource_uri="donationaction/1/")
+        self.ak.DonationAction.delete_donationaction_by_resource_id(1)
+
+        gets = [r for r in calls(self.adapter) if r[0] == "GET"]
+        self.assertEqual(len(gets), 1)
+        # the cached status was updated to failed, so the delete was skipped
+        self.assertNotIn(("DELETE", "/rest/v1/donationaction/1/"), calls(self.adapter))
+        cached = self.ak.DonationAction.get_donationaction("/rest/v1/donationaction/1/")
+        self.assertEqual(cached["status"], "failed")
+        self.assertEqual(len([r for r in calls(self.adapter) if r[0] == "GET"]), 1)
+
+    def test_nested_records_are_updated(self):
+        donationaction = json.loads(json.dumps(DONATIONACTION))
+        donationaction["order"]["transactions"] = [
+            {"resource_uri": "/rest/v1/transaction/3/", "status": "incomplete"}
+        ]
+        donationaction["order"]["orderrecurrings"] = [
+            {"resource_uri": "/rest/v1/orderrecurring/4/", "recurring_id": None}
+        ]
+        self.ak.DonationAction._cache_donationaction("donationaction/1/", donationaction)
+        self.ak.DonationAction.set_push_status(
+            "completed", resource_uri="donationaction/1/", trans_id="ch_1", recurring_id="sub_1"
+        )
+        cached = self.ak.DonationAction.get_donationaction("donationaction/1/")
+        self.assertEqual(cached["order"]["status"], "completed")
+        self.assertEqual(
+            cached["order"]["transactions"][0],
+            {"resource_uri": "/rest/v1/transaction/3/", "status": "completed", "trans_id": "ch_1"},
+        )
+        self.assertEqual(cached["order"]["orderrecurrings"][0]["recurring_id"], "sub_1")
+        self.assertEqual(calls(self.adapter)[0], ("PATCH", "/rest/v1/donationaction/1/"))
+        self.assertNotIn("GET", [method for method, _ in calls(self.adapter)])
+
+    def test_failed_patch_invalidates_record(self):
+        self.failing_urls.append("/rest/v1/order/2/")
+        with self.assertRaises(Exception):
+            self.ak.DonationAction.set_push_status("completed", resource_uri="donationaction/1/")
+        self.assertEqual(len(self.ak.connection.donationaction_cache), 0)
+
+    def test_delete_invalidates_record(self):
+        self.ak.DonationAction.delete_donationaction("donationaction/1/")
+        self.assertIn(("DELETE", "/rest/v1/donationaction/1/"), calls(self.adapter))
+        self.assertEqual(len(self.ak.connection.donationaction_cache), 0)
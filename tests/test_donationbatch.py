@@ -0,0 +1,112 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from itertools import count
+
+import actionkit
+from fake_actionkit import FakeActionKit, FakeAdapter
+
+
+def donation_push_adapter() -> FakeAdapter:
+    """
+    Adapter accepting donationpush POSTs and status PATCHes
+    """
+    ids = count(1)
+
+    def respond(request):
+        if request.method != "POST":
+            return 202, {}
+        trans_id = json.loads(request.body)["order"]["trans_id"]
+        if trans_id == "ch_duplicate":
+            return 409
+        if trans_id == "ch_bad":
+            return 400, {"order": "bad"}
+        id = next(ids)
+        return 201, {
+            "resource_uri": f"/rest/v1/donationaction/{id}/",
+            "status": "complete",
+            "fields": {},
+            "order": {
+                "resource_uri": f"/rest/v1/order/{id}/",
+                "transactions": [f"/rest/v1/transaction/{id}/"],
+                "orderrecurrings": [],
+            },
+        }
+
+    return FakeAdapter(respond)
+
+
+def donation(trans_id, **kwargs):
+    return dict(
+        email="donor@example.com",
+        amount="5.00",
+        currency="EUR",
+        page="donate",
+        payment_account="Stripe",
+        trans_id=trans_id,
+        **kwargs,
+    )
+
+
+class DonationBatchTest(unittest.TestCase):
+    def setUp(self):
+        self.ak = actionkit.ActionKit("example.com", "user", "password")
+        self.adapter = donation_push_adapter()
+        self.ak.connection.session.mount("https://", self.adapter)
+        self.checkpoint_file = os.path.join(tempfile.mkdtemp(), "checkpoint")
+
+    def test_results_per_record(self):
+        records = [
+            donation("ch_1", status="completed"),
+            donation("ch_duplicate"),
+            donation("ch_bad"),
+            donation("ch_2", status="unknown"),
+        ]
+        results = {r.key: r for r in self.ak.DonationAction.push_batch(records, concurrency=2)}
+
+        self.assertTrue(results["ch_1"].ok)
+        self.assertTrue(results["ch_1"].resource_uri.startswith("/rest/v1/donationaction/"))
+        self.assertTrue(results["ch_duplicate"].duplicate)
+        self.assertIsInstance(results["ch_bad"].error, actionkit.ValidationError)
+        self.assertIsInstance(results["ch_2"].error, ValueError)
+        patches = [json.loads(r.body) for r in self.adapter.requests if r.method == "PATCH"]
+        self.assertEqual(len(patches), 3)
+        self.assertTrue(all(patch["status"] == "completed" for patch in patches))
+
+    def test_checkpoint_resume(self):
+        records = [donation(f"ch_{i}") for i in range(10)] + [donation("ch_bad")]
+        first_run = list(
+            self.ak.DonationAction.push_batch(records[:6], checkpoint=self.checkpoint_file)
+        )
+        self.assertEqual(len(first_run), 6)
+
+        second_run = list(
+            self.ak.DonationAction.push_batch(records, checkpoint=self.checkpoint_file)
+        )
+        self.assertEqual(
+            sorted(r.key for r in second_run), ["ch_6", "ch_7", "ch_8", "ch_9", "ch_bad"]
+        )
+        checkpoint = actionkit.Checkpoint(self.checkpoint_file)
+        self.assertEqual(len(checkpoint), 10)
+        self.assertNotIn("ch_bad", checkpoint)
+
+
+class AsyncDonationBatchTest(unittest.TestCase):
+    def test_push_batch(self):
+        records = [donation(f"ch_{i}", status="pending") for i in range(5)]
+        records.append(donation("ch_5", status="unknown"))
+
+        async def run():
+            async with server.connect(actionkit.AsyncActionKit) as ak:
+                batch = ak.DonationAction.push_batch(records, concurrency=2)
+                return {result.key: result async for result in batch}
+
+        with FakeActionKit() as server:
+            results = asyncio.run(run())
+            statuses = [order["status"] for order in server.resources["order"].values()]
+        self.assertEqual(len(results), 6)
+        self.assertTrue(all(results[f"ch_{i}"].ok for i in range(5)))
+        self.assertIsInstance(results["ch_5"].error, ValueError)
+        self.assertEqual(statuses, ["pending"] * 5)
@@ -0,0 +1,44 @@
+import unittest
+from decimal import Decimal
+
+import requests
+
+from fake_actionkit import FakeActionKit
+
+
+class FakeActionKitTest(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeActionKit().start()
+        self.addCleanup(self.server.stop)
+        self.ak = self.server.connect()
+        self.addCleanup(self.ak.close)
+
+    def test_crud_and_search(self):
+        self.server.populate("user", 45, country="FR")
+        resource_uri = self.ak.Users.post(json={"email": "someone@example.com"})
+        self.assertEqual(resource_uri, "/rest/v1/user/46/")
+        self.ak.Users.patch(resource_uri, {"country": "DE"})
+        self.assertEqual(self.ak.Users.get(resource_uri)["country"], "DE")
+
+        self.assertEqual(len(self.ak.Users.search(country="FR", _limit=10)), 45)
+        self.assertEqual(len(self.ak.Users.search_parallel(country="FR", page_size=10)), 45)
+
+        self.ak.Users.delete(resource_uri)
+        with self.assertRaises(requests.HTTPError):
+            self.ak.Users.get(resource_uri)
+
+    def test_donations_and_reports(self):
+        resource_uri = self.ak.DonationAction.push_and_set_incomplete(
+            "someone@example.com", "Some", "One", "FR", "75001", Decimal("5"), "EUR",
+            "donate", "Stripe",
+        )
+        donation = self.ak.DonationAction.get(resource_uri)
+        self.assertEqual(donation["status"], "incomplete")
+        self.assertEqual(donation["order"]["status"], "incomplete")
+        self.assertEqual(self.ak.SQL.run_query("select 1"), [[1]])
+
+    def test_fault_injection(self):
+        self.server.throttle_rate = 0.5
+        self.server.populate("user", 30)
+        self.assertEqual(len(self.ak.Users.search(_limit=5)), 30)
+        self.assertGreater(len(self.server.requests), 6)
@@ -0,0 +1,80 @@
+import unittest
+
+import requests
+
+import actionkit
+from actionkit import MetricsCollector, RetryPolicy
+from actionkit.metrics import resource_name
+
+from test_retry import flaky_adapter
+
+
+class HooksTest(unittest.TestCase):
+    def connect(self, outcomes):
+        ak = actionkit.ActionKit(
+            "example.com", "user", "password", retry_policy=RetryPolicy(initial_backoff=0.001)
+        )
+        adapter = flaky_adapter(outcomes)
+        ak.connection.session.mount("https://", adapter)
+        return ak
+
+    def test_hooks_are_called(self):
+        ak = self.connect([503, 200])
+        events = []
+        for event in ak.connection.hook_events:
+            ak.connection.add_hook(event, lambda event=event, **info: events.append((event, info)))
+
+        ak.connection.get("user/1/")
+        self.assertEqual(
+            [event for event, info in events],
+            ["before_request", "after_response", "on_retry", "before_request", "after_response"],
+        )
+        self.assertEqual(events[3][1]["attempt"], 1)
+        self.assertGreaterEqual(events[4][1]["elapsed"], 0)
+
+    def test_failing_hooks_are_ignored(self):
+        ak = self.connect([404])
+        errors = []
+
+        def broken(**info):
+            raise RuntimeError("broken hook")
+
+        ak.connection.add_hook("before_request", broken)
+        ak.connection.add_hook("on_error", lambda **info: errors.append(info["error"]))
+        with self.assertRaises(requests.HTTPError):
+            ak.connection.get("user/1/")
+        self.assertEqual(len(errors), 1)
+
+        with self.assertRaises(KeyError):
+            ak.connection.add_hook("on_success", broken)
+
+
+class MetricsCollectorTest(unittest.TestCase):
+    def test_resource_name(self):
+        self.assertEqual(resource_name("https://example.com/rest/v1/user/1/"), "user")
+        self.assertEqual(resource_name("https://example.com/rest/v1/report/run/sql/"), "report/run/sql")
+
+    def test_collects_per_resource(self):
+        ak = actionkit.ActionKit(
+            "example.com", "user", "password", retry_policy=RetryPolicy(initial_backoff=0.001)
+        )
+        ak.connection.session.mount("https://", flaky_adapter([502, 200, 200, 404]))
+        metrics = MetricsCollector(buckets=(1.0,)).install(ak.connection)
+
+        ak.connection.get("user/1/")
+        ak.connection.post("report/run/sql/", json={"query": "select 1"})
+        with self.assertRaises(requests.HTTPError):
+            ak.connection.get("user/2/")
+
+        stats = metrics.to_dict()
+        self.assertEqual(stats["user"]["requests"], {"GET 502": 1, "GET 200": 1, "GET 404": 1})
+        self.assertEqual(stats["user"]["retries"], 1)
+        self.assertEqual(stats["user"]["errors"], 1)
+        self.assertEqual(stats["user"]["latency"]["count"], 3)
+        self.assertEqual(stats["report/run/sql"]["requests"], {"POST 200": 1})
+        self.assertGreater(stats["report/run/sql"]["bytes_sent"], 0)
+
+        text = metrics.to_prometheus()
+        self.assertIn('actionkit_requests_total{resource="user",method="GET",status="502"} 1', text)
+        self.assertIn('actionkit_request_duration_seconds_bucket{resource="user",le="+Inf"} 3', text)
+        self.assertEqual(text.count("# TYPE actionkit_requests_total counter"), 1)
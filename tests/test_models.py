@@ -0,0 +1,96 @@
+import asyncio
+import pickle
+import unittest
+from datetime import datetime
+from decimal import Decimal
+
+import actionkit
+from actionkit.models import DonationActionRecord, OrderRecord, UserRecord
+
+from fake_actionkit import FakeActionKit
+
+DONATION_ACTION = {
+    "id": 1,
+    "resource_uri": "/rest/v1/donationaction/1/",
+    "user": "/rest/v1/user/2/",
+    "created_at": "2024-01-31T12:00:00",
+    "fields": {"source_detail": "newsletter"},
+    "order": {
+        "resource_uri": "/rest/v1/order/3/",
+        "total": "5.00",
+        "transactions": [{"id": 4, "amount": "5.00", "status": "completed"}],
+    },
+    "custom": "kept",
+}
+
+
+class RecordTest(unittest.TestCase):
+    def test_fields(self):
+        action = DonationActionRecord.from_dict(DONATION_ACTION)
+        self.assertEqual(action.id, 1)
+        self.assertEqual(action.fields, {"source_detail": "newsletter"})
+        self.assertIsNone(action.page)
+        self.assertEqual(action.custom, "kept")
+        self.assertEqual(action.extra, {"custom": "kept"})
+        with self.assertRaises(AttributeError):
+            action.unknown
+        with self.assertRaises(AttributeError):
+            action.new_attribute = 1
+
+    def test_nested_fields_are_decoded_lazily(self):
+        action = DonationActionRecord.from_dict(DONATION_ACTION)
+        self.assertEqual(action._order, DONATION_ACTION["order"])
+        self.assertIsInstance(action.order, OrderRecord)
+        self.assertIs(action.order, action.order)
+        self.assertEqual(action.order.total, Decimal("5.00"))
+        self.assertEqual(action.order.transactions[0].amount, Decimal("5.00"))
+        self.assertEqual(action.created_at, datetime(2024, 1, 31, 12))
+        # URIs of related objects are not decoded
+        self.assertEqual(action.user, "/rest/v1/user/2/")
+
+        action.created_at = datetime(2024, 2, 1)
+        self.assertEqual(action.created_at, datetime(2024, 2, 1))
+
+    def test_to_dict(self):
+        action = DonationActionRecord.from_dict(DONATION_ACTION)
+        data = action.to_dict()
+        self.assertEqual(data["order"]["transactions"][0]["amount"], Decimal("5.00"))
+        self.assertEqual(data["custom"], "kept")
+        self.assertEqual(DonationActionRecord.from_dict(data), action)
+        self.assertEqual(pickle.loads(pickle.dumps(action)), action)
+
+
+class TypedSearchTest(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeActionKit().start()
+        self.addCleanup(self.server.stop)
+        self.server.populate("user", 25, country="FR", created_at="2024-01-31T12:00:00")
+
+    def test_typed_results(self):
+        with self.server.connect() as ak:
+            users = ak.Users.search(country="FR", typed=True)
+            self.assertEqual(len(users), 25)
+            self.assertIsInstance(users[0], UserRecord)
+            self.assertEqual(users[0].created_at.year, 2024)
+
+            users = ak.Users.search_parallel(country="FR", page_size=10, typed=True)
+            self.assertEqual([user.id for user in users], list(range(1, 26)))
+
+            user = ak.Users.get("user/3/", typed=True)
+            self.assertEqual((user.id, user.country), (3, "FR"))
+            self.assertIsInstance(ak.Users.get("user/3/"), dict)
+
+            with self.assertRaises(ValueError):
+                ak.Lists.search(typed=True)
+
+    def test_async_typed_results(self):
+        async def run():
+            async with self.server.connect(actionkit.AsyncActionKit) as ak:
+                users = await ak.Users.search_parallel(page_size=10, typed=True)
+                user = await ak.Users.get_by_id(5, typed=True)
+                return users, user
+
+        users, user = asyncio.run(run())
+        self.assertEqual(len(users), 25)
+        self.assertIsInstance(users[0], UserRecord)
+        self.assertEqual(user.id, 5)
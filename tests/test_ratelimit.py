@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+
+import actionkit
+from actionkit import FileTokenBucket, RateLimiter, TokenBucket
+
+
+class TokenBucketTest(unittest.TestCase):
+    def test_burst_then_wait(self):
+        bucket = TokenBucket(rate=10, capacity=2)
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertAlmostEqual(bucket.reserve(), 0.1, places=2)
+        self.assertAlmostEqual(bucket.reserve(), 0.2, places=2)
+
+    def test_file_bucket_is_shared(self):
+        file_name = os.path.join(tempfile.mkdtemp(), "bucket")
+        first = FileTokenBucket(file_name, rate=10, capacity=1)
+        second = FileTokenBucket(file_name, rate=10, capacity=1)
+        self.assertEqual(first.reserve(), 0)
+        # Less the time taken by the first reserve to lock and write the file
+        delay = second.reserve()
+        self.assertGreater(delay, 0.05)
+        self.assertLessEqual(delay, 0.1)
+
+
+class RateLimiterTest(unittest.TestCase):
+    def test_rules_by_method_and_path(self):
+        limiter = RateLimiter(rate=1000)
+        limiter.add_rule(TokenBucket(rate=1, capacity=1), path_prefix="report/run")
+        limiter.add_rule(TokenBucket(rate=1, capacity=1), method="POST", path_prefix="donationpush")
+
+        self.assertEqual(limiter.delay("post", "report/run/sql"), 0)
+        self.assertGreater(limiter.delay("post", "report/run/sql"), 0.9)
+        self.assertEqual(limiter.delay("get", "donationpush/"), 0)
+        self.assertEqual(limiter.delay("post", "donationpush/"), 0)
+        self.assertEqual(limiter.delay("get", "user/1/"), 0)
+
+        stats = limiter.stats()
+        self.assertEqual(stats["* report/run"]["waits"], 1)
+        self.assertEqual(stats["post donationpush"]["waits"], 0)
+
+    def test_connection_api_path(self):
+        connection = actionkit.Connection("example.com", "user", "password")
+        self.assertEqual(
+            connection._api_path(connection._path("report/run/sql")), "report/run/sql"
+        )
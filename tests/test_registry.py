@@ -0,0 +1,115 @@
+import threading
+import time
+import unittest
+from urllib.parse import parse_qs, urlsplit
+
+import actionkit
+from fake_actionkit import FakeAdapter
+
+RESOURCES = {
+    "/rest/v1/language": [
+        {"id": 1, "name": "English", "iso_code": "en", "translations": "{}",
+         "resource_uri": "/rest/v1/language/1/"},
+        {"id": 9, "name": "Klingon", "iso_code": "tl",
+         "translations": '{"actual_iso_code": "lb"}', "resource_uri": "/rest/v1/language/9/"},
+    ],
+    "/rest/v1/usergroup": [
+        {"id": 3, "name": "Donors", "resource_uri": "/rest/v1/usergroup/3/"},
+    ],
+    "/rest/v1/list": [
+        {"id": 1, "name": "members", "resource_uri": "/rest/v1/list/1/"},
+    ],
+}
+
+
+def reference_data(request):
+    """
+    Serves RESOURCES and the campaign choices, and creates lists
+    """
+    url = urlsplit(request.url)
+    name = parse_qs(url.query).get("name", [None])[0]
+    if request.method == "GET" and url.path in RESOURCES:
+        objects = [o for o in RESOURCES[url.path] if name in (None, o["name"])]
+        return 200, {"meta": {"next": None, "total_count": len(objects)}, "objects": objects}
+    if url.path == "/rest/v1/allowedpagefield/campaign":
+        return 200, {"choices": [["12", "Save the bees"]], "field_choices": "12=Save the bees"}
+    if request.method == "POST":
+        return 201, {}, {"Location": "/rest/v1/list/2/"}
+    return 200, {"id": 2, "name": "new list", "resource_uri": "/rest/v1/list/2/"}
+
+
+def paths(adapter: FakeAdapter) -> list:
+    return [(r.method, urlsplit(r.url).path) for r in adapter.requests]
+
+
+class RegistryTest(unittest.TestCase):
+    def setUp(self):
+        self.ak = actionkit.ActionKit("example.com", "user", "password")
+        self.adapter = FakeAdapter(reference_data)
+        self.ak.connection.session.mount("https://", self.adapter)
+
+    def test_load_in_parallel(self):
+        self.ak.registry.load()
+        self.assertEqual(len(paths(self.adapter)), 4)
+        self.assertEqual(self.ak.registry.language_uri("lb"), "/rest/v1/language/9/")
+        self.assertEqual(self.ak.registry.language_by_id(1)["iso_code"], "en")
+        self.assertEqual(self.ak.registry.group_uri("Donors"), "/rest/v1/usergroup/3/")
+        self.assertEqual(self.ak.registry.campaign_name(12), "Save the bees")
+        self.assertEqual(self.ak.registry.campaign_id("Save the bees"), 12)
+        self.assertEqual(len(paths(self.adapter)), 4)
+
+    def test_tables_load_lazily(self):
+        self.assertIsNone(self.ak.registry.group("Nope"))
+        self.assertEqual(paths(self.adapter), [("GET", "/rest/v1/usergroup")])
+
+    def test_get_or_create_uses_and_feeds_the_registry(self):
+        self.ak.registry.load("lists")
+        self.adapter.requests.clear()
+        self.assertEqual(self.ak.Lists.get_or_create("members")["id"], 1)
+        self.assertEqual(paths(self.adapter), [])
+
+        self.assertEqual(self.ak.Lists.get_or_create("new list")["id"], 2)
+        self.assertEqual(
+            paths(self.adapter),
+            [("GET", "/rest/v1/list"), ("POST", "/rest/v1/list"), ("GET", "/rest/v1/list/2/")],
+        )
+        self.assertEqual(self.ak.registry.list_by_id(2)["name"], "new list")
+
+    def test_refresh_reloads_tables(self):
+        self.ak.registry.start_refresh(0.01)
+        try:
+            for _ in range(100):
+                if len(paths(self.adapter)) >= 8:
+                    break
+                time.sleep(0.01)
+        finally:
+            self.ak.close()
+        self.assertGreaterEqual(len(paths(self.adapter)), 8)
+        # No reload is left running once the connection is closed
+        requests_sent = len(paths(self.adapter))
+        time.sleep(0.05)
+        self.assertEqual(len(paths(self.adapter)), requests_sent)
+        self.assertIsNone(self.ak.connection._session)
+
+    def test_lookups_are_not_blocked_by_a_slow_fetch(self):
+        fetching, release = threading.Event(), threading.Event()
+        fetch_lists = self.ak.registry._fetch_lists
+
+        def slow_fetch_lists():
+            fetching.set()
+            release.wait(5)
+            return fetch_lists()
+
+        self.ak.registry._fetch_lists = slow_fetch_lists
+        thread = threading.Thread(target=self.ak.registry.list, args=("members",))
+        thread.start()
+        try:
+            fetching.wait(5)
+            lookup = threading.Thread(target=self.ak.registry.group, args=("Donors",))
+            lookup.start()
+            lookup.join(1)
+            self.assertFalse(lookup.is_alive())
+        finally:
+            release.set()
+            thread.join()
+        self.assertEqual(self.ak.registry.list("members")["id"], 1)
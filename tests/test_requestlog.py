@@ -0,0 +1,54 @@
+import logging
+import unittest
+
+import requests
+
+from actionkit import RequestLogger
+
+
+class ExplodingResponse(requests.Response):
+    @property
+    def text(self):
+        raise AssertionError("The response body should not be formatted")
+
+
+def make_response(cls=requests.Response, body=b'{"card_num": "4111", "id": 1}'):
+    response = cls()
+    response.status_code = 200
+    response.headers["content-type"] = "application/json"
+    response._content = body
+    response.request = requests.Request(
+        "POST", "https://example.com/rest/v1/donationpush/", auth=("user", "secret")
+    ).prepare()
+    return response
+
+
+class RequestLoggerTest(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger("actionkit.tests.requestlog")
+
+    def test_nothing_is_formatted_when_disabled(self):
+        self.logger.setLevel(logging.INFO)
+        RequestLogger(self.logger).response(make_response(ExplodingResponse))
+
+    def test_redaction_and_truncation(self):
+        self.logger.setLevel(logging.DEBUG)
+        request_log = RequestLogger(self.logger, max_body=200)
+        with self.assertLogs(self.logger, logging.DEBUG) as logs:
+            request_log.request(
+                "post",
+                "https://example.com/rest/v1/donationpush/",
+                {
+                    "headers": {"Authorization": "Basic dXNlcjpzZWNyZXQ="},
+                    "json": {"order": {"card_num": "4111111111111111", "amount": "5"}},
+                },
+            )
+            request_log.response(make_response(body=b'{"objects": [' + b"1, " * 100 + b"1]}"))
+            request_log.response(make_response())
+
+        output = "\n".join(logs.output)
+        self.assertNotIn("4111", output)
+        self.assertNotIn("dXNlcjpzZWNyZXQ=", output)
+        self.assertIn("'amount': '5'", output)
+        self.assertIn("more characters]", output)
+        self.assertIn("'id': 1", output)
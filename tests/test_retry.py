@@ -0,0 +1,164 @@
+import time
+import unittest
+from email.utils import formatdate
+
+import requests
+
+import actionkit
+from actionkit import CircuitBreaker, CircuitOpenError, RetryPolicy
+
+from fake_actionkit import FakeAdapter
+
+
+def flaky_adapter(outcomes) -> FakeAdapter:
+    """
+    Adapter playing a script of outcomes: an HTTP status, or an exception to raise
+    """
+    outcomes = list(outcomes)
+
+    def respond(request):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome, None, {"Retry-After": "0"} if outcome == 429 else None
+
+    return FakeAdapter(respond)
+
+
+def response_with(headers):
+    response = requests.Response()
+    response.status_code = 503
+    response.headers.update(headers)
+    return response
+
+
+class RetryPolicyTest(unittest.TestCase):
+    def test_full_jitter_backoff(self):
+        policy = RetryPolicy(initial_backoff=1, max_backoff=5)
+        for attempt in range(6):
+            self.assertLessEqual(policy.backoff(attempt), min(5, 2 ** attempt))
+        self.assertEqual(RetryPolicy(initial_backoff=1, jitter=False).backoff(2), 4)
+
+    def test_retry_after(self):
+        self.assertEqual(RetryPolicy.retry_after(response_with({"Retry-After": "7"})), 7)
+        in_a_minute = formatdate(time.time() + 60, usegmt=True)
+        delay = RetryPolicy.retry_after(response_with({"Retry-After": in_a_minute}))
+        self.assertTrue(55 < delay <= 60)
+        policy = RetryPolicy()
+        self.assertEqual(
+            policy.next_delay(0, time.monotonic(), "post", response=response_with({"Retry-After": "2"})),
+            2,
+        )
+
+    def test_gives_up(self):
+        policy = RetryPolicy(max_retries=2, max_elapsed=10)
+        response = response_with({"Retry-After": "20"})
+        self.assertIsNone(policy.next_delay(0, time.monotonic(), "get", response=response))
+        self.assertIsNone(policy.next_delay(2, time.monotonic(), "get", response=response_with({})))
+        self.assertIsNone(
+            policy.next_delay(0, time.monotonic(), "post", error=requests.ReadTimeout())
+        )
+        self.assertIsNotNone(
+            policy.next_delay(0, time.monotonic(), "post", error=requests.ConnectTimeout())
+        )
+
+    def test_retry_after_longer_than_max_backoff(self):
+        policy = RetryPolicy(max_backoff=60)
+        in_a_day = response_with({"Retry-After": "86400"})
+        self.assertIsNone(policy.next_delay(0, time.monotonic(), "get", response=in_a_day))
+        next_week = formatdate(time.time() + 7 * 86400, usegmt=True)
+        response = response_with({"Retry-After": next_week})
+        self.assertIsNone(policy.next_delay(0, time.monotonic(), "get", response=response))
+
+    def test_non_idempotent_methods_only_retry_unprocessed_statuses(self):
+        policy = RetryPolicy()
+        for status in (500, 502, 504):
+            self.assertTrue(policy.retries_status(status, "get"))
+            self.assertFalse(policy.retries_status(status, "post"))
+        self.assertTrue(policy.retries_status(429, "post"))
+        self.assertTrue(policy.retries_status(503, "patch"))
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def test_opens_and_recovers(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+        breaker.record_failure()
+        breaker.before_request()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_request()
+
+        time.sleep(0.06)
+        breaker.before_request()
+        with self.assertRaises(CircuitOpenError):
+            # only one trial request at a time
+            breaker.before_request()
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+
+class ConnectionRetryTest(unittest.TestCase):
+    def connect(self, outcomes, **kwargs):
+        ak = actionkit.ActionKit(
+            "example.com",
+            "user",
+            "password",
+            retry_policy=RetryPolicy(initial_backoff=0.001),
+            **kwargs,
+        )
+        adapter = flaky_adapter(outcomes)
+        ak.connection.session.mount("https://", adapter)
+        return ak, adapter
+
+    def test_retries_statuses_and_network_errors(self):
+        ak, adapter = self.connect([503, 429, requests.ConnectionError(), 200])
+        ak.connection.get("user/1/")
+        self.assertEqual(len(adapter.requests), 4)
+
+    def test_does_not_resend_posts_after_gateway_timeouts(self):
+        ak, adapter = self.connect([504, 201])
+        with self.assertRaises(requests.HTTPError):
+            ak.connection.post("donationpush/", json={})
+        self.assertEqual(len(adapter.requests), 1)
+
+    def test_does_not_resend_posts_after_network_errors(self):
+        ak, adapter = self.connect([requests.ConnectionError(), 200])
+        with self.assertRaises(requests.ConnectionError):
+            ak.connection.post("user/", json={})
+        self.assertEqual(len(adapter.requests), 1)
+
+    def test_default_policy_uses_class_attributes(self):
+        ak = actionkit.ActionKit("example.com", "user", "password")
+        ak.connection.initial_backoff = 0
+        ak.connection.num_retries = 1
+        adapter = flaky_adapter([500, 500])
+        ak.connection.session.mount("https://", adapter)
+        with self.assertRaises(requests.HTTPError):
+            ak.connection.get("user/1/")
+        self.assertEqual(len(adapter.requests), 2)
+
+    def test_circuit_breaker_fails_fast(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        ak, adapter = self.connect([502, 502, 502, 502], circuit_breaker=breaker)
+        with self.assertRaises(CircuitOpenError):
+            ak.connection.get("user/1/")
+        self.assertEqual(len(adapter.requests), 2)
+
+    def test_failed_trial_request_closes_the_trial(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+        ak, adapter = self.connect(
+            [502, requests.exceptions.ChunkedEncodingError(), 200], circuit_breaker=breaker
+        )
+        ak.connection.retry_policy = RetryPolicy(max_retries=0)
+        with self.assertRaises(requests.HTTPError):
+            ak.connection.get("user/1/")
+
+        time.sleep(0.02)
+        with self.assertRaises(requests.exceptions.ChunkedEncodingError):
+            ak.connection.get("user/1/")
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+        time.sleep(0.02)
+        ak.connection.get("user/1/")
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
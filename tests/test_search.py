@@ -0,0 +1,74 @@
+import unittest
+from urllib.parse import parse_qs, urlsplit
+
+import actionkit
+from fake_actionkit import FakeAdapter
+
+
+def paged_adapter(objects, default_limit=20, max_limit=None) -> FakeAdapter:
+    """
+    Adapter serving a list of objects with Tastypie-style _offset/_limit pagination, with
+    _limit capped to max_limit if given
+    """
+
+    def respond(request):
+        url = urlsplit(request.url)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        offset = int(query.get("_offset", 0))
+        limit = int(query.get("_limit", default_limit))
+        if max_limit is not None:
+            limit = min(limit, max_limit)
+
+        next_url = None
+        if offset + limit < len(objects):
+            next_url = f"{url.path}?_limit={limit}&_offset={offset + limit}"
+        meta = dict(limit=limit, offset=offset, total_count=len(objects), next=next_url)
+        return 200, {"meta": meta, "objects": objects[offset : offset + limit]}
+
+    return FakeAdapter(respond)
+
+
+class SearchTest(unittest.TestCase):
+    def setUp(self):
+        self.ak = actionkit.ActionKit("example.com", "user", "password")
+        self.adapter = paged_adapter([{"id": i} for i in range(45)])
+        self.ak.connection.session.mount("https://", self.adapter)
+
+    def test_search_collects_all_pages(self):
+        self.assertEqual(self.ak.Users.search(), [{"id": i} for i in range(45)])
+        self.assertEqual(len(self.adapter.requests), 3)
+
+    def test_iter_search_is_lazy(self):
+        results = self.ak.Users.iter_search(page_size=10)
+        self.assertEqual(self.adapter.requests, [])
+        self.assertEqual(next(results), {"id": 0})
+        self.assertEqual(len(self.adapter.requests), 1)
+        self.assertIn("_limit=10", self.adapter.requests[0].url)
+        self.assertEqual(len(list(results)), 44)
+        self.assertEqual(len(self.adapter.requests), 5)
+
+    def test_iter_pages_resumes_from_cursor(self):
+        pages = self.ak.Users.iter_pages(page_size=10)
+        cursor = next(pages)["meta"]["next"]
+
+        resumed = list(self.ak.Users.iter_search(cursor=cursor))
+        self.assertEqual(resumed, [{"id": i} for i in range(10, 45)])
+
+    def test_search_parallel_keeps_order(self):
+        results = self.ak.Users.search_parallel(concurrency=3, page_size=10)
+        self.assertEqual(results, [{"id": i} for i in range(45)])
+        self.assertEqual(len(self.adapter.requests), 5)
+
+    def test_iter_search_parallel_unordered(self):
+        results = self.ak.Users.iter_search_parallel(concurrency=3, page_size=7, ordered=False)
+        self.assertEqual(sorted(r["id"] for r in results), list(range(45)))
+
+
+class CappedLimitTest(unittest.TestCase):
+    def test_search_parallel_follows_the_served_limit(self):
+        ak = actionkit.ActionKit("example.com", "user", "password")
+        adapter = paged_adapter([{"id": i} for i in range(45)], max_limit=10)
+        ak.connection.session.mount("https://", adapter)
+        users = ak.Users.search_parallel(page_size=20, concurrency=3)
+        self.assertEqual(users, [{"id": i} for i in range(45)])
+        self.assertEqual(len(adapter.requests), 5)
@@ -0,0 +1,204 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from itertools import islice
+
+import actionkit
+from actionkit import RowMapper, to_datetime, to_decimal
+from actionkit.rows import parse_timestamp
+from actionkit.jsonstream import JSONArrayParser, iter_json_array
+
+from fake_actionkit import FakeActionKit
+
+
+@dataclass
+class Order:
+    id: int
+    total: Decimal
+    created_at: datetime
+
+
+class JSONArrayParserTest(unittest.TestCase):
+    def test_items_split_across_chunks(self):
+        document = ' [[1, "café", 2.5], [12345, null, {"a": [1]}] ,[] ] '.encode()
+        for size in (1, 2, 3, 7, len(document)):
+            chunks = [document[i:i + size] for i in range(0, len(document), size)]
+            self.assertEqual(
+                list(iter_json_array(chunks)),
+                [[1, "café", 2.5], [12345, None, {"a": [1]}], []],
+            )
+
+    def test_numbers_are_not_cut(self):
+        parser = JSONArrayParser()
+        self.assertEqual(parser.feed("[12"), [])
+        self.assertEqual(parser.feed("34, 5"), [1234])
+        self.assertEqual(parser.feed("]"), [5])
+        self.assertEqual(parser.close(), [])
+
+    def test_incomplete_document(self):
+        with self.assertRaises(ValueError):
+            list(iter_json_array([b"[[1], [2"]))
+        with self.assertRaises(ValueError):
+            list(iter_json_array([b'{"a": 1}']))
+
+
+class RowMapperTest(unittest.TestCase):
+    def test_namedtuple_rows(self):
+        mapper = RowMapper(["id", "total"], converters=dict(total=to_decimal))
+        row = mapper([1, 10.1])
+        self.assertEqual((row.id, row.total), (1, Decimal("10.1")))
+        self.assertIsNone(mapper([2, None]).total)
+
+    def test_dataclass_rows(self):
+        mapper = RowMapper(row_type=Order, converters={1: to_decimal, 2: to_datetime})
+        self.assertEqual(
+            mapper([1, "5.00", "2024-01-31 12:00:00"]),
+            Order(1, Decimal("5.00"), datetime(2024, 1, 31, 12)),
+        )
+        with self.assertRaises(KeyError):
+            RowMapper(converters=dict(total=to_decimal))
+
+    def test_parse_timestamp_without_fromisoformat(self):
+        for value in [
+            "2024-01-31",
+            "2024-01-31 12:00",
+            "2024-01-31 12:00:00",
+            "2024-01-31T12:00:00.123+00:00",
+            "2024-01-31T12:00:00.123456-05:30",
+        ]:
+            self.assertEqual(parse_timestamp(value), datetime.fromisoformat(value))
+        with self.assertRaises(ValueError):
+            parse_timestamp("31/01/2024")
+
+
+class IterQueryTest(unittest.TestCase):
+    rows = [[i, f"{i}.50", "2024-01-31T12:00:00Z"] for i in range(2000)]
+
+    def setUp(self):
+        self.server = FakeActionKit(reports=dict(sql=self.rows)).start()
+        self.addCleanup(self.server.stop)
+
+    def test_iter_query(self):
+        with self.server.connect() as ak:
+            rows = ak.SQL.iter_query(
+                "SELECT id, total, created_at FROM core_order",
+                row_type=Order,
+                converters={1: to_decimal, 2: to_datetime},
+                chunk_size=100,
+            )
+            rows = list(rows)
+        self.assertEqual(len(rows), 2000)
+        self.assertEqual(rows[-1].total, Decimal("1999.50"))
+        self.assertEqual(rows[0].created_at.tzinfo.utcoffset(None).total_seconds(), 0)
+
+    def test_async_iter_query(self):
+        async def run():
+            async with self.server.connect(actionkit.AsyncActionKit) as ak:
+                rows = ak.SQL.iter_query("SELECT id FROM core_order", columns=["id", "total", "at"])
+                return [row.id async for row in rows]
+
+        self.assertEqual(asyncio.run(run()), list(range(2000)))
+
+
+class ChunkedQueryTest(unittest.TestCase):
+    query = "SELECT id FROM core_action WHERE id >= {{ chunk_start }} AND id < {{ chunk_end }}"
+
+    def setUp(self):
+        self.ids = list(range(5, 105))
+        self.queries = []
+        self.server = FakeActionKit(reports=dict(sql=self.run_sql)).start()
+        self.addCleanup(self.server.stop)
+
+    def run_sql(self, values):
+        self.queries.append(values)
+        if values["query"].startswith("SELECT MIN"):
+            return [[min(self.ids), max(self.ids)]]
+        return [[i] for i in self.ids if values["chunk_start"] <= i < values["chunk_end"]]
+
+    def test_rows_are_streamed_in_order(self):
+        with self.server.connect() as ak:
+            rows = ak.SQL.iter_query_chunked(
+                self.query, table="core_action", chunk_size=7, concurrency=3, columns=["id"]
+            )
+            self.assertEqual([row.id for row in rows], self.ids)
+        # the bounds, then 100 ids in chunks of 7
+        self.assertEqual(len(self.queries), 1 + 15)
+
+    def test_resume_from_checkpoint(self):
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint = os.path.join(directory, "chunks")
+            with self.server.connect() as ak:
+                rows = ak.SQL.iter_query_chunked(
+                    self.query, bounds=(5, 104), chunk_size=10, checkpoint=checkpoint
+                )
+                self.assertEqual(list(islice(rows, 25)), [[i] for i in range(5, 30)])
+                rows.close()
+
+                rows = ak.SQL.iter_query_chunked(
+                    self.query, bounds=(5, 104), chunk_size=10, checkpoint=checkpoint
+                )
+                self.assertEqual(next(rows), [25])
+
+    def test_async_rows_are_streamed_in_order(self):
+        async def run():
+            async with self.server.connect(actionkit.AsyncActionKit) as ak:
+                rows = ak.SQL.iter_query_chunked(
+                    self.query, table="core_action", chunk_size=7, concurrency=3, columns=["id"]
+                )
+                return [row.id async for row in rows]
+
+        self.assertEqual(asyncio.run(run()), self.ids)
+        self.assertEqual(len(self.queries), 1 + 15)
+
+    def test_query_must_have_placeholders(self):
+        with self.assertRaises(ValueError):
+            actionkit.ChunkedQuery(None, "SELECT id FROM core_action", bounds=(1, 10))
+
+
+class BatchedLookupTest(unittest.TestCase):
+    def setUp(self):
+        self.transactions = [(1, "ch_1"), (2, "ch_2"), (3, "ch_2"), (4, "ch_4"), (5, "CH_2")]
+        self.signups = [(10, 1, 100), (10, 1, 101), (11, 2, 102)]
+        self.queries = []
+        self.server = FakeActionKit(reports=dict(sql=self.run_sql)).start()
+        self.addCleanup(self.server.stop)
+
+    def run_sql(self, values):
+        self.queries.append(values)
+        if "core_transaction" in values["query"]:
+            # Matched regardless of case, as by the default collation of MySQL
+            trans_ids = {v.lower() for k, v in values.items() if k.startswith("t")}
+            return [
+                [trans_id, id]
+                for id, trans_id in self.transactions
+                if trans_id.lower() in trans_ids
+            ]
+        count = sum(1 for k in values if k.startswith("p"))
+        pairs = {(values[f"p{i}"], values[f"u{i}"]) for i in range(count)}
+        return [list(signup) for signup in self.signups if signup[:2] in pairs]
+
+    def test_fetch_transaction_ids_by_trans_ids(self):
+        with self.server.connect() as ak:
+            ak.SQL.batch_size = 2
+            with self.assertLogs("actionkit", "WARNING") as logs:
+                transaction_ids = ak.SQL.fetch_transaction_ids_by_trans_ids(
+                    ["ch_1", "ch_2", "ch_3", "CH_4", "ch_1"]
+                )
+        self.assertEqual(transaction_ids, {"ch_1": 1, "ch_2": 2, "ch_3": None, "CH_4": 4})
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("More than 1 result found for trans_id ch_2", logs.output[0])
+        self.assertEqual(len(self.queries), 2)
+        self.assertIn("IN ({{ t0 }}, {{ t1 }})", self.queries[0]["query"])
+
+    def test_fetch_signup_action_ids_by_pairs(self):
+        async def run():
+            async with self.server.connect(actionkit.AsyncActionKit) as ak:
+                return await ak.SQL.fetch_signup_action_ids_by_pairs([(10, 1), (11, 2), (12, 3)])
+
+        self.assertEqual(
+            asyncio.run(run()), {(10, 1): [100, 101], (11, 2): [102], (12, 3): []}
+        )
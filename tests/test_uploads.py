@@ -0,0 +1,147 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import requests
+
+import actionkit
+from actionkit import PollBackoff, UploadError, UploadUsersError
+from actionkit.uploads import users_csv
+
+from fake_actionkit import FakeActionKit
+
+
+class UploadsTest(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeActionKit().start()
+        self.addCleanup(self.server.stop)
+        self.ak = self.server.connect()
+        self.addCleanup(self.ak.close)
+
+    def test_users_csv(self):
+        users = [{"email": "a@example.com", "country": "FR"}, {"email": "b@example.com", "zip": "1"}]
+        self.assertEqual(
+            users_csv(users).read().decode(),
+            "email,country,zip\r\na@example.com,FR,\r\nb@example.com,,1\r\n",
+        )
+        with self.assertRaises(ValueError):
+            users_csv([{"country": "FR"}])
+
+    def test_upload_users_in_chunks(self):
+        progress = {}
+        users = ({"email": f"user{i}@example.com", "country": "FR"} for i in range(25))
+        jobs = self.ak.Uploads.upload_users(
+            users,
+            "import_page",
+            chunk_size=10,
+            concurrency=2,
+            progress=lambda name, sent, total: progress.__setitem__(name, (sent, total)),
+        )
+        self.assertEqual(len(jobs), 3)
+        self.assertEqual([job["status"] for job in self.ak.Uploads.wait_all(jobs)], ["complete"] * 3)
+        self.assertEqual(sorted(progress), ["users-0000.csv", "users-0001.csv", "users-0002.csv"])
+        self.assertTrue(all(sent == total for sent, total in progress.values()))
+        bodies = b"".join(self.server.uploads)
+        self.assertEqual(bodies.count(b"@example.com,FR"), 25)
+        self.assertEqual(bodies.count(b'name="page"\r\n\r\nimport_page'), 3)
+
+    def test_upload_users_keeps_the_jobs_sent_before_a_failure(self):
+        post_upload = self.ak.Uploads._post_upload
+
+        def failing_post_upload(file_name, *args):
+            if file_name == "users-0002.csv":
+                raise requests.ConnectionError()
+            return post_upload(file_name, *args)
+
+        users = [{"email": f"user{i}@example.com"} for i in range(50)]
+        with mock.patch.object(self.ak.Uploads, "_post_upload", failing_post_upload):
+            with self.assertRaises(UploadUsersError) as raised:
+                self.ak.Uploads.upload_users(users, "import_page", chunk_size=10, concurrency=2)
+        error = raised.exception
+        self.assertEqual(error.chunk, 2)
+        self.assertIsInstance(error.__cause__, requests.ConnectionError)
+        # Chunk 3 was being sent when chunk 2 failed, and chunk 4 never is
+        self.assertIn(0, error.jobs)
+        self.assertIn(1, error.jobs)
+        self.assertNotIn(4, error.jobs)
+        self.assertEqual(len(error.jobs), len(self.server.uploads))
+        uploads = self.ak.Uploads.wait_all(list(error.jobs.values()))
+        self.assertEqual([upload["status"] for upload in uploads], ["complete"] * len(uploads))
+
+    def test_upload_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, "users.csv")
+            with open(file_name, "w") as f:
+                f.write("email\nuser@example.com\n")
+            self.ak.Uploads.upload(file_name, "import_page")
+        self.assertIn(b"user@example.com", self.server.uploads[0])
+
+
+class UploadJobTest(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeActionKit(upload_polls=3).start()
+        self.addCleanup(self.server.stop)
+        self.ak = self.server.connect()
+        self.addCleanup(self.ak.close)
+        self.users = [{"email": f"user{i}@example.com"} for i in range(10)]
+
+    def test_poll_backoff(self):
+        backoff = PollBackoff(initial=1, maximum=3, factor=2)
+        self.assertEqual([backoff.next_interval(0) for _ in range(4)], [1, 2, 3, 3])
+        self.assertEqual(backoff.next_interval(5), 1)
+
+    def test_wait_and_result(self):
+        job = self.ak.Uploads.upload_users(self.users, "import_page")[0]
+        self.assertFalse(job.done)
+        with self.assertRaises(TimeoutError):
+            job.wait(timeout=0.01, backoff=PollBackoff(initial=0.02))
+
+        self.assertEqual(job.wait(backoff=PollBackoff(initial=0.001))["status"], "complete")
+        self.assertTrue(job.done)
+        self.assertEqual(job.progress, 3)
+        self.assertEqual(job.result(), job.data)
+
+    def test_failed_upload_and_warnings(self):
+        job = self.ak.Uploads.upload_users(self.users, "import_page")[0]
+        upload_id = int(self.ak.Uploads.get_resource_uri_id(job.upload_url))
+        self.server.resources["upload"][upload_id]["status"] = "died"
+        self.server.create("uploadwarning", upload=upload_id, warning="Unknown country")
+        with self.assertRaises(UploadError):
+            job.result()
+        self.assertEqual([w["warning"] for w in job.warnings()], ["Unknown country"])
+        self.assertEqual(list(job.errors()), [])
+
+    def test_async_upload_users(self):
+        async def run():
+            async with self.server.connect(actionkit.AsyncActionKit) as ak:
+                jobs = await ak.Uploads.upload_users(self.users, "import_page", chunk_size=4)
+                with self.assertRaises(asyncio.TimeoutError):
+                    await ak.Uploads.wait_all(jobs, timeout=0.01)
+                return await ak.Uploads.wait_all(jobs, backoff=PollBackoff(initial=0.001))
+
+        uploads = asyncio.run(run())
+        self.assertEqual([upload["is_completed"] for upload in uploads], [True] * 3)
+        self.assertEqual(b"".join(self.server.uploads).count(b"@example.com"), 10)
+
+    def test_async_upload_users_keeps_the_jobs_sent_before_a_failure(self):
+        async def run():
+            async with self.server.connect(actionkit.AsyncActionKit) as ak:
+                post_upload = ak.Uploads._post_upload
+
+                async def failing_post_upload(file_name, *args):
+                    if file_name == "users-0001.csv":
+                        raise requests.ConnectionError()
+                    return await post_upload(file_name, *args)
+
+                with mock.patch.object(ak.Uploads, "_post_upload", failing_post_upload):
+                    with self.assertRaises(UploadUsersError) as raised:
+                        await ak.Uploads.upload_users(self.users, "import_page", chunk_size=4)
+                return raised.exception
+
+        error = asyncio.run(run())
+        self.assertEqual(error.chunk, 1)
+        # Chunk 2 was being sent concurrently when chunk 1 failed
+        self.assertEqual(sorted(error.jobs), [0, 2])
+        self.assertEqual(len(self.server.uploads), 2)
@@ -0,0 +1,151 @@
+import base64
+import hashlib
+import os
+import tempfile
+import unittest
+
+from actionkit.cache import MemoryCache, SQLiteCache
+from actionkit.utils import HashVerifier, verify_hashed_value
+
+from fake_actionkit import FakeActionKit
+
+SECRET = "secret"
+
+
+def akid(user_id, mailing_id=""):
+    cleartext = f"{mailing_id}.{user_id}"
+    sha = hashlib.sha256(f"{SECRET}.{cleartext}".encode("ascii"))
+    return f"{cleartext}.{base64.urlsafe_b64encode(sha.digest()).decode('ascii')[:6]}"
+
+
+class HashVerifierTest(unittest.TestCase):
+    def test_verify(self):
+        verifier = HashVerifier(SECRET)
+        self.assertEqual(verifier.verify(akid(12, 3)), "3.12")
+        self.assertEqual(verify_hashed_value(akid(12), SECRET), ".12")
+        with self.assertRaises(Exception):
+            verifier.verify(akid(12)[:-1] + "x")
+
+
+class ResolveAkidsTest(unittest.TestCase):
+    def setUp(self):
+        self.queries = []
+        self.server = FakeActionKit(reports=dict(sql=self.run_sql)).start()
+        self.addCleanup(self.server.stop)
+        self.ak = self.server.connect()
+        self.addCleanup(self.ak.close)
+
+    def run_sql(self, values):
+        self.queries.append(values)
+        ids = [v for k, v in values.items() if k.startswith("u")]
+        return [[i, f"First{i}", f"Last{i}", f"user{i}@example.com"] for i in ids if i <= 100]
+
+    def test_resolve_akids(self):
+        self.ak.Users.sql.batch_size = 2
+        akids = [akid(1, 7), akid(2), akid(3), akid(1), akid(101), akid(4)[:-1] + "x"]
+        users = self.ak.Users.resolve_akids(akids, actionkit_secret_key=SECRET)
+        self.assertEqual(
+            users[akids[0]],
+            dict(first_name="First1", last_name="Last1", email="user1@example.com"),
+        )
+        self.assertEqual(users[akids[3]], users[akids[0]])
+        self.assertEqual(users[akids[2]]["email"], "user3@example.com")
+        self.assertIsNone(users[akids[4]])
+        self.assertIsNone(users[akids[5]])
+        # users 1, 2, 3 and 101 in batches of 2, with a short ActionKit cache
+        self.assertEqual(len(self.queries), 2)
+        self.assertEqual(self.queries[0]["cache_duration"], self.ak.Users.akid_cache_ttl)
+
+        self.assertEqual(
+            self.ak.Users.get_by_akid(akid(2, 8), actionkit_secret_key=SECRET)["last_name"],
+            "Last2",
+        )
+        self.assertEqual(len(self.queries), 2)
+
+    def test_get_by_akid(self):
+        with self.assertRaises(ValueError):
+            self.ak.Users.get_by_akid(akid(101), actionkit_secret_key=SECRET)
+        with self.assertRaises(ValueError):
+            self.ak.Users.get_by_akid(akid(1)[:-1] + "x", actionkit_secret_key=SECRET)
+        with self.assertRaises(ValueError):
+            self.ak.Users.resolve_akids(
+                [akid(1)], fields=["email; DROP"], actionkit_secret_key=SECRET
+            )
+
+        self.server.populate("user", 2, email="someone@example.com")
+        user = self.ak.Users.get_by_akid(akid(2), limited=False, actionkit_secret_key=SECRET)
+        self.assertEqual(user["resource_uri"], "/rest/v1/user/2/")
+
+
+class GetByEmailsTest(unittest.TestCase):
+    def setUp(self):
+        self.queries = []
+        self.server = FakeActionKit(reports=dict(sql=self.run_sql)).start()
+        self.addCleanup(self.server.stop)
+        self.server.populate("user", 3, first_name="Some", last_name="One")
+        self.server.create("user", email="Mixed.Case@Example.com")
+        for user in self.server.resources["user"].values():
+            user.setdefault("email", f"user{user['id']}@example.com")
+        self.ak = self.server.connect()
+        self.addCleanup(self.ak.close)
+
+    def run_sql(self, values):
+        self.queries.append(values)
+        emails = {v for k, v in values.items() if k.startswith("e")}
+        return [
+            [user["id"], user["email"], user.get("first_name"), user.get("last_name")]
+            for user in self.server.resources["user"].values()
+            if user["email"].lower() in emails
+        ]
+
+    def test_get_by_emails(self):
+        self.ak.Users.sql.batch_size = 2
+        users = self.ak.Users.get_by_emails(
+            ["user1@example.com", " USER2@example.com", "mixed.case@example.com", "no@example.com"]
+        )
+        self.assertEqual(
+            users["user1@example.com"],
+            dict(id=1, email="user1@example.com", first_name="Some", last_name="One"),
+        )
+        self.assertEqual(users[" USER2@example.com"]["id"], 2)
+        self.assertEqual(users["mixed.case@example.com"]["email"], "Mixed.Case@Example.com")
+        self.assertIsNone(users["no@example.com"])
+        self.assertEqual(len(self.queries), 2)
+        # The batches are run concurrently, in any order
+        self.assertIn("user2@example.com", [values.get("e1") for values in self.queries])
+
+    def test_email_index(self):
+        self.ak.Users.email_index = MemoryCache(maxsize=100)
+        self.ak.Users.get_by_emails(["user1@example.com", "user2@example.com"])
+        self.assertEqual(len(self.queries), 1)
+
+        users = self.ak.Users.get_by_emails(["User1@example.com", "user3@example.com"], ["id"])
+        self.assertEqual(users, {"User1@example.com": {"id": 1}, "user3@example.com": {"id": 3}})
+        self.assertEqual(self.queries[1]["e0"], "user3@example.com")
+        self.assertEqual(len(self.queries[1]), 4)  # e0 and the query options
+
+        # get_by_email fetches indexed users by id rather than searching their email
+        self.server.requests.clear()
+        self.assertEqual(self.ak.Users.get_by_email("USER2@example.com")["id"], 2)
+        self.assertEqual(self.server.requests, [("get", "/rest/v1/user/2")])
+
+        del self.server.resources["user"][2]
+        self.assertIsNone(self.ak.Users.get_by_email("user2@example.com"))
+        self.assertNotIn("user2@example.com", self.ak.Users.email_index)
+
+        # The email of user 1 changed since it was indexed
+        self.server.resources["user"][1]["email"] = "new@example.com"
+        self.server.create("user", email="user1@example.com")
+        self.assertEqual(self.ak.Users.get_by_email("user1@example.com")["id"], 5)
+        self.assertEqual(self.ak.Users.email_index.get("user1@example.com")["id"], 5)
+
+    def test_sqlite_email_index(self):
+        with tempfile.TemporaryDirectory() as directory:
+            index = SQLiteCache(os.path.join(directory, "emails.db"), table="emails")
+            self.ak.Users.email_index = index
+            self.assertEqual(self.ak.Users.get_by_email("user3@example.com")["id"], 3)
+            self.assertEqual(
+                self.ak.Users.get_by_emails(["user3@example.com"])["user3@example.com"]["id"], 3
+            )
+            self.assertEqual(self.queries, [])
+            index.close()